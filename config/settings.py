@@ -21,8 +21,115 @@ class Config:
     retention_minutes = int(os.getenv("CODECAST_RETENTION_MINUTES", "1"))
     DATA_RETENTION_PERIOD = timedelta(seconds=retention_minutes)
 
+    # 증분 스캔 사용 여부 (size, mtime_ns, inode가 그대로인 파일은 읽지 않음)
+    INCREMENTAL_SCAN = os.getenv("CODECAST_INCREMENTAL_SCAN", "true").strip().lower() == "true"
+
+    # 파일 사전 필터: 전체를 읽기 전에 stat 크기와 앞부분(SNIFF_BYTES)만 보고 diff할 가치가 없는 파일을 걸러냄
+    # - MAX_FILE_BYTES를 넘는 파일, NUL 바이트가 있는 파일(바이너리), 평균 줄 길이가 MAX_AVG_LINE_LENGTH를 넘는 파일(minified)
+    # - 앞부분에 GENERATED_MARKERS가 있거나 이름이 GENERATED_FILE_NAMES(lock 파일 등)에 해당하는 파일(자동 생성)
+    MAX_FILE_BYTES = int(os.getenv("CODECAST_MAX_FILE_BYTES", str(2 * 1024 * 1024)))
+    SNIFF_BYTES = int(os.getenv("CODECAST_SNIFF_BYTES", "8192"))
+    MAX_AVG_LINE_LENGTH = int(os.getenv("CODECAST_MAX_AVG_LINE_LENGTH", "300"))
+    GENERATED_MARKERS = [
+        marker.strip()
+        for marker in os.getenv(
+            "CODECAST_GENERATED_MARKERS", "@generated,DO NOT EDIT,Code generated by,auto-generated,autogenerated"
+        ).split(",")
+        if marker.strip()
+    ]
+    GENERATED_FILE_NAMES = set(
+        name.strip()
+        for name in os.getenv(
+            "CODECAST_GENERATED_FILE_NAMES",
+            "package-lock.json,yarn.lock,pnpm-lock.yaml,poetry.lock,Pipfile.lock,Cargo.lock,composer.lock,go.sum",
+        ).split(",")
+        if name.strip()
+    )
+
+    # 변경 감지용 해시 알고리즘: sha256(기본, 기존 값과 호환), blake2b, xxh3_128(xxhash 패키지 필요, 없으면 blake2b)
+    # 알고리즘을 바꾸면 기존 해시는 비교할 때 한 파일씩 옮겨지며, `python file_scanner.py migrate-hashes`로 한 번에 옮길 수 있음
+    HASH_ALGORITHM = os.getenv("CODECAST_HASH_ALGORITHM", "sha256").strip().lower()
+    # 큰 파일의 해시를 계산하는 스레드 풀 크기
+    HASH_WORKERS = int(os.getenv("CODECAST_HASH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+    # 감시 루트가 git 저장소면 디렉토리를 탐색하는 대신 .git/index의 경로를 DB stat과 비교해 바뀐 파일과 지워진 파일을 찾음
+    GIT_CHANGE_SOURCE = os.getenv("CODECAST_GIT_CHANGE_SOURCE", "true").strip().lower() == "true"
+    # git 변경 소스에서 `git ls-files -o`로 추적되지 않은 새 파일도 찾을지 여부 (git이 작업 트리를 탐색하므로 큰 트리에서는 끄면 빠름)
+    GIT_LIST_UNTRACKED = os.getenv("CODECAST_GIT_LIST_UNTRACKED", "true").strip().lower() == "true"
+
+    # 스캔 사이에 사라진 경로와 새 경로를 내용 해시(같으면 이동) 또는 같은 파일 이름 + 작은 diff로 짝지어 이동/이름 변경으로 기록
+    RENAME_DETECTION = os.getenv("CODECAST_RENAME_DETECTION", "true").strip().lower() == "true"
+    # 내용이 바뀐 채 이동된 파일로 인정할 최대 변경 줄 비율 (두 파일 전체 줄 수 대비 추가/삭제 줄 수)
+    RENAME_MAX_CHANGED_RATIO = float(os.getenv("CODECAST_RENAME_MAX_CHANGED_RATIO", "0.5"))
+
+    # 공백/주석/순서만 바뀐 hunk(포매터 실행 등)를 최근 변경사항(iter_recent_changes) 결과에서 뺄지 여부 (분류 표시는 항상 저장됨)
+    SUPPRESS_FORMATTING_CHANGES = os.getenv("CODECAST_SUPPRESS_FORMATTING_CHANGES", "true").strip().lower() == "true"
+
+    # 스캔 후 바뀐 hunk를 감싸는 함수/클래스를 찾아 changed_symbols에 저장할지 여부 (Python, JS/TS)
+    SYMBOL_ANALYSIS = os.getenv("CODECAST_SYMBOL_ANALYSIS", "true").strip().lower() == "true"
+
+    # 스캔 파이프라인 설정: 파일을 읽고 diff를 만드는 워커 수와 단계 사이 큐 깊이
+    SCAN_WORKERS = int(os.getenv("CODECAST_SCAN_WORKERS", "8"))
+    SCAN_QUEUE_SIZE = int(os.getenv("CODECAST_SCAN_QUEUE_SIZE", "64"))
+    # 2 이상이면 파일 읽기/해시/diff를 이 수만큼의 프로세스로 나눠 처리 (DB 저장은 메인 프로세스의 writer 하나가 담당)
+    SCAN_PROCESSES = int(os.getenv("CODECAST_SCAN_PROCESSES", "1"))
+    # 프로세스 하나에 한 번에 넘기는 파일 수 (탐색 순서대로 묶이므로 대부분 같은 디렉토리의 파일)
+    SCAN_SHARD_SIZE = int(os.getenv("CODECAST_SCAN_SHARD_SIZE", "32"))
+
+    # diff 엔진 설정: myers(기본) 또는 difflib
+    # 두 파일 중 하나라도 DIFF_MAX_BYTES를 넘거나 계산이 DIFF_TIMEOUT_SECONDS를 넘으면 '파일 교체' 요약만 저장
+    DIFF_ENGINE = os.getenv("CODECAST_DIFF_ENGINE", "myers").strip().lower()
+    DIFF_MAX_BYTES = int(os.getenv("CODECAST_DIFF_MAX_BYTES", str(5 * 1024 * 1024)))
+    DIFF_TIMEOUT_SECONDS = float(os.getenv("CODECAST_DIFF_TIMEOUT_SECONDS", "2.0"))
+
+    # 파일 내용 압축 코덱 (zstd는 zstandard 패키지가 설치된 경우에만 사용, 없으면 zlib)
+    BLOB_CODEC = os.getenv("CODECAST_BLOB_CODEC", "zstd").strip().lower()
+    BLOB_COMPRESSION_LEVEL = int(os.getenv("CODECAST_BLOB_COMPRESSION_LEVEL", "6"))
+
+    # 파일 내용 디코딩: UTF-8로 읽히지 않는 파일에 차례로 시도할 인코딩 (모두 실패하면 latin-1)
+    TEXT_FALLBACK_ENCODINGS = [
+        encoding.strip()
+        for encoding in os.getenv("CODECAST_TEXT_FALLBACK_ENCODINGS", "cp949").split(",")
+        if encoding.strip()
+    ]
+    # 디코딩한 텍스트를 내용 해시별로 메모리에 캐시할 개수 (0이면 캐시 안 함)
+    TEXT_CACHE_SIZE = int(os.getenv("CODECAST_TEXT_CACHE_SIZE", "512"))
+
+    # 파일 버전 이력: N번째 버전마다 전체 내용을 snapshot으로 유지, 보관 기간(일, 0이면 무기한)
+    HISTORY_SNAPSHOT_INTERVAL = max(1, int(os.getenv("CODECAST_HISTORY_SNAPSHOT_INTERVAL", "16")))
+    HISTORY_RETENTION_DAYS = int(os.getenv("CODECAST_HISTORY_RETENTION_DAYS", "0"))
+    HISTORY_COMPACT_INTERVAL_SECONDS = int(os.getenv("CODECAST_HISTORY_COMPACT_INTERVAL_SECONDS", "3600"))
+
+    # 보관 기간 정리: 파일 존재 여부를 한 스레드에서 확인할 개수, 정리 후 빈 페이지를 파일 시스템에 돌려줄지 여부
+    CLEANUP_EXISTS_BATCH_SIZE = int(os.getenv("CODECAST_CLEANUP_EXISTS_BATCH_SIZE", "500"))
+    CLEANUP_INCREMENTAL_VACUUM = os.getenv("CODECAST_CLEANUP_INCREMENTAL_VACUUM", "false").strip().lower() == "true"
+
+    # 한 트랜잭션에 묶어서 저장할 파일 수
+    DB_BATCH_SIZE = int(os.getenv("CODECAST_DB_BATCH_SIZE", "200"))
+    # 최근 변경사항(iter_recent_changes)을 한 번에 읽어 올 파일 수
+    RECENT_CHANGES_PAGE_SIZE = max(1, int(os.getenv("CODECAST_RECENT_CHANGES_PAGE_SIZE", "100")))
+
+    # SQLite 커넥션 설정 (file_watcher/db_connection.py): WAL이면 watcher가 쓰는 동안에도 리포트 쪽 읽기가 막히지 않음
+    SQLITE_JOURNAL_MODE = os.getenv("CODECAST_SQLITE_JOURNAL_MODE", "wal").strip().lower()
+    SQLITE_SYNCHRONOUS = os.getenv("CODECAST_SQLITE_SYNCHRONOUS", "normal").strip().lower()
+    # 커넥션 하나의 페이지 캐시 크기(KB)와 잠금을 기다릴 최대 시간(ms)
+    SQLITE_CACHE_KB = int(os.getenv("CODECAST_SQLITE_CACHE_KB", "16384"))
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("CODECAST_SQLITE_BUSY_TIMEOUT_MS", "30000"))
+    # 재사용을 위해 열어 둘 비동기 커넥션(전용 스레드) 수
+    SQLITE_ASYNC_CONNECTIONS = int(os.getenv("CODECAST_SQLITE_ASYNC_CONNECTIONS", "4"))
+
     # 데이터베이스 파일 경로 (고정값 사용)
     DB_PATH = BASE_DIR / "file_history.db"  # 과거엔 사용, 지금은 사용 안할수도
+    # 스캔마다 단계별 소요 시간과 카운터를 기록하는 JSON 리포트 (DB 파일 옆에 저장)
+    SCAN_REPORT_PATH = DB_PATH.parent / "scan_report.json"
+    # 파일 단위 로그(Checking file 등) 출력 여부. 큰 트리를 스캔할 때는 꺼 두는 것을 권장
+    SCAN_VERBOSE = os.getenv("CODECAST_SCAN_VERBOSE", "false").strip().lower() == "true"
+
+    # 감시 모드(watch) 설정: 이벤트가 이 시간(초) 동안 잠잠해지면 처리
+    WATCH_DEBOUNCE_SECONDS = float(os.getenv("CODECAST_WATCH_DEBOUNCE_SECONDS", "1.0"))
+    # 감시 데몬 하트비트 파일. 갱신된 지 WATCH_HEARTBEAT_TIMEOUT_SECONDS 이내면 아침 스캔에서 전체 탐색을 생략
+    WATCH_HEARTBEAT_PATH = BASE_DIR / ".watch_heartbeat"
+    WATCH_HEARTBEAT_TIMEOUT_SECONDS = int(os.getenv("CODECAST_WATCH_HEARTBEAT_TIMEOUT_SECONDS", "30"))
 
     # 최대 분석 결과 보관 개수 (기본값 10)
     MAX_ANALYSIS_RECORDS = int(os.getenv("CODECAST_MAX_ANALYSIS_RECORDS", "10").strip())
@@ -4,6 +4,8 @@ import sys
 import asyncio
 from file_watcher.differ import FileChangeHandler
 from file_watcher.state_manager import DatabaseManager
+from file_watcher.scan_stats import write_scan_report
+from file_watcher.watch_daemon import WatchDaemon
 from config.settings import Config
 
 
@@ -28,17 +30,25 @@ def get_unique_directories(directories):
     return unique_dirs
 
 
-async def main():
+def prepare_watch_directories():
+    """감시 디렉토리 목록을 정리하고, 없는 디렉토리는 생성합니다."""
     unique_dirs = get_unique_directories(Config.WATCH_DIRECTORIES)
 
-    for watch_dir in unique_dirs:
+    for watch_dir in list(unique_dirs):
         if not os.path.exists(watch_dir):
             try:
                 os.makedirs(watch_dir)
                 print(f"Created watch directory at {watch_dir}")
             except Exception as e:
+                # 만들 수 없는 디렉토리만 제외하고 나머지 디렉토리는 계속 스캔
                 print(f"Error creating directory {watch_dir}: {e}")
-                sys.exit(1)
+                unique_dirs.remove(watch_dir)
+
+    return unique_dirs
+
+
+async def main():
+    unique_dirs = prepare_watch_directories()
 
     print("Starting scan of directories")
     print(f"Data retention period: {Config.DATA_RETENTION_PERIOD}")
@@ -49,13 +59,60 @@ async def main():
 
     handler = FileChangeHandler()
 
+    if WatchDaemon.is_alive():
+        # 감시 데몬이 이미 변경사항을 저장하고 있으므로 전체 트리 탐색은 생략
+        print("Watch daemon is running; skipping full directory scan")
+    else:
+        scan_results = []
+        for watch_dir in unique_dirs:
+            print(f"\nProcessing directory: {watch_dir}")
+            scan_results.append(await handler.scan_directory(watch_dir, db_manager))
+        write_scan_report(scan_results)
+
+        failed_dirs = [stats.root for stats in scan_results if stats.status != "completed"]
+        if failed_dirs:
+            # 중단된 스캔은 다음 실행에서 체크포인트부터 이어서 진행
+            print(f"Scans to be resumed on next run: {failed_dirs}")
+
+    if Config.SYMBOL_ANALYSIS:
+        # 분석할 변경이 한 번에 처리하는 개수보다 많으면(오래된 DB의 첫 실행 등) 모두 끝날 때까지 반복
+        while (await db_manager.analyze_changed_symbols())["changes"]:
+            pass
+    await db_manager.compact_history()
+    await db_manager.cleanup_old_data()
+    print("All directory scans completed")
+
+
+async def watch():
+    """감시 디렉토리의 파일 시스템 이벤트를 구독해 변경된 파일만 계속 저장합니다."""
+    unique_dirs = prepare_watch_directories()
+
+    db_manager = DatabaseManager(Config.DB_PATH)
+    await db_manager.initialize()
+
+    handler = FileChangeHandler()
+
+    # 데몬이 꺼져 있던 동안의 변경사항을 먼저 반영
     for watch_dir in unique_dirs:
-        print(f"\nProcessing directory: {watch_dir}")
         await handler.scan_directory(watch_dir, db_manager)
 
-    await db_manager.cleanup_old_data()
-    print("All directory scans completed")
+    await WatchDaemon(handler, db_manager, unique_dirs).run()
+
+
+async def migrate_hashes():
+    """저장된 파일 해시를 현재 HASH_ALGORITHM으로 한 번에 옮깁니다."""
+    db_manager = DatabaseManager(Config.DB_PATH)
+    await db_manager.initialize()
+    await db_manager.migrate_file_hashes()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    if len(sys.argv) > 1 and sys.argv[1] == "migrate-hashes":
+        asyncio.run(migrate_hashes())
+    elif len(sys.argv) > 1 and sys.argv[1] == "watch":
+        try:
+            asyncio.run(watch())
+        except KeyboardInterrupt:
+            print("Watch daemon stopped")
+    else:
+        asyncio.run(main())
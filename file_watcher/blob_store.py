@@ -0,0 +1,63 @@
+# file_watcher/blob_store.py
+
+import zlib
+
+from config.settings import Config
+from file_watcher import text_codec
+
+try:
+    import zstandard
+except ImportError:  # zstandard는 선택 의존성
+    zstandard = None
+
+
+def available_codec(codec=None):
+    """사용할 압축 코덱을 결정합니다. zstd를 요청했지만 설치되어 있지 않으면 zlib을 사용합니다."""
+    codec = (codec or Config.BLOB_CODEC).lower()
+    if codec == "zstd" and zstandard is None:
+        return "zlib"
+    return codec if codec in ("zstd", "zlib", "none") else "zlib"
+
+
+def compress(data, codec=None):
+    """파일 내용을 압축해 (codec, 압축된 바이트)를 반환합니다."""
+    codec = available_codec(codec)
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=Config.BLOB_COMPRESSION_LEVEL).compress(data)
+    if codec == "zlib":
+        return codec, zlib.compress(data, min(Config.BLOB_COMPRESSION_LEVEL, 9))
+    return codec, data
+
+
+def decompress(codec, data):
+    """blobs 테이블에 저장된 바이트를 원래 내용으로 되돌립니다."""
+    if data is None:
+        return None
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstandard package is required to read zstd-compressed blobs")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == "zlib":
+        return zlib.decompress(data)
+    return data
+
+
+def load_text(file_hash, codec, data, encoding=None, utf8_codec=None, utf8_data=None, content=None):
+    """blobs 행의 내용을 텍스트로 반환합니다.
+
+    캐시 -> 저장된 UTF-8 텍스트(utf8_data, 원본이 UTF-8이 아닌 경우만 있음) -> 원본을 기록된 인코딩으로 디코딩 순으로 찾습니다.
+    이미 압축을 푼 원본이 있으면 content로 넘깁니다.
+    """
+    text = text_codec.cached_text(file_hash)
+    if text is not None:
+        return text
+    if utf8_data is not None:
+        text = decompress(utf8_codec, utf8_data).decode(text_codec.UTF8, errors="replace")
+    else:
+        if content is None:
+            content = decompress(codec, data)
+        if content is None:
+            return None
+        text = text_codec.decode_as(content, encoding)
+    text_codec.remember(file_hash, text)
+    return text
@@ -0,0 +1,202 @@
+# file_watcher/db_connection.py
+
+import asyncio
+import atexit
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import Config
+
+# 스레드마다 재사용하는 커넥션: (db 경로, 읽기 전용 여부) -> [커넥션, 사용 중인 깊이]
+_local = threading.local()
+# 모든 스레드에서 만든 커넥션 (종료 시 닫아 WAL을 체크포인트하기 위함)
+_all_connections = []
+_all_connections_lock = threading.Lock()
+
+
+def _open(db_path, readonly):
+    if readonly:
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+    else:
+        conn = sqlite3.connect(db_path, timeout=Config.SQLITE_BUSY_TIMEOUT_MS / 1000)
+        # journal_mode는 DB 파일에 기록되므로 읽기 전용 커넥션에서는 바꾸지 않음
+        conn.execute(f"PRAGMA journal_mode = {Config.SQLITE_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {Config.SQLITE_SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = {-Config.SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA busy_timeout = {Config.SQLITE_BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA foreign_keys = ON")
+    with _all_connections_lock:
+        _all_connections.append(conn)
+    return conn
+
+
+def get_connection(db_path=None, readonly=False):
+    """현재 스레드의 커넥션을 반환합니다. 없으면 WAL과 pragma를 설정해 새로 열고, 이후 같은 스레드에서 재사용합니다.
+
+    다 쓰면 release()를 호출해야 하며, 커밋하지 않은 변경은 바깥쪽 release에서 롤백됩니다. (커넥션은 닫지 않음)
+    """
+    key = (str(db_path or Config.DB_PATH), readonly)
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    entry = connections.get(key)
+    if entry is None:
+        entry = connections[key] = [_open(key[0], readonly), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+def release(conn):
+    """get_connection으로 얻은 커넥션 사용을 마칩니다. 같은 스레드에서 중첩해 얻은 경우 가장 바깥쪽에서만 정리합니다."""
+    for entry in getattr(_local, "connections", {}).values():
+        if entry[0] is conn:
+            entry[1] -= 1
+            if entry[1] == 0 and conn.in_transaction:
+                conn.rollback()
+            return
+
+
+def _close_thread_connections():
+    """현재 스레드가 재사용하던 커넥션을 닫습니다. (풀에서 빠지는 스레드용)"""
+    for conn, _ in getattr(_local, "connections", {}).values():
+        with _all_connections_lock:
+            if conn in _all_connections:
+                _all_connections.remove(conn)
+        conn.close()
+    _local.connections = {}
+
+
+def close_all():
+    """열어 둔 모든 커넥션을 닫습니다. (프로세스 종료 시 자동 호출)"""
+    with _all_connections_lock:
+        connections, _all_connections[:] = list(_all_connections), []
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+
+atexit.register(close_all)
+
+
+class _AsyncCursor:
+    """sqlite3 커서를 비동기로 감싼 것. fetch는 커서를 만든 스레드에서 실행합니다."""
+
+    def __init__(self, connection, cursor):
+        self._connection = connection
+        self._cursor = cursor
+        self.rowcount = cursor.rowcount
+        self.lastrowid = cursor.lastrowid
+
+    async def fetchone(self):
+        return await self._connection._run(self._cursor.fetchone)
+
+    async def fetchall(self):
+        return await self._connection._run(self._cursor.fetchall)
+
+
+class AsyncConnection:
+    """aiosqlite와 같은 방식으로 쓰는 비동기 커넥션.
+
+    전용 스레드 하나에 고정되어 그 스레드의 재사용 커넥션(get_connection)으로 실행하므로, 호출마다 연결을 새로 열지 않습니다.
+    close()하면 커밋하지 않은 변경을 롤백하고 스레드를 다음 사용자를 위해 풀에 돌려줍니다.
+    """
+
+    def __init__(self, worker, db_path, readonly):
+        self._worker = worker
+        self._key = (db_path, readonly)
+        self._conn = None
+
+    async def _run(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._worker, function, *args)
+
+    async def _open(self):
+        self._conn = await self._run(get_connection, *self._key)
+        return self
+
+    async def execute(self, sql, parameters=()):
+        return _AsyncCursor(self, await self._run(self._conn.execute, sql, parameters))
+
+    async def executemany(self, sql, parameters):
+        return _AsyncCursor(self, await self._run(self._conn.executemany, sql, parameters))
+
+    async def executescript(self, script):
+        return _AsyncCursor(self, await self._run(self._conn.executescript, script))
+
+    async def commit(self):
+        await self._run(self._conn.commit)
+
+    async def rollback(self):
+        await self._run(self._conn.rollback)
+
+    async def run(self, function, *args):
+        """커넥션 스레드에서 function(sqlite3 커넥션, *args)를 실행합니다. 여러 문장을 스레드 전환 한 번으로 처리할 때 씁니다."""
+        return await self._run(function, self._conn, *args)
+
+    async def close(self):
+        if self._conn is None:
+            return
+        conn, self._conn = self._conn, None
+        await self._run(release, conn)
+        _release_worker(self._worker)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+
+# 쉬고 있는 비동기 커넥션용 스레드 (스레드 하나짜리 executor)
+_idle_workers = []
+_idle_workers_lock = threading.Lock()
+
+
+def _acquire_worker():
+    with _idle_workers_lock:
+        if _idle_workers:
+            return _idle_workers.pop()
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+
+def _release_worker(worker):
+    with _idle_workers_lock:
+        if len(_idle_workers) < Config.SQLITE_ASYNC_CONNECTIONS:
+            _idle_workers.append(worker)
+            return
+    worker.submit(_close_thread_connections)
+    worker.shutdown(wait=False)
+
+
+class _Connect:
+    """await로도, async with로도 쓸 수 있는 connect_async의 반환값 (aiosqlite.connect와 같은 사용법)"""
+
+    def __init__(self, db_path, readonly):
+        self._db_path = str(db_path or Config.DB_PATH)
+        self._readonly = readonly
+        self._connection = None
+
+    def __await__(self):
+        return self._connect().__await__()
+
+    async def _connect(self):
+        self._connection = AsyncConnection(_acquire_worker(), self._db_path, self._readonly)
+        try:
+            return await self._connection._open()
+        except BaseException:
+            _release_worker(self._connection._worker)
+            raise
+
+    async def __aenter__(self):
+        return await self._connect()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self._connection.close()
+
+
+def connect_async(db_path=None, readonly=False):
+    """비동기 커넥션을 엽니다. 쉬는 스레드(와 그 스레드의 커넥션)를 재사용하며, 모두 사용 중이면 스레드를 새로 만듭니다."""
+    return _Connect(db_path, readonly)
@@ -0,0 +1,318 @@
+# file_watcher/diff_engine.py
+
+import bisect
+import difflib
+import time
+
+from config.settings import Config
+
+
+class DiffTooExpensive(Exception):
+    """diff 계산이 크기 또는 시간 제한을 넘었을 때 발생합니다."""
+
+
+def _intern_lines(old_lines, new_lines):
+    """각 줄을 정수 ID로 바꿔 비교 비용을 문자열 비교에서 정수 비교로 줄입니다."""
+    line_ids = {}
+    old_ids = [line_ids.setdefault(line, len(line_ids)) for line in old_lines]
+    new_ids = [line_ids.setdefault(line, len(line_ids)) for line in new_lines]
+    return old_ids, new_ids
+
+
+def _bisect(a, a_lo, a_hi, b, b_lo, b_hi, deadline):
+    """Myers 알고리즘의 middle snake를 찾아 분할 지점 (x, y)를 반환합니다. 공통 부분이 없으면 None."""
+    len1 = a_hi - a_lo
+    len2 = b_hi - b_lo
+    max_d = (len1 + len2 + 1) // 2
+    v_offset = max_d
+    v_length = 2 * max_d + 2
+    v1 = [-1] * v_length
+    v2 = [-1] * v_length
+    v1[v_offset + 1] = 0
+    v2[v_offset + 1] = 0
+    delta = len1 - len2
+    front = delta % 2 != 0
+    k1start = k1end = k2start = k2end = 0
+
+    for d in range(max_d):
+        if time.monotonic() > deadline:
+            raise DiffTooExpensive("time limit")
+
+        # 정방향 탐색
+        for k1 in range(-d + k1start, d + 1 - k1end, 2):
+            k1_offset = v_offset + k1
+            if k1 == -d or (k1 != d and v1[k1_offset - 1] < v1[k1_offset + 1]):
+                x1 = v1[k1_offset + 1]
+            else:
+                x1 = v1[k1_offset - 1] + 1
+            y1 = x1 - k1
+            while x1 < len1 and y1 < len2 and a[a_lo + x1] == b[b_lo + y1]:
+                x1 += 1
+                y1 += 1
+            v1[k1_offset] = x1
+            if x1 > len1:
+                k1end += 2
+            elif y1 > len2:
+                k1start += 2
+            elif front:
+                k2_offset = v_offset + delta - k1
+                if 0 <= k2_offset < v_length and v2[k2_offset] != -1:
+                    if x1 >= len1 - v2[k2_offset]:
+                        return x1, y1
+
+        # 역방향 탐색
+        for k2 in range(-d + k2start, d + 1 - k2end, 2):
+            k2_offset = v_offset + k2
+            if k2 == -d or (k2 != d and v2[k2_offset - 1] < v2[k2_offset + 1]):
+                x2 = v2[k2_offset + 1]
+            else:
+                x2 = v2[k2_offset - 1] + 1
+            y2 = x2 - k2
+            while x2 < len1 and y2 < len2 and a[a_hi - 1 - x2] == b[b_hi - 1 - y2]:
+                x2 += 1
+                y2 += 1
+            v2[k2_offset] = x2
+            if x2 > len1:
+                k2end += 2
+            elif y2 > len2:
+                k2start += 2
+            elif not front:
+                k1_offset = v_offset + delta - k2
+                if 0 <= k1_offset < v_length and v1[k1_offset] != -1:
+                    x1 = v1[k1_offset]
+                    if x1 >= len1 - x2:
+                        return x1, v_offset + x1 - k1_offset
+
+    return None
+
+
+def _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi):
+    """양쪽에서 한 번씩만 등장하는 줄을 짝지은 뒤, 순서가 유지되는 최장 증가 부분열을 anchor로 반환합니다.
+
+    patience diff와 같은 방식으로, 큰 구간을 anchor 사이의 작은 구간으로 나눠 Myers 탐색 비용을 줄입니다.
+    """
+    positions_a = {}
+    for i in range(a_lo, a_hi):
+        positions_a[a[i]] = -1 if a[i] in positions_a else i
+    positions_b = {}
+    for j in range(b_lo, b_hi):
+        positions_b[b[j]] = -1 if b[j] in positions_b else j
+
+    pairs = sorted(
+        (i, positions_b[line])
+        for line, i in positions_a.items()
+        if i != -1 and positions_b.get(line, -1) != -1
+    )
+    if not pairs:
+        return []
+
+    # j 기준 최장 증가 부분열 (patience sorting)
+    tails = []
+    tail_indexes = []
+    previous = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        pos = bisect.bisect_left(tails, j)
+        if pos == len(tails):
+            tails.append(j)
+            tail_indexes.append(index)
+        else:
+            tails[pos] = j
+            tail_indexes[pos] = index
+        previous[index] = tail_indexes[pos - 1] if pos else -1
+
+    anchors = []
+    index = tail_indexes[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = previous[index]
+    anchors.reverse()
+    return anchors
+
+
+def _append_opcode(opcodes, tag, i1, i2, j1, j2):
+    """인접한 opcode를 합치면서 추가합니다. delete와 insert가 붙으면 replace로 합칩니다."""
+    if opcodes:
+        last_tag, li1, li2, lj1, lj2 = opcodes[-1]
+        if last_tag == tag or (last_tag != "equal" and tag != "equal"):
+            merged_tag = tag if last_tag == tag else "replace"
+            opcodes[-1] = (merged_tag, li1, i2, lj1, j2)
+            return
+    opcodes.append((tag, i1, i2, j1, j2))
+
+
+def myers_opcodes(a, b, deadline):
+    """정수 시퀀스 a, b에 대해 difflib.SequenceMatcher.get_opcodes()와 같은 형식의 opcode를 계산합니다.
+
+    공통 접두/접미사를 먼저 잘라내고, 양쪽에 한 번씩만 나오는 줄을 anchor로 구간을 나눈 뒤,
+    anchor가 없는 구간만 선형 공간 Myers 분할로 처리합니다. 재귀 대신 명시적 스택을 사용합니다.
+    """
+    opcodes = []
+    stack = [("diff", 0, len(a), 0, len(b))]
+
+    while stack:
+        kind, a_lo, a_hi, b_lo, b_hi = stack.pop()
+        if kind == "equal":
+            _append_opcode(opcodes, "equal", a_lo, a_hi, b_lo, b_hi)
+            continue
+
+        prefix = 0
+        while a_lo + prefix < a_hi and b_lo + prefix < b_hi and a[a_lo + prefix] == b[b_lo + prefix]:
+            prefix += 1
+        if prefix:
+            _append_opcode(opcodes, "equal", a_lo, a_lo + prefix, b_lo, b_lo + prefix)
+            a_lo += prefix
+            b_lo += prefix
+
+        suffix = 0
+        while a_hi - suffix > a_lo and b_hi - suffix > b_lo and a[a_hi - 1 - suffix] == b[b_hi - 1 - suffix]:
+            suffix += 1
+        if suffix:
+            stack.append(("equal", a_hi - suffix, a_hi, b_hi - suffix, b_hi))
+            a_hi -= suffix
+            b_hi -= suffix
+
+        if a_lo == a_hi and b_lo == b_hi:
+            continue
+        if a_lo == a_hi:
+            _append_opcode(opcodes, "insert", a_lo, a_hi, b_lo, b_hi)
+            continue
+        if b_lo == b_hi:
+            _append_opcode(opcodes, "delete", a_lo, a_hi, b_lo, b_hi)
+            continue
+
+        anchors = _unique_anchors(a, a_lo, a_hi, b, b_lo, b_hi)
+        if anchors:
+            # anchor 사이 구간을 뒤에서부터 쌓아야 앞 구간이 먼저 처리됨
+            next_i, next_j = a_hi, b_hi
+            for i, j in reversed(anchors):
+                stack.append(("diff", i + 1, next_i, j + 1, next_j))
+                stack.append(("equal", i, i + 1, j, j + 1))
+                next_i, next_j = i, j
+            stack.append(("diff", a_lo, next_i, b_lo, next_j))
+            continue
+
+        if time.monotonic() > deadline:
+            raise DiffTooExpensive("time limit")
+        split = _bisect(a, a_lo, a_hi, b, b_lo, b_hi, deadline)
+        if split is None:
+            _append_opcode(opcodes, "replace", a_lo, a_hi, b_lo, b_hi)
+            continue
+
+        x, y = split
+        stack.append(("diff", a_lo + x, a_hi, b_lo + y, b_hi))
+        stack.append(("diff", a_lo, a_lo + x, b_lo, b_lo + y))
+
+    return opcodes
+
+
+def group_opcodes(opcodes, n=3):
+    """opcode를 앞뒤 n줄의 문맥을 가진 hunk 단위로 묶습니다. (difflib.get_grouped_opcodes와 동일한 규칙)"""
+    codes = list(opcodes) or [("equal", 0, 1, 0, 1)]
+    if codes[0][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == "equal":
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == "equal" and i2 - i1 > n * 2:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == "equal"):
+        yield group
+
+
+def _format_range(start, stop):
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return f"{beginning}"
+    if not length:
+        beginning -= 1
+    return f"{beginning},{length}"
+
+
+def format_unified(old_lines, new_lines, opcodes, n=3, hunk_labels=None):
+    """opcode를 difflib.unified_diff(lineterm="")와 같은 형식의 줄 목록으로 만듭니다.
+
+    hunk_labels(group_opcodes의 hunk 순서와 같은 목록)가 주어지면 값이 있는 hunk의 머리말 끝에 [label]을 붙입니다.
+    """
+    diff_lines = []
+    for index, group in enumerate(group_opcodes(opcodes, n)):
+        if not diff_lines:
+            diff_lines.extend(["--- before", "+++ after"])
+        first, last = group[0], group[-1]
+        old_range = _format_range(first[1], last[2])
+        new_range = _format_range(first[3], last[4])
+        label = hunk_labels[index] if hunk_labels else None
+        diff_lines.append(f"@@ -{old_range} +{new_range} @@ [{label}]" if label else f"@@ -{old_range} +{new_range} @@")
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                diff_lines.extend(" " + line for line in old_lines[i1:i2])
+                continue
+            if tag in ("replace", "delete"):
+                diff_lines.extend("-" + line for line in old_lines[i1:i2])
+            if tag in ("replace", "insert"):
+                diff_lines.extend("+" + line for line in new_lines[j1:j2])
+    return diff_lines
+
+
+class MyersDiffEngine:
+    """줄을 정수로 인터닝한 뒤 patience anchor와 선형 공간 Myers 알고리즘으로 diff를 계산합니다."""
+
+    name = "myers"
+
+    def opcodes(self, old_lines, new_lines, deadline):
+        old_ids, new_ids = _intern_lines(old_lines, new_lines)
+        return myers_opcodes(old_ids, new_ids, deadline)
+
+
+class DifflibDiffEngine:
+    """기존 difflib.SequenceMatcher 기반 엔진입니다. 비교 및 호환용으로 남겨 둡니다."""
+
+    name = "difflib"
+
+    def opcodes(self, old_lines, new_lines, deadline):
+        return difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+
+
+DIFF_ENGINES = {engine.name: engine for engine in (MyersDiffEngine(), DifflibDiffEngine())}
+
+
+def get_diff_engine(name=None):
+    """이름으로 diff 엔진을 찾습니다. 알 수 없는 이름이면 myers 엔진을 사용합니다."""
+    return DIFF_ENGINES.get(name or Config.DIFF_ENGINE, DIFF_ENGINES["myers"])
+
+
+def replaced_summary(old_lines, new_lines, reason):
+    """diff를 생략할 때 저장하는 '파일 교체' 요약입니다."""
+    return [
+        "--- before",
+        "+++ after",
+        f"@@ file replaced: {len(old_lines)} -> {len(new_lines)} lines (diff skipped: {reason}) @@",
+    ]
+
+
+def compute_opcodes(old_lines, new_lines, engine=None, max_bytes=None, timeout=None, old_size=0, new_size=0):
+    """크기/시간 제한 안에서 opcode를 계산합니다. 제한을 넘으면 DiffTooExpensive를 발생시킵니다."""
+    engine = engine or get_diff_engine()
+    max_bytes = Config.DIFF_MAX_BYTES if max_bytes is None else max_bytes
+    timeout = Config.DIFF_TIMEOUT_SECONDS if timeout is None else timeout
+
+    if max_bytes and max(old_size, new_size) > max_bytes:
+        raise DiffTooExpensive("size limit")
+    return engine.opcodes(old_lines, new_lines, time.monotonic() + timeout)
+
+
+def unified_diff_lines(old_lines, new_lines, engine=None, max_bytes=None, timeout=None, old_size=0, new_size=0):
+    """크기/시간 제한 안에서 unified diff 줄 목록을 계산하고, 제한을 넘으면 교체 요약을 반환합니다."""
+    try:
+        opcodes = compute_opcodes(old_lines, new_lines, engine, max_bytes, timeout, old_size, new_size)
+    except DiffTooExpensive as e:
+        return replaced_summary(old_lines, new_lines, str(e))
+    return format_unified(old_lines, new_lines, opcodes)
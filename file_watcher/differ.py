@@ -1,161 +1,644 @@
 # file_watcher/differ.py
 
-import hashlib
+import multiprocessing
 import os
 import platform
+import time
 import aiofiles
-import difflib
 import asyncio
-import sys
+from concurrent.futures import ProcessPoolExecutor
 
 from config.settings import Config
+from file_watcher import db_connection, file_filter, git_source, hashing, hunk_classifier, hunks, text_codec
+from file_watcher.diff_engine import (
+    DiffTooExpensive,
+    compute_opcodes,
+    format_unified,
+    group_opcodes,
+    replaced_summary,
+)
+from file_watcher.history import build_reverse_delta
+from file_watcher.ignore_matcher import IgnoreMatcher
+from file_watcher.rename_detector import RenameDetector
+from file_watcher.scan_stats import ScanStats, verbose
+from file_watcher.state_manager import DatabaseManager
 
 
 class FileChangeHandler:
     def __init__(self):
         self.is_windows = platform.system() == "Windows"
+        # 감시 루트별로 컴파일해 둔 ignore 규칙 (루트 절대 경로 -> IgnoreMatcher)
+        self._ignore_matchers = {}
+        # 현재(또는 마지막) 스캔의 단계별 계측값. scan_directory가 실행마다 새로 만듭니다.
+        self.stats = ScanStats()
 
     async def get_file_info(self, file_path):
-        """파일 정보를 비동기적으로 추출합니다."""
-        if not os.path.exists(file_path):
-            print(f"File not found: {file_path}")
-            return None
+        """파일 정보를 비동기적으로 추출합니다.
 
+        전체를 읽기 전에 stat 크기와 앞부분(SNIFF_BYTES)으로 먼저 걸러내며, 걸러진 파일은 content 없이
+        skip_reason과 표식 해시만 반환합니다.
+        통과한 파일은 한 번만 읽고, 해시는 저장할 내용과 같은 버퍼에서 계산합니다.
+        텍스트도 여기서 한 번만 디코딩해 text(와 감지한 encoding)로 넘기며, 이후 diff와 저장은 이 텍스트를 씁니다.
+        (저장과 diff에 내용 전체가 bytes로 필요하고 MAX_FILE_BYTES를 넘는 파일은 읽지 않으므로 mmap을 쓰지 않습니다.)
+        """
         try:
-            async with aiofiles.open(file_path, mode="rb") as f:
-                content = await f.read()
-                print(f"Read binary file content: {file_path}")
-        except Exception as e:
-            print(f"Error reading file {file_path}: {e}")
-            content = b""
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            verbose(f"File not found: {file_path}")
+            return None
 
-        file_stat = os.stat(file_path)
-        file_hash = await self._calculate_file_hash(file_path)
+        skip_reason = file_filter.reject_by_stat(file_path, file_stat.st_size)
+        content = None
+        if not skip_reason:
+            try:
+                with self.stats.phase("read"):
+                    async with aiofiles.open(file_path, mode="rb") as f:
+                        head = await f.read(Config.SNIFF_BYTES)
+                        skip_reason = file_filter.reject_by_head(head)
+                        if not skip_reason:
+                            content = head + await f.read()
+                self.stats.count("files_read")
+                self.stats.count("bytes_read", len(content) if content else min(file_stat.st_size, Config.SNIFF_BYTES))
+                verbose(f"Read binary file content: {file_path}")
+            except Exception as e:
+                # 읽지 못한 파일을 빈 내용으로 저장하지 않도록 호출한 쪽에서 오류로 처리
+                print(f"Error reading file {file_path}: {e}")
+                raise
 
-        return {
+        file_info = {
             "size": file_stat.st_size,
             "mtime": file_stat.st_mtime,
-            "hash": file_hash,
-            "content": content,
+            "mtime_ns": file_stat.st_mtime_ns,
+            "inode": file_stat.st_ino,
         }
+        if skip_reason:
+            verbose(f"Skipping file ({skip_reason}): {file_path}")
+            self.stats.count("files_rejected")
+            self.stats.count(f"files_rejected_{skip_reason}")
+            file_info.update(hash=file_filter.skipped_hash(skip_reason), content=None, skip_reason=skip_reason)
+        else:
+            with self.stats.phase("hash"):
+                file_hash = await hashing.hash_bytes_async(content)
+            with self.stats.phase("decode"):
+                text, encoding = text_codec.decode(content)
+            text_codec.remember(file_hash, text)
+            if encoding != text_codec.UTF8:
+                self.stats.count(f"files_encoding_{encoding}")
+            file_info.update(hash=file_hash, content=content, text=text, encoding=encoding, skip_reason=None)
+        return file_info
+
+    async def check_file(self, file_path, db_manager, snapshot=None):
+        """파일 변경을 비동기적으로 확인하고 변경사항 데이터와 diff를 반환합니다.
 
-    async def check_file(self, file_path, db_manager):
-        """파일 변경을 비동기적으로 확인하고 변경사항 데이터와 diff를 반환합니다."""
+        snapshot(get_directory_snapshot 결과)이 주어지면 새 파일이나 해시가 같은 파일은 DB를 조회하지 않습니다.
+        """
         if not self._should_process_file(file_path):
             return None
+        return await self._check_filtered_file(file_path, db_manager, snapshot)
 
-        print(f"\nChecking file: {file_path}")
+    async def _check_filtered_file(self, file_path, db_manager, snapshot=None, rename_detector=None):
+        """ignore/확장자 필터를 이미 통과한 파일을 확인합니다. (스캔 walker가 걸러낸 경로용)
+
+        rename_detector가 주어지면 이동된 파일일 수 있는 새 경로는 diff를 만들지 않고
+        file_info["rename_candidate"]를 표시해 반환합니다. (스캔이 끝날 때 RenameDetector가 처리)
+        """
+        verbose(f"\nChecking file: {file_path}")
         file_info = await self.get_file_info(file_path)
         if file_info:
+            if file_info["skip_reason"]:
+                # 걸러진 파일은 DB 조회나 diff 없이 이유만 기록
+                return file_path, file_info, None
+
             # 기존 파일 정보 가져오기
-            existing_info = await db_manager.get_file_info(file_path)
-            if existing_info:
-                old_content = existing_info["content"]
-                diff = self._generate_diff(old_content, file_info["content"])
+            if snapshot is None:
+                existing_info = await db_manager.get_file_info(file_path)
+                stored_hash = existing_info["hash"] if existing_info else None
             else:
-                # 새로운 파일의 경우 전체 내용을 diff로 간주
-                diff = self._generate_initial_diff(file_info["content"])
+                existing_info = None
+                stored_hash = snapshot[file_path]["hash"] if file_path in snapshot else None
+
+            if stored_hash and await self._matches_stored_hash(stored_hash, file_info):
+                # 내용이 같으면 diff 없이 stat(과 필요하면 해시 알고리즘)만 갱신되도록 반환
+                return file_path, file_info, None
+            if stored_hash and existing_info is None:
+                existing_info = await db_manager.get_file_info(file_path)
+            if not stored_hash and rename_detector and rename_detector.is_candidate(file_path, file_info):
+                file_info["rename_candidate"] = True
+                return file_path, file_info, None
+
+            with self.stats.phase("diff"):
+                if existing_info and not file_filter.is_skipped_hash(existing_info["hash"]):
+                    diff, file_info["reverse_delta"], file_info["hunks"] = self._generate_diff_and_delta(
+                        existing_info["content"],
+                        file_info["content"],
+                        file_path,
+                        existing_info["full_content"],
+                        file_info["text"],
+                    )
+                    file_info["noise_kind"] = hunk_classifier.noise_kind([hunk[6] for hunk in file_info["hunks"]])
+                    self.stats.count("files_changed")
+                    if file_info["noise_kind"]:
+                        self.stats.count("files_formatting_only")
+                else:
+                    diff = self._new_file_diff(file_info)
 
             return file_path, file_info, diff
         else:
             return None
 
-    async def _calculate_file_hash(self, file_path):
-        """파일의 SHA-256 해시를 계산합니다."""
-        hasher = hashlib.sha256()
-        try:
-            async with aiofiles.open(file_path, "rb") as f:
-                while True:
-                    chunk = await f.read(4096)
-                    if not chunk:
-                        break
-                    hasher.update(chunk)
-            return hasher.hexdigest()
-        except Exception as e:
-            print(f"Error calculating hash for {file_path}: {e}")
-            return ""
+    @staticmethod
+    async def _matches_stored_hash(stored_hash, file_info):
+        """저장된 해시와 현재 내용이 같은지 확인합니다.
+
+        저장된 해시가 다른 알고리즘(HASH_ALGORITHM 변경 전)으로 계산됐다면 그 알고리즘으로 다시 계산해 비교하고,
+        내용이 같으면 file_info["rehashed_from"]에 이전 해시를 남겨 writer가 해시만 새 알고리즘으로 바꾸게 합니다.
+        """
+        if stored_hash == file_info["hash"]:
+            return True
+        stored_algorithm = hashing.algorithm_of(stored_hash)
+        if file_filter.is_skipped_hash(stored_hash) or stored_algorithm == hashing.algorithm_of(file_info["hash"]):
+            return False
+        if await hashing.hash_bytes_async(file_info["content"], stored_algorithm) != stored_hash:
+            return False
+        file_info["rehashed_from"] = stored_hash
+        return True
 
-    def _generate_initial_diff(self, new_content):
-        """새로운 파일의 전체 내용에 대한 diff를 생성합니다."""
+    def _generate_initial_diff(self, new_text):
+        """새로운 파일의 전체 내용(디코딩된 텍스트)에 대한 diff를 생성합니다."""
         try:
-            new_text = new_content.decode("utf-8", errors="ignore")
             diff_text = f"+{new_text}"  # 새로운 내용 전체를 추가된 것으로 표시
             return diff_text.encode("utf-8")
         except Exception as e:
             print(f"Error generating initial diff: {e}")
             return None
 
+    def _new_file_diff(self, file_info):
+        """새로운 파일(또는 이전에 걸러졌던 파일)은 전체 내용을 하나의 hunk로 보고 diff를 만듭니다."""
+        file_info["hunks"] = [hunks.whole_file_hunk(0, len(file_info["content"].splitlines()))]
+        self.stats.count("files_new")
+        return self._generate_initial_diff(file_info["text"])
+
     def _generate_diff(self, old_content, new_content):
         """old_content와 new_content 간의 실제 변경사항에 대한 diff만 생성합니다."""
-        try:
-            old_text = old_content.decode("utf-8", errors="ignore")
-            new_text = new_content.decode("utf-8", errors="ignore")
+        return self._generate_diff_and_delta(old_content, new_content)[0]
 
+    def _generate_diff_and_delta(self, old_content, new_content, file_path=None, old_text=None, new_text=None):
+        """diff와 함께, 새 내용에서 이전 내용을 복원하는 역방향 delta를 같은 opcode로 만듭니다.
+
+        diff는 DIFF_ENGINE으로 계산하며, DIFF_MAX_BYTES나 DIFF_TIMEOUT_SECONDS를 넘으면 '파일 교체' 요약으로 대신합니다.
+        이 경우 delta는 None이며, 이전 버전은 전체 내용(snapshot)으로 남습니다.
+        hunk마다 공백/주석/순서만 바뀐 변경인지 분류해 머리말에 표시하고(file_watcher/hunk_classifier.py 참고),
+        (diff, delta, hunks)를 반환합니다. hunks는 diff_hunks 테이블에 저장할 hunk별 메타데이터입니다. (file_watcher/hunks.py 참고)
+        old_text/new_text로 이미 디코딩된 텍스트를 넘기면 다시 디코딩하지 않습니다.
+        """
+        try:
             # 실제 변경사항이 있는지 확인
-            if old_text == new_text:
-                return None
+            if old_content == new_content:
+                return None, None, []
 
-            old_lines = old_text.splitlines()
-            new_lines = new_text.splitlines()
+            old_lines = old_content.splitlines(keepends=True)
+            new_lines = new_content.splitlines(keepends=True)
+            old_text_lines = text_codec.split_lines(old_text if old_text is not None else text_codec.decode(old_content)[0])
+            new_text_lines = text_codec.split_lines(new_text if new_text is not None else text_codec.decode(new_content)[0])
 
-            diff_generator = difflib.unified_diff(old_lines, new_lines, fromfile="before", tofile="after", lineterm="")
+            try:
+                opcodes = compute_opcodes(old_lines, new_lines, old_size=len(old_content), new_size=len(new_content))
+            except DiffTooExpensive as e:
+                self.stats.count("diff_fallbacks")
+                diff_lines = replaced_summary(old_text_lines, new_text_lines, str(e))
+                return "\n".join(diff_lines).encode("utf-8"), None, [hunks.whole_file_hunk(len(old_lines), len(new_lines))]
 
-            diff_lines = list(diff_generator)
+            groups = list(group_opcodes(opcodes))
+            hunk_labels = hunk_classifier.classify_groups(
+                old_text_lines,
+                new_text_lines,
+                groups,
+                hunk_classifier.comment_prefixes_for(file_path),
+                hunk_classifier.indent_sensitive_for(file_path),
+                hunk_classifier.regex_literals_for(file_path),
+                hunk_classifier.declaration_prefixes_for(file_path),
+            )
+            diff_lines = format_unified(old_text_lines, new_text_lines, opcodes, hunk_labels=hunk_labels)
+            reverse_delta = build_reverse_delta(old_lines, opcodes)
             if not diff_lines:  # 실제 변경사항이 없는 경우
-                return None
+                return None, reverse_delta, []
 
             diff_text = "\n".join(diff_lines)
-            return diff_text.encode("utf-8")
+            file_hunks = hunks.build_hunks(
+                old_text_lines, new_text_lines, groups, hunk_labels, hunks.language_for(file_path)
+            )
+            return diff_text.encode("utf-8"), reverse_delta, file_hunks
         except Exception as e:
             print(f"Error generating diff: {e}")
-            return None
+            return None, None, []
+
+    def get_ignore_matcher(self, directory):
+        """감시 루트의 ignore 규칙(IGNORE_PATTERNS + .gitignore/.codecastignore)을 컴파일해 캐시합니다."""
+        root = os.path.abspath(directory)
+        matcher = self._ignore_matchers.get(root)
+        if matcher is None:
+            matcher = self._ignore_matchers[root] = IgnoreMatcher(root)
+        return matcher
+
+    def _ignore_matcher_for(self, abs_path):
+        """경로가 속한 감시 루트의 matcher를 찾습니다. 등록된 루트가 없으면 파일시스템 루트 기준으로 만듭니다."""
+        best_root = None
+        for root in self._ignore_matchers:
+            if abs_path.startswith(root + os.sep) and (best_root is None or len(root) > len(best_root)):
+                best_root = root
+        return self.get_ignore_matcher(best_root or os.path.abspath(os.sep))
+
+    @staticmethod
+    def _has_supported_extension(file_name):
+        """파일 확장자 확인 (집합 조회 한 번)"""
+        return os.path.splitext(file_name)[1].lower() in Config.SUPPORTED_EXTENSIONS
 
     def _should_process_file(self, file_path):
-        """파일을 처리해야 하는지 확인"""
-        # 절대 경로로 변환
+        """파일을 처리해야 하는지 확인 (감시 모드 등 walker를 거치지 않은 단일 경로용)"""
+        if not self._has_supported_extension(file_path):
+            return False
         abs_path = os.path.abspath(file_path)
+        return not self._ignore_matcher_for(abs_path).is_path_ignored(abs_path)
 
-        # 무시할 디렉토리 패턴 확인
-        path_parts = abs_path.split(os.sep)
-        for ignore_pattern in Config.IGNORE_PATTERNS:
-            if ignore_pattern in path_parts:
-                print(f"Ignoring file in {ignore_pattern}: {abs_path}")
-                return False
+    @staticmethod
+    def _stat_key(file_stat):
+        """증분 스캔에서 변경 여부를 판단하는 stat 튜플 (size, mtime_ns, inode)을 반환합니다."""
+        return file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino
 
-        # 파일 확장자 확인
-        ext = os.path.splitext(file_path)[1].lower()
-        if ext not in Config.SUPPORTED_EXTENSIONS:
-            return False
+    async def scan_directory(self, directory, db_manager, incremental=None):
+        """디렉토리 내 모든 파일을 비동기적으로 스캔합니다.
 
-        return True
+        walker -> reader 워커 N개 -> writer 1개로 이어지는 파이프라인으로 동작하며,
+        단계 사이 큐의 크기를 SCAN_QUEUE_SIZE로 제한해 트리 크기와 관계없이 메모리 사용량을 일정하게 유지합니다.
+        incremental 모드에서는 DB에 기록된 stat 튜플과 현재 stat이 같은 파일은 열지 않고 건너뜁니다.
+        SCAN_PROCESSES가 2 이상이면 reader 대신 경로를 샤드로 묶어 프로세스 풀에서 처리하며, writer는 그대로 하나입니다.
+
+        파일이 모두 저장된 디렉토리는 scan_checkpoints에 기록되므로, 중단된 스캔은 다음 실행에서 남은 디렉토리부터 이어집니다.
+        (체크포인트된 디렉토리도 stat은 비교해, 중단된 뒤에 바뀌거나 생긴 파일은 다시 처리)
+        파일 하나의 오류는 scan_errors에 남기고 건너뛰며, 스캔 전체가 실패해도 프로세스를 종료하지 않습니다.
+        반환값은 단계별 소요 시간과 카운터를 담은 ScanStats이며, 실행 상태("completed" 또는 "failed")는 stats.status입니다.
+        """
+        if incremental is None:
+            incremental = Config.INCREMENTAL_SCAN
 
-    def _should_ignore_directory(self, dir_path):
-        """디렉토리를 무시해야 하는지 확인"""
-        path_parts = dir_path.split(os.sep)
-        return any(pattern in path_parts for pattern in Config.IGNORE_PATTERNS)
+        print(f"Starting scan of directory: {directory}")
+        stats = self.stats = ScanStats(os.path.abspath(directory))
+        run_id, completed_dirs = await db_manager.start_scan_run(directory)
+        status = "failed"
+        try:
+            with stats.phase("db_snapshot"):
+                snapshot = await db_manager.get_directory_snapshot(directory, include_content=False)
+            async with db_manager.batch_writer(run_id=run_id, stats=stats) as writer:
+                await self._run_pipeline(directory, writer, snapshot, incremental, completed_dirs)
+            status = "failed" if writer.failed else "completed"
+        except Exception as e:
+            # 체크포인트까지 저장된 디렉토리는 다음 스캔에서 건너뜀
+            print(f"Error during directory scan (will resume on next run): {e}")
+        finally:
+            stats.finish(status)
+            print(stats.summary())
+            await asyncio.shield(
+                db_manager.finish_scan_run(
+                    run_id,
+                    status,
+                    stats.counters.get("files_queued", 0),
+                    stats.counters.get("files_unchanged", 0) + stats.counters.get("files_checkpointed", 0),
+                )
+            )
+        return stats
+
+    async def _run_pipeline(self, directory, writer, snapshot, incremental, completed_dirs=frozenset()):
+        """walker, reader 워커, writer 워커를 띄우고 모두 끝날 때까지 기다립니다."""
+        path_queue = asyncio.Queue(maxsize=Config.SCAN_QUEUE_SIZE)
+        result_queue = asyncio.Queue(maxsize=Config.SCAN_QUEUE_SIZE)
+        progress = _DirectoryProgress()
+        # 이전 스캔 기록이 있을 때만 사라진 경로와 새 경로를 짝지어 이동/이름 변경을 찾음
+        rename_detector = RenameDetector(snapshot) if Config.RENAME_DETECTION and snapshot else None
+        pool = None
+        if Config.SCAN_PROCESSES > 1:
+            # 읽기/해시/diff를 프로세스로 나누고, 프로세스마다 샤드 하나가 대기하도록 디스패처를 두 배로 띄움
+            pool = ProcessPoolExecutor(
+                max_workers=Config.SCAN_PROCESSES, mp_context=multiprocessing.get_context("spawn")
+            )
+            readers = [
+                asyncio.create_task(self._shard_worker(pool, path_queue, result_queue, writer, snapshot, rename_detector))
+                for _ in range(Config.SCAN_PROCESSES * 2)
+            ]
+        else:
+            readers = [
+                asyncio.create_task(self._read_worker(path_queue, result_queue, writer, snapshot, rename_detector))
+                for _ in range(Config.SCAN_WORKERS)
+            ]
+        write_task = asyncio.create_task(self._write_worker(result_queue, writer, progress, rename_detector))
 
-    async def scan_directory(self, directory, db_manager):
-        """디렉토리 내 모든 파일을 비동기적으로 스캔합니다."""
         try:
-            print(f"Starting scan of directory: {directory}")
-            scan_tasks = []
+            known_stats = {path: entry["stat"] for path, entry in snapshot.items()}
+            deleted_paths = await self._walk_directory(
+                directory, path_queue, known_stats, incremental, writer, progress, completed_dirs, rename_detector
+            )
+
+            for _ in readers:
+                await path_queue.put(None)
+            await asyncio.gather(*readers)
+            await result_queue.put(None)
+            await write_task
+            # 이동으로 판정된 경로는 writer가 이미 새 경로로 바꿨으므로 남은 기록만 삭제로 기록됨
+            writer.add_deletions(deleted_paths)
+        except BaseException:
+            for task in readers + [write_task]:
+                task.cancel()
+            raise
+        finally:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    async def _walk_directory(
+        self, directory, path_queue, known_stats, incremental, writer, progress, completed_dirs, rename_detector=None
+    ):
+        """처리할 파일 경로를 path_queue에 넣습니다. 큐가 가득 차면 reader가 따라올 때까지 기다립니다.
+
+        후보는 디렉토리 단위로 묶여 나오며, 한 디렉토리의 후보를 모두 넣으면 progress에 알려 체크포인트 시점을 정합니다.
+        후보 탐색과 stat은 walk 단계로, reader가 밀려 큐가 가득 찬 동안 기다린 시간은 queue_wait 단계로 잽니다.
+        git 저장소인 루트는 DB의 stat과 다른 파일만 넣습니다.
+        작업 트리에서 지워진 기록된 파일의 경로 목록을 반환합니다. (git 저장소가 아닌 루트는 탐색한 경로와 기록된 경로를 비교)
+        """
+        stats = self.stats
+
+        # git 저장소인 루트는 index로 바뀐 파일과 지워진 파일을 찾고, 그 밖의 루트는 디렉토리 탐색으로 후보를 얻습니다.
+        with stats.phase("walk"):
+            source = git_source.GitChangeSource.open(directory) if Config.GIT_CHANGE_SOURCE else None
+            git_changes = None
+            if source:
+                matcher = self.get_ignore_matcher(directory)
+                git_changes = await source.list_changes(
+                    known_stats if incremental else dict.fromkeys(known_stats),
+                    lambda rel_path: self._has_supported_extension(rel_path)
+                    and not matcher.is_rel_path_ignored(rel_path),
+                )
+        if git_changes is None:
+            candidate_groups = self._walk_candidates(directory)
+        else:
+            stats.count("git_index_roots")
+            candidate_groups = self._git_candidates(source.root, git_changes["changed"])
+            stats.count("files_seen", len(git_changes["unchanged"]))
+            stats.count("files_unchanged", len(git_changes["unchanged"]))
+            if rename_detector:
+                for file_path in git_changes["unchanged"]:
+                    rename_detector.mark_seen(file_path)
 
-            for root, dirs, files in os.walk(directory, topdown=True):
-                # 무시할 디렉토리 필터링 (dirs를 직접 수정)
-                dirs[:] = [d for d in dirs if not self._should_ignore_directory(os.path.join(root, d))]
+        missing_count = 0
+        # git index를 쓰지 않는 루트에서 지워진 파일을 찾기 위해 탐색한 경로를 모음
+        walked_paths = set() if git_changes is None and known_stats else None
+        while True:
+            walk_started = time.perf_counter()
+            group = next(candidate_groups, None)
+            if group is None:
+                stats.add_time("walk", time.perf_counter() - walk_started)
+                break
+            rel_dir, candidates = group
+            stats.count("files_seen", len(candidates))
+            if walked_paths is not None:
+                walked_paths.update(file_path for file_path, _ in candidates)
+            if rename_detector:
+                for file_path, _ in candidates:
+                    rename_detector.mark_seen(file_path)
+            # 중단된 이전 실행에서 이미 저장까지 끝난 디렉토리도 그 뒤에 바뀐 파일이 있을 수 있으므로,
+            # 증분 모드가 아니어도 저장된 stat과 비교해 그대로인 파일만 건너뜀
+            checkpointed = rel_dir in completed_dirs
 
-                for filename in files:
-                    file_path = os.path.join(root, filename)
-                    if self._should_process_file(file_path):
-                        scan_tasks.append(self.check_file(file_path, db_manager))
+            to_queue = []
+            for file_path, get_stat in candidates:
+                # get_stat이 None이면 git index 비교에서 이미 바뀐 파일로 판정됨
+                if checkpointed or (incremental and get_stat is not None):
+                    try:
+                        stat_key = self._stat_key(get_stat() if get_stat else os.stat(file_path))
+                    except OSError:
+                        # 탐색한 뒤 지워진 파일
+                        missing_count += 1
+                        if walked_paths is not None:
+                            walked_paths.discard(file_path)
+                        continue
+                    if known_stats.get(file_path) == stat_key:
+                        stats.count("files_checkpointed" if checkpointed else "files_unchanged")
+                        continue
+                to_queue.append(file_path)
+            stats.add_time("walk", time.perf_counter() - walk_started)
 
-            results = await asyncio.gather(*scan_tasks)
-            for result in results:
+            with stats.phase("queue_wait"):
+                for file_path in to_queue:
+                    progress.add_file(rel_dir)
+                    await path_queue.put((file_path, rel_dir))
+            stats.count("files_queued", len(to_queue))
+            if progress.finish_listing(rel_dir):
+                writer.add_checkpoint(rel_dir)
+
+        stats.count("files_missing", missing_count)
+        # 지워진 파일은 이동 판정이 끝난 뒤 writer가 기록하도록 호출하는 쪽에 돌려줌
+        if git_changes:
+            return git_changes["deleted"]
+        if walked_paths is None:
+            return []
+        # 탐색에 나오지 않은 경로 중 ignore 규칙 등으로 빠졌을 뿐 남아 있는 파일은 지워진 것이 아님
+        return [
+            file_path
+            for file_path in known_stats
+            if file_path not in walked_paths and not os.path.lexists(file_path)
+        ]
+
+    def _walk_candidates(self, directory):
+        """무시 대상 디렉토리는 하위 트리 전체를 건너뛰고, 파일은 확장자 -> ignore 규칙 순으로 거릅니다.
+
+        (상대 디렉토리, [(파일 경로, stat 함수), ...])를 디렉토리마다 하나씩 돌려줍니다.
+        """
+        matcher = self.get_ignore_matcher(directory)
+        current_dir, candidates = None, []
+        for entry, rel_path, dir_matcher in matcher.walk_files():
+            rel_dir = rel_path.rpartition("/")[0]
+            if rel_dir != current_dir:
+                if candidates:
+                    yield current_dir, candidates
+                current_dir, candidates = rel_dir, []
+            if self._has_supported_extension(entry.name) and not dir_matcher.is_ignored(rel_path, False):
+                candidates.append((entry.path, entry.stat))
+        if candidates:
+            yield current_dir, candidates
+
+    @staticmethod
+    def _git_candidates(root, changed):
+        """git index 비교에서 바뀐 파일(추가/수정)을 디렉토리별로 묶습니다. stat은 이미 비교했으므로 stat 함수는 None입니다."""
+        groups = {}
+        for file_path, _ in changed:
+            rel_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+            groups.setdefault(rel_path.rpartition("/")[0], []).append((file_path, None))
+        yield from groups.items()
+
+    async def _read_worker(self, path_queue, result_queue, writer, snapshot, rename_detector=None):
+        """경로를 하나씩 꺼내 파일을 읽고 diff를 만든 뒤 writer에게 넘깁니다.
+
+        오류가 난 파일은 writer에 기록만 하고 건너뜁니다. 저장할 내용이 없어도 writer에 알려 디렉토리 진행 상황을 맞춥니다.
+        """
+        while True:
+            item = await path_queue.get()
+            if item is None:
+                break
+            file_path, rel_dir = item
+            try:
+                result = await self._check_filtered_file(file_path, writer, snapshot, rename_detector)
+            except Exception as e:
+                writer.add_error(file_path, "check", e)
+                result = None
+            await result_queue.put((rel_dir, result))
+
+    async def _shard_worker(self, pool, path_queue, result_queue, writer, snapshot, rename_detector=None):
+        """경로를 SCAN_SHARD_SIZE개까지 묶어 프로세스 풀에서 확인하고, 결과를 writer에게 넘깁니다.
+
+        샤드는 walker가 넣은 순서대로 묶이므로 대부분 같은 디렉토리(하위 트리)의 파일입니다.
+        이동 후보 판정은 스냅샷 전체가 필요하므로 새 경로의 결과를 받은 뒤 메인 프로세스에서 합니다.
+        """
+        loop = asyncio.get_running_loop()
+        finished = False
+        while not finished:
+            item = await path_queue.get()
+            if item is None:
+                break
+            shard = [item]
+            while len(shard) < Config.SCAN_SHARD_SIZE and not path_queue.empty():
+                item = path_queue.get_nowait()
+                if item is None:
+                    finished = True
+                    break
+                shard.append(item)
+
+            rel_dirs = {}
+            items = []
+            for file_path, rel_dir in shard:
+                rel_dirs[file_path] = rel_dir
+                entry = snapshot.get(file_path) if snapshot is not None else None
+                items.append((file_path, entry["hash"] if entry else None))
+            try:
+                results, errors, counters, phase_seconds = await loop.run_in_executor(
+                    pool, _check_shard_in_process, str(writer.db_manager.db_path), items, rename_detector is not None
+                )
+            except Exception as e:
+                # 프로세스가 죽는 등 샤드 전체가 실패한 경우
+                results, counters, phase_seconds = [], {}, {}
+                errors = [(file_path, str(e)) for file_path, _ in items]
+            self.stats.merge(counters, phase_seconds)
+
+            for file_path, message in errors:
+                writer.add_error(file_path, "check", message)
+                await result_queue.put((rel_dirs[file_path], None))
+            for file_path, result in results:
+                if result and result[1].get("rename_candidate") and not rename_detector.is_candidate(*result[:2]):
+                    # 워커는 새 경로를 모두 보류해 오므로, 이동 후보가 아니면 여기서 새 파일로 처리
+                    del result[1]["rename_candidate"]
+                    with self.stats.phase("diff"):
+                        result = (file_path, result[1], self._new_file_diff(result[1]))
+                await result_queue.put((rel_dirs[file_path], result))
+
+    async def _write_worker(self, result_queue, writer, progress, rename_detector=None):
+        """결과를 받는 즉시 배치 writer에 넘깁니다. DB 쓰기는 이 워커 하나에서만 일어납니다.
+
+        이동 후보로 보류된 파일은 탐색이 모두 끝난 뒤(사라진 경로를 알 수 있을 때) 한꺼번에 처리하며,
+        그 전까지 해당 디렉토리는 체크포인트하지 않습니다.
+        """
+        while True:
+            item = await result_queue.get()
+            if item is None:
+                break
+            rel_dir, result = item
+            if result and result[1].get("rename_candidate"):
+                rename_detector.defer(rel_dir, result)
+                continue
+            if result:
+                file_path, file_info, diff = result
+                await writer.add(file_path, file_info, diff)
+            if progress.file_done(rel_dir):
+                writer.add_checkpoint(rel_dir)
+
+        if rename_detector:
+            async for rel_dir, result in rename_detector.resolve(self, writer):
                 if result:
                     file_path, file_info, diff = result
-                    await db_manager.save_file_change(file_path, file_info, diff)
+                    await writer.add(file_path, file_info, diff)
+                if progress.file_done(rel_dir):
+                    writer.add_checkpoint(rel_dir)
 
-            print("Scan completed successfully")
-        except Exception as e:
-            print(f"Error during directory scan: {e}")
-            sys.exit(1)
+
+class _DeferNewPaths:
+    """샤드 워커 프로세스용 이동 후보 판정: 스냅샷이 없으므로 새 경로는 모두 보류해 메인 프로세스가 판정하게 합니다."""
+
+    @staticmethod
+    def is_candidate(file_path, file_info):
+        return True
+
+
+class _ShardReader:
+    """샤드 워커 프로세스에서 기존 파일 내용을 읽는 읽기 전용 커넥션 (DB 쓰기는 메인 프로세스의 writer만 함)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await db_connection.connect_async(self.db_path, readonly=True)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.conn.close()
+
+    async def get_file_info(self, file_path):
+        return await DatabaseManager._fetch_file_info(self.conn, file_path)
+
+
+def _check_shard_in_process(db_path, items, defer_new_paths):
+    """프로세스 풀에서 실행됩니다. items의 (파일 경로, 저장된 해시)마다 _check_filtered_file을 실행합니다.
+
+    ([(파일 경로, 결과)], [(파일 경로, 오류 메시지)], 카운터, 단계 시간)을 반환합니다.
+    """
+    handler = FileChangeHandler()
+    snapshot = {file_path: {"hash": stored_hash} for file_path, stored_hash in items if stored_hash}
+    rename_detector = _DeferNewPaths() if defer_new_paths else None
+
+    async def check_all():
+        results, errors = [], []
+        async with _ShardReader(db_path) as reader:
+            for file_path, _ in items:
+                try:
+                    results.append(
+                        (file_path, await handler._check_filtered_file(file_path, reader, snapshot, rename_detector))
+                    )
+                except Exception as e:
+                    errors.append((file_path, str(e)))
+        return results, errors
+
+    results, errors = asyncio.run(check_all())
+    return results, errors, handler.stats.counters, handler.stats.phase_seconds
+
+
+class _DirectoryProgress:
+    """디렉토리별로 아직 writer에 도달하지 않은 파일 수를 세어, 모든 파일이 add된 시점을 알려줍니다."""
+
+    def __init__(self):
+        self._remaining = {}
+        self._listing = set()
+
+    def add_file(self, rel_dir):
+        self._remaining[rel_dir] = self._remaining.get(rel_dir, 0) + 1
+        self._listing.add(rel_dir)
+
+    def finish_listing(self, rel_dir):
+        """walker가 rel_dir의 후보를 모두 넣었습니다. 이미 모든 파일이 처리됐다면 True를 반환합니다."""
+        self._listing.discard(rel_dir)
+        if self._remaining.get(rel_dir, 0) == 0:
+            self._remaining.pop(rel_dir, None)
+            return True
+        return False
+
+    def file_done(self, rel_dir):
+        """rel_dir의 파일 하나가 writer에 도달했습니다. 디렉토리가 끝났다면 True를 반환합니다."""
+        self._remaining[rel_dir] -= 1
+        if self._remaining[rel_dir] == 0 and rel_dir not in self._listing:
+            del self._remaining[rel_dir]
+            return True
+        return False
@@ -0,0 +1,52 @@
+# file_watcher/file_filter.py
+
+import os
+
+from config.settings import Config
+
+# 걸러진 파일은 내용 대신 이 접두사가 붙은 표식을 files.file_hash에 기록합니다. (blobs에는 아무것도 저장하지 않음)
+SKIPPED_HASH_PREFIX = "skipped:"
+
+# 걸러낸 이유 (files.skip_reason에 기록)
+TOO_LARGE = "too_large"
+BINARY = "binary"
+MINIFIED = "minified"
+GENERATED = "generated"
+
+# 자동 생성 표식은 보통 파일 머리말에 있으므로 앞부분만 확인
+_MARKER_SCAN_BYTES = 1024
+
+
+def skipped_hash(reason):
+    return f"{SKIPPED_HASH_PREFIX}{reason}"
+
+
+def is_skipped_hash(file_hash):
+    return bool(file_hash) and file_hash.startswith(SKIPPED_HASH_PREFIX)
+
+
+def reject_by_stat(file_path, size):
+    """파일을 열지 않고 이름과 stat 크기만으로 걸러낼 수 있으면 이유를 반환합니다."""
+    if size > Config.MAX_FILE_BYTES:
+        return TOO_LARGE
+    file_name = os.path.basename(file_path)
+    if file_name in Config.GENERATED_FILE_NAMES:
+        return GENERATED
+    if ".min." in file_name:
+        return MINIFIED
+    return None
+
+
+def reject_by_head(head):
+    """파일 앞부분(SNIFF_BYTES)만 보고 diff할 가치가 없는 파일이면 이유를 반환합니다."""
+    if b"\x00" in head:
+        return BINARY
+
+    line_count = head.count(b"\n") + 1
+    if len(head) / line_count > Config.MAX_AVG_LINE_LENGTH:
+        return MINIFIED
+
+    header = head[:_MARKER_SCAN_BYTES].decode("utf-8", errors="ignore")
+    if any(marker in header for marker in Config.GENERATED_MARKERS):
+        return GENERATED
+    return None
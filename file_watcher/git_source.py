@@ -0,0 +1,229 @@
+# file_watcher/git_source.py
+
+import asyncio
+import os
+import stat
+import struct
+
+from config.settings import Config
+
+# git index 형식: https://git-scm.com/docs/index-format (버전 2, 3, 4 지원)
+_INDEX_SIGNATURE = b"DIRC"
+_ENTRY_STAT_FORMAT = ">10L"  # ctime(s, ns), mtime(s, ns), dev, ino, mode, uid, gid, size
+_ENTRY_STAT_SIZE = struct.calcsize(_ENTRY_STAT_FORMAT)
+_FLAG_EXTENDED = 0x4000
+_EXTENDED_FLAG_SKIP_WORKTREE = 0x4000
+_MODE_GITLINK = 0o160000  # 서브모듈
+
+# list_changes의 바뀐 파일 종류
+ADDED = "added"
+MODIFIED = "modified"
+
+
+class GitIndexError(Exception):
+    """git index를 읽을 수 없거나 지원하지 않는 형식일 때 발생합니다. (이 경우 디렉토리 탐색으로 대체)"""
+
+
+def find_git_dir(root):
+    """root가 git 작업 트리의 최상위라면 .git 디렉토리 경로를 반환합니다. (worktree의 `.git` 파일도 지원)"""
+    dot_git = os.path.join(root, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    if os.path.isfile(dot_git):
+        try:
+            with open(dot_git, encoding="utf-8") as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            git_dir = line[len("gitdir:") :].strip()
+            return os.path.normpath(os.path.join(root, git_dir))
+    return None
+
+
+def _object_hash_size(git_dir):
+    """저장소의 object 해시 길이(바이트)를 반환합니다. sha256 저장소면 32, 그 외에는 20입니다."""
+    try:
+        with open(os.path.join(git_dir, "config"), encoding="utf-8", errors="ignore") as f:
+            config_text = f.read().replace(" ", "").lower()
+    except OSError:
+        return 20
+    return 32 if "objectformat=sha256" in config_text else 20
+
+
+def _read_varint(data, offset):
+    """index v4의 경로 압축에 쓰이는 가변 길이 정수를 읽습니다."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def read_index(git_dir):
+    """.git/index를 읽어 {상대 경로: (size, mtime_ns, inode)}를 반환합니다.
+
+    서브모듈과 sparse checkout으로 작업 트리에 없는(skip-worktree) 항목은 제외합니다.
+    split index처럼 항목이 다른 파일에 나뉘어 있는 경우는 GitIndexError를 발생시킵니다.
+    """
+    try:
+        with open(os.path.join(git_dir, "index"), "rb") as f:
+            data = f.read()
+    except OSError as e:
+        raise GitIndexError(f"cannot read git index: {e}") from e
+
+    if len(data) < 12:
+        raise GitIndexError("git index is truncated")
+    signature, version, entry_count = struct.unpack_from(">4sLL", data, 0)
+    if signature != _INDEX_SIGNATURE or version not in (2, 3, 4):
+        raise GitIndexError(f"unsupported git index (signature={signature!r}, version={version})")
+
+    hash_size = _object_hash_size(git_dir)
+    entries = {}
+    offset = 12
+    previous_name = b""
+    try:
+        for _ in range(entry_count):
+            entry_start = offset
+            (_, _, mtime_s, mtime_ns, _, inode, mode, _, _, size) = struct.unpack_from(
+                _ENTRY_STAT_FORMAT, data, offset
+            )
+            offset += _ENTRY_STAT_SIZE + hash_size
+            (flags,) = struct.unpack_from(">H", data, offset)
+            offset += 2
+            extended_flags = 0
+            if flags & _FLAG_EXTENDED and version >= 3:
+                (extended_flags,) = struct.unpack_from(">H", data, offset)
+                offset += 2
+
+            if version == 4:
+                strip_length, offset = _read_varint(data, offset)
+                name_end = data.index(b"\0", offset)
+                name = previous_name[: len(previous_name) - strip_length] + data[offset:name_end]
+                offset = name_end + 1
+            else:
+                name_end = data.index(b"\0", offset)
+                name = data[offset:name_end]
+                # 항목은 1~8개의 NUL로 8바이트 단위에 맞춰 채워짐
+                offset = entry_start + (name_end - entry_start + 8) // 8 * 8
+            previous_name = name
+
+            if mode == _MODE_GITLINK or extended_flags & _EXTENDED_FLAG_SKIP_WORKTREE:
+                continue
+            entries[name.decode("utf-8", errors="surrogateescape")] = (
+                size,
+                mtime_s * 1_000_000_000 + mtime_ns,
+                inode,
+            )
+    except (struct.error, ValueError, IndexError) as e:
+        raise GitIndexError(f"corrupt git index entry: {e}") from e
+
+    # 확장 영역 중 split index(link)는 항목이 shared index 파일에 있으므로 지원하지 않음
+    while offset + 8 <= len(data) - hash_size:
+        extension, extension_size = struct.unpack_from(">4sL", data, offset)
+        if extension == b"link":
+            raise GitIndexError("split index is not supported")
+        offset += 8 + extension_size
+
+    return entries
+
+
+async def list_untracked(root):
+    """`git ls-files -o --exclude-standard`로 .gitignore에 걸리지 않는 추적되지 않은 파일 목록을 가져옵니다.
+
+    git 실행 파일이 없거나 명령이 실패하면 None을 반환합니다. (네트워크는 사용하지 않음)
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git",
+            "-C",
+            root,
+            "ls-files",
+            "--others",
+            "--exclude-standard",
+            "-z",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+    except OSError:
+        return None
+    if process.returncode != 0:
+        return None
+    return [path.decode("utf-8", errors="surrogateescape") for path in stdout.split(b"\0") if path]
+
+
+class GitChangeSource:
+    """git 작업 트리인 감시 루트에서 디렉토리를 탐색하는 대신 index에 기록된 경로로 바뀐 파일과 지워진 파일을 찾습니다."""
+
+    def __init__(self, root, git_dir):
+        self.root = os.path.abspath(root)
+        self.git_dir = git_dir
+
+    @classmethod
+    def open(cls, root):
+        """root가 git 저장소의 최상위면 GitChangeSource를, 아니면 None을 반환합니다."""
+        git_dir = find_git_dir(root)
+        return cls(root, git_dir) if git_dir else None
+
+    async def list_changes(self, known_stats, is_candidate, include_untracked=None):
+        """index의 추적 파일(과 include_untracked면 추적되지 않은 파일)을 DB에 기록된 stat과 비교합니다.
+
+        known_stats는 {파일 경로: (size, mtime_ns, inode) 또는 None}, is_candidate(상대 경로)는 확장자/ignore 필터입니다.
+        디렉토리를 읽지 않고 경로마다 lstat만 하며, 결과는 {"changed": [(파일 경로, ADDED 또는 MODIFIED)],
+        "unchanged": [파일 경로], "deleted": [파일 경로]}입니다. (deleted는 기록은 있지만 작업 트리에서 사라진 파일)
+        index를 읽을 수 없거나 git을 실행할 수 없으면 None을 반환하며, 호출하는 쪽은 디렉토리 탐색으로 대체합니다.
+        """
+        if include_untracked is None:
+            include_untracked = Config.GIT_LIST_UNTRACKED
+        try:
+            index = await asyncio.to_thread(read_index, self.git_dir)
+        except GitIndexError as e:
+            print(f"Git index unavailable for {self.root}, falling back to directory walk: {e}")
+            return None
+
+        untracked = []
+        if include_untracked:
+            untracked = await list_untracked(self.root)
+            if untracked is None:
+                print(f"git ls-files failed for {self.root}, falling back to directory walk")
+                return None
+
+        rel_paths = list(index) + [path for path in untracked if path not in index]
+        changes = await asyncio.to_thread(self._compare_stats, rel_paths, known_stats, is_candidate)
+        print(
+            f"Git index for {self.root}: {len(index)} tracked, {len(untracked)} untracked files, "
+            f"{len(changes['changed'])} changed, {len(changes['deleted'])} deleted"
+        )
+        return changes
+
+    def _compare_stats(self, rel_paths, known_stats, is_candidate):
+        changes = {"changed": [], "unchanged": [], "deleted": []}
+        listed = set()
+        for rel_path in rel_paths:
+            if not is_candidate(rel_path):
+                continue
+            file_path = os.path.join(self.root, *rel_path.split("/"))
+            listed.add(file_path)
+            try:
+                file_stat = os.lstat(file_path)
+                if stat.S_ISLNK(file_stat.st_mode):
+                    # 심볼릭 링크는 디렉토리 탐색과 같이 가리키는 파일의 stat으로 비교
+                    file_stat = os.stat(file_path)
+            except OSError:
+                # index에는 있지만 작업 트리에서 지워진 파일
+                if file_path in known_stats:
+                    changes["deleted"].append(file_path)
+                continue
+            if known_stats.get(file_path) == (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino):
+                changes["unchanged"].append(file_path)
+            else:
+                changes["changed"].append((file_path, MODIFIED if file_path in known_stats else ADDED))
+        # index에도 추적되지 않은 목록에도 없는 기록: 추적을 멈췄거나 무시 대상이 된 파일은 그대로 두고, 없어진 파일만 삭제로 봄
+        for file_path in known_stats:
+            if file_path not in listed and not os.path.lexists(file_path):
+                changes["deleted"].append(file_path)
+        return changes
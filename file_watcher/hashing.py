@@ -0,0 +1,62 @@
+# file_watcher/hashing.py
+
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+
+from config.settings import Config
+
+try:
+    import xxhash
+except ImportError:  # xxhash는 선택 의존성
+    xxhash = None
+
+# 해시 문자열 형식: sha256은 기존 값과 호환되도록 접두사 없이, 그 밖의 알고리즘은 "<알고리즘>:<hex>"
+DEFAULT_ALGORITHM = "sha256"
+
+# 이보다 작은 버퍼는 스레드로 넘기는 비용이 더 크므로 이벤트 루프에서 바로 계산
+_INLINE_HASH_BYTES = 64 * 1024
+
+_executor = None
+
+
+def available_algorithm(algorithm=None):
+    """사용할 해시 알고리즘을 결정합니다. xxh3_128을 요청했지만 xxhash가 없으면 blake2b를 사용합니다."""
+    algorithm = (algorithm or Config.HASH_ALGORITHM).lower()
+    if algorithm == "xxh3_128" and xxhash is None:
+        return "blake2b"
+    return algorithm if algorithm in ("sha256", "blake2b", "xxh3_128") else DEFAULT_ALGORITHM
+
+
+def algorithm_of(file_hash):
+    """저장된 해시 문자열이 어떤 알고리즘으로 계산됐는지 반환합니다."""
+    if ":" in file_hash:
+        return file_hash.split(":", 1)[0]
+    return DEFAULT_ALGORITHM
+
+
+def hash_bytes(content, algorithm=None):
+    """버퍼의 해시를 계산합니다. hashlib과 xxhash는 큰 버퍼를 처리하는 동안 GIL을 놓으므로 스레드에서 병렬로 동작합니다."""
+    algorithm = available_algorithm(algorithm)
+    if algorithm == "sha256":
+        return hashlib.sha256(content).hexdigest()
+    if algorithm == "blake2b":
+        digest = hashlib.blake2b(content, digest_size=32).hexdigest()
+    else:
+        digest = xxhash.xxh3_128_hexdigest(content)
+    return f"{algorithm}:{digest}"
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=Config.HASH_WORKERS, thread_name_prefix="codecast-hash")
+    return _executor
+
+
+async def hash_bytes_async(content, algorithm=None):
+    """큰 버퍼는 HASH_WORKERS 크기의 스레드 풀에서 해시를 계산해 이벤트 루프를 막지 않습니다."""
+    if len(content) < _INLINE_HASH_BYTES:
+        return hash_bytes(content, algorithm)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), hash_bytes, content, algorithm)
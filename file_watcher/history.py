@@ -0,0 +1,41 @@
+# file_watcher/history.py
+
+import json
+
+from file_watcher import blob_store
+
+# 파일 버전 이력은 역방향 delta 체인으로 저장합니다.
+# - 가장 최신 버전과 SNAPSHOT 버전은 blobs 테이블의 전체 내용을 참조합니다.
+# - 그 밖의 버전은 "바로 다음(더 새로운) 버전"에서 자신을 복원하는 delta만 저장합니다.
+# 따라서 임의의 버전은 위쪽으로 가장 가까운 snapshot에서 시작해 delta를 차례로 적용하면 복원됩니다.
+
+SNAPSHOT = "snapshot"
+DELTA = "delta"
+
+
+def build_reverse_delta(old_lines, opcodes):
+    """old -> new opcode로부터 new 내용에서 old 내용을 복원하는 역방향 delta를 만듭니다.
+
+    old_lines는 splitlines(keepends=True)로 나눈 bytes 줄 목록이어야 합니다.
+    반환값은 (codec, 압축된 delta)입니다.
+    """
+    ops = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            ops.append([j1, j2])
+        elif i1 < i2:
+            # bytes를 그대로 보존하기 위해 latin-1로 1:1 변환
+            ops.append(b"".join(old_lines[i1:i2]).decode("latin-1"))
+    return blob_store.compress(json.dumps(ops, separators=(",", ":")).encode("utf-8"))
+
+
+def apply_reverse_delta(newer_content, codec, delta):
+    """더 새로운 버전의 내용에 역방향 delta를 적용해 이전 버전의 내용을 복원합니다."""
+    newer_lines = newer_content.splitlines(keepends=True)
+    restored = []
+    for op in json.loads(blob_store.decompress(codec, delta)):
+        if isinstance(op, list):
+            restored.extend(newer_lines[op[0] : op[1]])
+        else:
+            restored.append(op.encode("latin-1"))
+    return b"".join(restored)
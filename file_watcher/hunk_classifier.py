@@ -0,0 +1,450 @@
+# file_watcher/hunk_classifier.py
+
+import os
+import re
+from collections import Counter
+
+# 의미 없는 변경으로 분류된 hunk는 머리말 끝에 [종류]를 붙여 저장합니다. (예: "@@ -1,3 +1,4 @@ [whitespace]")
+WHITESPACE = "whitespace"
+COMMENT = "comment"
+REORDER = "reorder"
+NOISE_KINDS = (WHITESPACE, COMMENT, REORDER)
+# 한 파일의 hunk가 서로 다른 종류의 의미 없는 변경으로만 이뤄졌을 때의 파일 단위 분류
+FORMATTING = "formatting"
+
+_HASH_COMMENT = ("#",)
+# 블록 주석의 가운데 줄(" * ...")은 "* "로 시작하는 경우만 주석으로 봅니다. (C의 "*p = 1;" 같은 코드와 구분)
+_SLASH_COMMENT = ("//", "/*", "* ", "*/")
+_COMMENT_PREFIXES = {
+    ".py": _HASH_COMMENT,
+    ".rb": _HASH_COMMENT,
+    ".r": _HASH_COMMENT,
+    ".sh": _HASH_COMMENT,
+    ".bash": _HASH_COMMENT,
+    ".zsh": _HASH_COMMENT,
+    ".yml": _HASH_COMMENT,
+    ".yaml": _HASH_COMMENT,
+    ".toml": _HASH_COMMENT,
+    ".js": _SLASH_COMMENT,
+    ".jsx": _SLASH_COMMENT,
+    ".ts": _SLASH_COMMENT,
+    ".tsx": _SLASH_COMMENT,
+    ".java": _SLASH_COMMENT,
+    ".kt": _SLASH_COMMENT,
+    ".scala": _SLASH_COMMENT,
+    ".c": _SLASH_COMMENT,
+    ".cpp": _SLASH_COMMENT,
+    ".h": _SLASH_COMMENT,
+    ".hpp": _SLASH_COMMENT,
+    ".cs": _SLASH_COMMENT,
+    ".go": _SLASH_COMMENT,
+    ".swift": _SLASH_COMMENT,
+    ".m": _SLASH_COMMENT,
+    ".mm": _SLASH_COMMENT,
+    ".css": ("/*", "* ", "*/"),
+    ".scss": _SLASH_COMMENT,
+    ".less": _SLASH_COMMENT,
+    ".sass": _SLASH_COMMENT,
+    ".php": _SLASH_COMMENT + _HASH_COMMENT,
+}
+# 들여쓰기가 문법인 언어: 들여쓰기 깊이가 바뀐 줄은 공백만 바뀐 것으로 보지 않음
+_INDENT_SENSITIVE = {".py", ".yaml", ".yml", ".sass"}
+# 문자열 시작 기호 (긴 기호부터 검사). 여러 줄에 걸칠 수 있는 것은 _MULTILINE_QUOTES
+_QUOTES = ('"""', "'''", '"', "'", "`")
+_MULTILINE_QUOTES = ('"""', "'''", "`")
+# 정규식 리터럴(/.../)이 있는 언어: 리터럴 안의 공백은 문자열처럼 그대로 비교
+_REGEX_LITERALS = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"}
+# 이 문자나 키워드 뒤의 "/"는 나눗셈이 아니라 정규식 리터럴의 시작
+_REGEX_PRECEDERS = "(,=:[!&|?{};+-*%<>~^"
+_REGEX_KEYWORDS = {"return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await"}
+# 순서만 바뀌어도 동작이 같은 선언의 시작 형태. 여기 없는 언어는 순서 변경을 의미 있는 변경으로 봄
+_PY_DECLARATIONS = ("def ", "async def ", "class ", "@", "import ", "from ")
+_SCRIPT_DECLARATIONS = (
+    "function ",
+    "function*",
+    "async function ",
+    "class ",
+    "abstract class ",
+    "interface ",
+    "enum ",
+    "import ",
+    "export function ",
+    "export async function ",
+    "export class ",
+    "export abstract class ",
+    "export default function ",
+    "export default class ",
+    "export interface ",
+    "export enum ",
+)
+_DECLARATION_PREFIXES = {
+    ".py": _PY_DECLARATIONS,
+    ".js": _SCRIPT_DECLARATIONS,
+    ".jsx": _SCRIPT_DECLARATIONS,
+    ".mjs": _SCRIPT_DECLARATIONS,
+    ".cjs": _SCRIPT_DECLARATIONS,
+    ".ts": _SCRIPT_DECLARATIONS,
+    ".tsx": _SCRIPT_DECLARATIONS,
+    ".go": ("func ", "type ", "import "),
+}
+
+
+def comment_prefixes_for(file_path):
+    """파일 확장자로 한 줄 주석의 시작 기호를 찾습니다. 모르는 언어면 빈 튜플을 반환합니다."""
+    if not file_path:
+        return ()
+    return _COMMENT_PREFIXES.get(os.path.splitext(file_path)[1].lower(), ())
+
+
+def indent_sensitive_for(file_path):
+    """들여쓰기가 의미를 갖는 언어(Python, YAML, Sass)의 파일인지 확인합니다."""
+    return bool(file_path) and os.path.splitext(file_path)[1].lower() in _INDENT_SENSITIVE
+
+
+def regex_literals_for(file_path):
+    """정규식 리터럴이 있는 언어(JavaScript, TypeScript)의 파일인지 확인합니다."""
+    return bool(file_path) and os.path.splitext(file_path)[1].lower() in _REGEX_LITERALS
+
+
+def declaration_prefixes_for(file_path):
+    """파일 확장자로 순서를 바꿔도 되는 선언(함수, 클래스, import)의 시작 형태를 찾습니다. 모르는 언어면 빈 튜플입니다."""
+    if not file_path:
+        return ()
+    return _DECLARATION_PREFIXES.get(os.path.splitext(file_path)[1].lower(), ())
+
+
+def _find_closing_quote(line, start, quote):
+    pos = start
+    while pos < len(line):
+        if line[pos] == "\\":
+            pos += 2
+        elif line.startswith(quote, pos):
+            return pos + len(quote)
+        else:
+            pos += 1
+    return None
+
+
+def _collapse(code):
+    """연속된 공백을 한 칸으로 줄입니다. (양 끝의 공백도 한 칸으로 남겨 문자열과의 경계를 유지)"""
+    collapsed = " ".join(code.split())
+    if collapsed and code[:1].isspace():
+        collapsed = " " + collapsed
+    if code[-1:].isspace():
+        collapsed += " "
+    return collapsed
+
+
+def _starts_regex(line, pos):
+    """pos의 "/"가 정규식 리터럴을 여는지 앞의 토큰으로 판단합니다. (나눗셈과 블록 주석은 아님)"""
+    if line.startswith("/*", pos):
+        return False
+    before = line[:pos].rstrip()
+    if not before or before[-1] in _REGEX_PRECEDERS:
+        return True
+    word = re.search(r"[A-Za-z_$]+$", before)
+    return bool(word) and word.group() in _REGEX_KEYWORDS and before[word.start() - 1 : word.start()] != "."
+
+
+def _find_regex_end(line, start):
+    """start에서 열린 정규식 리터럴의 끝(플래그 포함) 위치를 찾습니다. 줄 안에서 닫히지 않으면 줄 끝입니다."""
+    pos = start + 1
+    in_class = False
+    while pos < len(line):
+        char = line[pos]
+        if char == "\\":
+            pos += 2
+            continue
+        if char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            pos += 1
+            while pos < len(line) and line[pos].isalpha():
+                pos += 1
+            return pos
+        pos += 1
+    return len(line)
+
+
+def _bracket_delta(code):
+    return sum(code.count(c) for c in "([{") - sum(code.count(c) for c in ")]}")
+
+
+def _normalize_code(line, open_quote, line_comments, regex_literals=False):
+    """줄을 비교용 형태로 바꿉니다.
+
+    문자열 밖의 연속된 공백은 한 칸으로 줄이고 양 끝 공백은 지우며, 문자열(regex_literals면 정규식 리터럴도) 안의 내용은 그대로 둡니다.
+    (정규화한 내용, 줄 끝에서 닫히지 않은 여러 줄 문자열 기호, 문자열/주석 밖 괄호 깊이 변화)를 반환합니다.
+    """
+    parts = []
+    depth = 0
+    pos = code_start = 0
+    if open_quote:
+        end = _find_closing_quote(line, 0, open_quote)
+        if end is None:
+            return line, open_quote, 0
+        parts.append(line[:end])
+        pos = code_start = end
+    while pos < len(line):
+        if line.startswith(line_comments, pos):
+            # 줄 끝 주석: 안의 따옴표나 괄호는 코드가 아님
+            code = line[code_start:pos]
+            parts.append(_collapse(code) + " ".join(line[pos:].split()))
+            return "".join(parts).strip(), None, depth + _bracket_delta(code)
+        quote = next((q for q in _QUOTES if line.startswith(q, pos)), None)
+        if quote is None:
+            if regex_literals and line[pos] == "/" and _starts_regex(line, pos):
+                code = line[code_start:pos]
+                parts.append(_collapse(code))
+                depth += _bracket_delta(code)
+                end = _find_regex_end(line, pos)
+                parts.append(line[pos:end])
+                pos = code_start = end
+                continue
+            pos += 1
+            continue
+        code = line[code_start:pos]
+        parts.append(_collapse(code))
+        depth += _bracket_delta(code)
+        end = _find_closing_quote(line, pos + len(quote), quote)
+        if end is None:
+            parts.append(line[pos:])
+            return "".join(parts).strip(), quote if quote in _MULTILINE_QUOTES else None, depth
+        parts.append(line[pos:end])
+        pos = code_start = end
+    code = line[code_start:]
+    parts.append(_collapse(code))
+    return "".join(parts).strip(), None, depth + _bracket_delta(code)
+
+
+def line_keys(lines, comment_prefixes=(), indent_sensitive=False, regex_literals=False):
+    """줄마다 공백 차이를 무시하고 비교할 키 (문자열 안의 줄인지, 줄의 깊이, 정규화한 내용)를 만듭니다.
+
+    여러 줄 문자열 안에서 시작하는 줄은 공백까지 그대로 비교합니다.
+    깊이는 indent_sensitive면 들여쓰기 폭(열린 괄호 안에서 이어지는 줄은 들여쓰기가 의미 없으므로 None),
+    아니면 줄이 시작할 때 열려 있는 괄호 수입니다.
+    """
+    line_comments = tuple(prefix for prefix in comment_prefixes if prefix in ("#", "//"))
+    keys = []
+    open_quote = None
+    depth = 0
+    for line in lines:
+        if open_quote:
+            keys.append((True, None, line))
+            _, open_quote, delta = _normalize_code(line, open_quote, line_comments, regex_literals)
+            depth = max(0, depth + delta)
+            continue
+        level = depth
+        if indent_sensitive:
+            expanded = line.expandtabs(8)
+            level = None if depth else len(expanded) - len(expanded.lstrip()) if line.strip() else 0
+        if _is_comment(line, comment_prefixes):
+            keys.append((False, level, " ".join(line.split())))
+            continue
+        text, open_quote, delta = _normalize_code(line, None, line_comments, regex_literals)
+        depth = max(0, depth + delta)
+        keys.append((False, level, text))
+    return keys
+
+
+def _whitespace_form(keys, indent_sensitive):
+    """공백만 다른 줄 묶음이 같아지는 형태입니다.
+
+    빈 줄은 빼고, 나머지 줄은 깊이와 함께 한 줄씩 비교합니다. 줄바꿈이 문법인 언어(JavaScript의 세미콜론 자동 삽입 등)가 있으므로
+    줄을 이어 붙이는 것은 들여쓰기가 의미 있는 언어에서 괄호 안에서 이어지는 줄뿐입니다. (문자열 안의 줄은 이어 붙이지 않음)
+    """
+    form = []
+    for in_string, level, text in keys:
+        if not in_string and not text:
+            continue
+        if indent_sensitive and level is None and not in_string and form and not form[-1][0]:
+            form[-1] = (False, form[-1][1], form[-1][2] + " " + text)
+        else:
+            form.append((in_string, level, text))
+    return form
+
+
+def _is_comment(line, comment_prefixes):
+    if not comment_prefixes:
+        return False
+    stripped = line.strip()
+    return stripped.startswith(comment_prefixes) or (stripped == "*" and "* " in comment_prefixes)
+
+
+def _declaration_blocks(keys, ranges, comment_prefixes, declaration_prefixes):
+    """ranges(줄 구간 목록)의 줄을 선언(앞의 주석 포함) 단위로 묶어 Counter로 반환합니다.
+
+    구간마다 첫 줄의 깊이에서 선언으로 시작해, 그 선언이 끝나는 곳(다음 줄이 같은 깊이 이하)에서 끝나야 합니다.
+    선언이 아닌 문장이 섞였거나 선언의 일부만 포함된 구간이 있으면 None입니다.
+    """
+    blocks = Counter()
+    for start, end in ranges:
+        block, has_declaration, base = [], False, None
+        for key in keys[start:end]:
+            in_string, level, text = key
+            if not in_string and not text:
+                continue
+            if base is None:
+                if in_string or level is None:
+                    return None
+                base = level
+            if in_string or level is None or level > base:
+                if not block:
+                    return None
+                block.append(key)
+                continue
+            if level < base:
+                return None
+            if _is_comment(text, comment_prefixes):
+                if has_declaration:
+                    blocks[tuple(block)] += 1
+                    block, has_declaration = [], False
+            elif text.startswith(declaration_prefixes):
+                # 데코레이터 바로 뒤의 선언은 같은 묶음
+                if has_declaration and not block[-1][2].startswith("@"):
+                    blocks[tuple(block)] += 1
+                    block = []
+                has_declaration = True
+            else:
+                return None
+            block.append(key)
+        if not block:
+            continue
+        if not has_declaration:
+            return None
+        following = next((key for key in keys[end:] if key[0] or key[2]), None)
+        if following is not None and (following[0] or following[1] is None or following[1] > base):
+            return None
+        blocks[tuple(block)] += 1
+    return blocks
+
+
+def _is_reorder(old_keys, new_keys, old_ranges, new_ranges, comment_prefixes, declaration_prefixes):
+    """삭제 구간과 추가 구간이 같은 깊이의 같은 선언 묶음을 순서만 바꾼 것인지 확인합니다."""
+    if not declaration_prefixes:
+        return False
+    removed_blocks = _declaration_blocks(old_keys, old_ranges, comment_prefixes, declaration_prefixes)
+    if not removed_blocks:
+        return False
+    return removed_blocks == _declaration_blocks(new_keys, new_ranges, comment_prefixes, declaration_prefixes)
+
+
+def classify_lines(
+    removed, added, comment_prefixes=(), indent_sensitive=False, regex_literals=False, declaration_prefixes=()
+):
+    """hunk의 삭제 줄과 추가 줄을 비교해 의미 없는 변경의 종류를 반환합니다. 의미 있는 변경이면 None.
+
+    hunk 줄만으로는 여러 줄 문자열 안인지 알 수 없으므로, 파일 전체가 있으면 classify_groups를 씁니다.
+    """
+    removed_keys = line_keys(removed, comment_prefixes, indent_sensitive, regex_literals)
+    added_keys = line_keys(added, comment_prefixes, indent_sensitive, regex_literals)
+    label = _classify(removed, added, removed_keys, added_keys, comment_prefixes, indent_sensitive)
+    if label is None and _is_reorder(
+        removed_keys, added_keys, [(0, len(removed))], [(0, len(added))], comment_prefixes, declaration_prefixes
+    ):
+        return REORDER
+    return label
+
+
+def _classify(removed, added, removed_keys, added_keys, comment_prefixes, indent_sensitive):
+    """공백(WHITESPACE)이나 주석(COMMENT)만 바뀐 hunk인지 분류합니다. 순서 변경은 _is_reorder가 따로 판단합니다."""
+    if _whitespace_form(removed_keys, indent_sensitive) == _whitespace_form(added_keys, indent_sensitive):
+        return WHITESPACE
+    if comment_prefixes:
+        removed_code = [key for line, key in zip(removed, removed_keys) if key[0] or not _is_comment(line, comment_prefixes)]
+        added_code = [key for line, key in zip(added, added_keys) if key[0] or not _is_comment(line, comment_prefixes)]
+        if (len(removed_code), len(added_code)) != (len(removed), len(added)) and _whitespace_form(
+            removed_code, indent_sensitive
+        ) == _whitespace_form(added_code, indent_sensitive):
+            return COMMENT
+    return None
+
+
+def _changed_ranges(group, side):
+    """hunk에서 삭제(side="old") 또는 추가(side="new")된 줄 구간 목록입니다."""
+    tags = ("replace", "delete") if side == "old" else ("replace", "insert")
+    return [(i1, i2) if side == "old" else (j1, j2) for tag, i1, i2, j1, j2 in group if tag in tags]
+
+
+def classify_groups(
+    old_lines,
+    new_lines,
+    groups,
+    comment_prefixes=(),
+    indent_sensitive=False,
+    regex_literals=False,
+    declaration_prefixes=(),
+):
+    """group_opcodes로 묶인 hunk마다 분류(없으면 None)를 매깁니다.
+
+    줄 키는 파일 전체에서 만들어, 여러 줄 문자열 안의 줄이 바뀐 hunk는 공백 차이도 의미 있는 변경으로 봅니다.
+    공백/주석 비교는 hunk의 처음 바뀐 줄부터 마지막 바뀐 줄까지(사이의 같은 줄 포함)로 해서, 줄 위치가 바뀐 것은 공백 변경으로 보지 않습니다.
+    hunk 안에서, 또는 남은 hunk들을 모두 합쳐서 삭제 줄과 추가 줄이 같은 깊이의 같은 선언(함수, 클래스, import) 묶음이면
+    (함수를 파일 안에서 옮긴 경우처럼) reorder로 봅니다. 선언이 아닌 문장의 순서 변경은 동작이 바뀌므로 의미 있는 변경입니다.
+    """
+    old_keys = line_keys(old_lines, comment_prefixes, indent_sensitive, regex_literals)
+    new_keys = line_keys(new_lines, comment_prefixes, indent_sensitive, regex_literals)
+    ranges = [(_changed_ranges(group, "old"), _changed_ranges(group, "new")) for group in groups]
+    labels = []
+    for group, (old_ranges, new_ranges) in zip(groups, ranges):
+        old_span = slice(group[0][1], group[-1][2])
+        new_span = slice(group[0][3], group[-1][4])
+        label = _classify(
+            old_lines[old_span], new_lines[new_span], old_keys[old_span], new_keys[new_span], comment_prefixes, indent_sensitive
+        )
+        if label is None and _is_reorder(
+            old_keys, new_keys, old_ranges, new_ranges, comment_prefixes, declaration_prefixes
+        ):
+            label = REORDER
+        labels.append(label)
+
+    remaining = [index for index, label in enumerate(labels) if label is None]
+    if len(remaining) > 1 and _is_reorder(
+        old_keys,
+        new_keys,
+        [span for index in remaining for span in ranges[index][0]],
+        [span for index in remaining for span in ranges[index][1]],
+        comment_prefixes,
+        declaration_prefixes,
+    ):
+        for index in remaining:
+            labels[index] = REORDER
+    return labels
+
+
+def noise_kind(labels):
+    """파일의 모든 hunk가 의미 없는 변경이면 그 종류(여러 종류가 섞였으면 formatting)를, 아니면 None을 반환합니다."""
+    if not labels or None in labels:
+        return None
+    kinds = set(labels)
+    return kinds.pop() if len(kinds) == 1 else FORMATTING
+
+
+def hunk_label(header):
+    """저장된 diff의 hunk 머리말에서 분류를 읽습니다."""
+    if header.endswith("]"):
+        label = header[header.rfind("[") + 1 : -1]
+        if label in NOISE_KINDS:
+            return label
+    return None
+
+
+def strip_noise_hunks(diff_text):
+    """변경 하나의 diff 텍스트에서 의미 없는 변경으로 표시된 hunk를 빼고 반환합니다. 남는 내용이 없으면 빈 문자열입니다."""
+    if " @@ [" not in diff_text:
+        return diff_text
+    kept = []
+    dropping = False
+    kept_hunks = 0
+    for line in diff_text.split("\n"):
+        if line.startswith("@@ "):
+            dropping = hunk_label(line) is not None
+            kept_hunks += not dropping
+        if not dropping:
+            kept.append(line)
+    if not kept_hunks:
+        # 모든 hunk가 빠졌으면 파일 머리말도 의미가 없음 (rename 머리말 등 나머지 줄은 유지)
+        kept = [line for line in kept if line not in ("--- before", "+++ after")]
+    return "\n".join(kept).strip("\n")
@@ -0,0 +1,165 @@
+# file_watcher/hunks.py
+
+import os
+import re
+
+# 파일 확장자 -> 언어 이름 (diff_hunks.language)
+LANGUAGES = {
+    ".py": "python",
+    ".js": "javascript",
+    ".jsx": "javascript",
+    ".ts": "typescript",
+    ".tsx": "typescript",
+    ".java": "java",
+    ".kt": "kotlin",
+    ".scala": "scala",
+    ".c": "c",
+    ".h": "c",
+    ".cpp": "cpp",
+    ".hpp": "cpp",
+    ".cs": "csharp",
+    ".go": "go",
+    ".rb": "ruby",
+    ".php": "php",
+    ".swift": "swift",
+    ".r": "r",
+    ".m": "objc",
+    ".mm": "objc",
+    ".html": "html",
+    ".htm": "html",
+    ".css": "css",
+    ".scss": "scss",
+    ".sass": "sass",
+    ".less": "less",
+    ".json": "json",
+    ".yml": "yaml",
+    ".yaml": "yaml",
+    ".xml": "xml",
+    ".toml": "toml",
+    ".sh": "shell",
+    ".bash": "shell",
+    ".zsh": "shell",
+    ".md": "markdown",
+    ".txt": "text",
+    ".csv": "csv",
+}
+
+# hunk를 감싸는 함수/클래스를 찾는 정의 줄 패턴 (git의 diff funcname과 같은 방식: 위로 올라가며 처음 맞는 줄)
+_C_LIKE_FUNCTION = r"^[A-Za-z_][\w\s\*&:<>,\[\]]*?\b([A-Za-z_]\w*)\s*\([^;]*$"
+_SYMBOL_PATTERNS = {
+    "python": [r"^\s*(?:async\s+)?(?:def|class)\s+([A-Za-z_]\w*)"],
+    "javascript": [
+        r"^\s*(?:export\s+)?(?:default\s+)?(?:async\s+)?function\s*\*?\s*([A-Za-z_$][\w$]*)",
+        r"^\s*(?:export\s+)?(?:default\s+)?(?:abstract\s+)?class\s+([A-Za-z_$][\w$]*)",
+        r"^\s*(?:export\s+)?(?:const|let|var)\s+([A-Za-z_$][\w$]*)\s*=\s*"
+        r"(?:async\s+)?(?:function|\([^)]*\)\s*=>|[A-Za-z_$][\w$]*\s*=>)",
+        r"^\s*(?:(?:public|private|protected|static|async|get|set)\s+)*([A-Za-z_$][\w$]*)\s*\([^)]*\)\s*\{\s*$",
+    ],
+    "java": [
+        r"^\s*(?:[\w<>\[\]]+\s+)*(?:class|interface|enum|record)\s+([A-Za-z_]\w*)",
+        r"^\s*(?:(?:public|private|protected|static|final|abstract|synchronized|override|suspend)\s+)+"
+        r"[\w<>\[\],\s]*?\b([A-Za-z_]\w*)\s*\(",
+    ],
+    "go": [r"^func\s+(?:\([^)]*\)\s*)?([A-Za-z_]\w*)", r"^type\s+([A-Za-z_]\w*)"],
+    "ruby": [r"^\s*(?:def|class|module)\s+(?:self\.)?([A-Za-z_]\w*[?!]?)"],
+    "php": [
+        r"^\s*(?:(?:public|private|protected|static|abstract|final)\s+)*"
+        r"(?:function|class|interface|trait)\s+&?([A-Za-z_]\w*)"
+    ],
+    "swift": [
+        r"^\s*(?:(?:public|private|internal|fileprivate|open|static|final|override)\s+)*"
+        r"(?:func|class|struct|enum|protocol|extension)\s+([A-Za-z_]\w*)"
+    ],
+    "c": [_C_LIKE_FUNCTION],
+}
+_SYMBOL_PATTERNS["typescript"] = _SYMBOL_PATTERNS["javascript"]
+_SYMBOL_PATTERNS["kotlin"] = [r"^\s*(?:[\w]+\s+)*(?:fun|class|object|interface)\s+(?:<[^>]*>\s*)?([A-Za-z_]\w*)"]
+_SYMBOL_PATTERNS["scala"] = [r"^\s*(?:[\w]+\s+)*(?:def|class|object|trait)\s+([A-Za-z_]\w*)"]
+_SYMBOL_PATTERNS["csharp"] = _SYMBOL_PATTERNS["java"]
+_SYMBOL_PATTERNS["cpp"] = _SYMBOL_PATTERNS["objc"] = [r"^\s*(?:class|struct|namespace)\s+([A-Za-z_]\w*)", _C_LIKE_FUNCTION]
+_COMPILED_PATTERNS = {
+    language: [re.compile(pattern) for pattern in patterns] for language, patterns in _SYMBOL_PATTERNS.items()
+}
+# C 계열 패턴이 제어문을 함수로 잡지 않도록 제외할 이름
+_KEYWORDS = {"if", "for", "while", "switch", "catch", "return", "else", "do", "sizeof", "new", "elif", "with"}
+
+
+def language_for(file_path):
+    """파일 확장자로 언어 이름을 찾습니다. 모르는 확장자면 None."""
+    return LANGUAGES.get(os.path.splitext(file_path)[1].lower()) if file_path else None
+
+
+def enclosing_symbol(lines, index, language):
+    """lines[index] 위쪽에서 가장 가까운 함수/클래스 정의의 이름을 찾습니다. 없으면 None."""
+    patterns = _COMPILED_PATTERNS.get(language)
+    if not patterns:
+        return None
+    for line in reversed(lines[: index + 1]):
+        for pattern in patterns:
+            match = pattern.match(line)
+            if match and match.group(1) not in _KEYWORDS:
+                return match.group(1)
+    return None
+
+
+def build_hunks(old_lines, new_lines, groups, labels, language=None):
+    """group_opcodes로 묶인 hunk마다 저장할 메타데이터 튜플을 만듭니다.
+
+    튜플은 (old_start, old_count, new_start, new_count, added, removed, noise_kind, symbol)이며,
+    범위는 unified diff 머리말과 같은 1부터 시작하는 줄 번호입니다.
+    """
+    hunks = []
+    for group, label in zip(groups, labels):
+        first, last = group[0], group[-1]
+        added = removed = 0
+        first_changed = None
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                continue
+            removed += i2 - i1
+            added += j2 - j1
+            if first_changed is None:
+                # 삭제만 있는 경우 삭제된 자리 바로 위 줄부터 찾음
+                first_changed = j1 if j2 > j1 else j1 - 1
+        old_count = last[2] - first[1]
+        new_count = last[4] - first[3]
+        first_changed = min(first_changed, len(new_lines) - 1)
+        symbol = enclosing_symbol(new_lines, first_changed, language) if first_changed >= 0 else None
+        hunks.append(
+            (
+                first[1] + 1 if old_count else first[1],
+                old_count,
+                first[3] + 1 if new_count else first[3],
+                new_count,
+                added,
+                removed,
+                label,
+                symbol,
+            )
+        )
+    return hunks
+
+
+def whole_file_hunk(old_line_count, new_line_count):
+    """새 파일이나 diff를 생략한 파일처럼 파일 전체가 하나의 변경인 경우의 hunk 튜플입니다."""
+    return (
+        1 if old_line_count else 0,
+        old_line_count,
+        1 if new_line_count else 0,
+        new_line_count,
+        new_line_count,
+        old_line_count,
+        None,
+        None,
+    )
+
+
+def count_changed_lines(diff_text):
+    """hunk 기록이 없는 예전 diff 텍스트에서 추가/삭제 줄 수를 셉니다. (added, removed)"""
+    added = removed = 0
+    for line in diff_text.split("\n"):
+        if line.startswith("+") and not line.startswith("+++ "):
+            added += 1
+        elif line.startswith("-") and not line.startswith("--- "):
+            removed += 1
+    return added, removed
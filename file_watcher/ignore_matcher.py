@@ -0,0 +1,210 @@
+# file_watcher/ignore_matcher.py
+
+import os
+import re
+
+from config.settings import Config
+
+IGNORE_FILENAMES = (".gitignore", ".codecastignore")
+
+
+def _glob_to_regex(pattern):
+    """gitignore 글롭 패턴을 정규식 문자열로 변환합니다. (*, ?, [...], ** 지원)"""
+    regex = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "*":
+            if pattern[i : i + 3] == "**/":
+                regex.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern[i : i + 2] == "**":
+                regex.append(".*")
+                i += 2
+                continue
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end].replace("\\", "\\\\")
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                regex.append(f"[{body}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+
+class IgnoreRule:
+    """gitignore 한 줄을 컴파일한 규칙입니다. base는 규칙이 정의된 디렉토리(루트 기준 상대 경로)입니다."""
+
+    __slots__ = ("negated", "dir_only", "literal_name", "regex", "base")
+
+    def __init__(self, pattern, base=""):
+        self.negated = pattern.startswith("!")
+        if self.negated:
+            pattern = pattern[1:]
+        self.dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        self.base = base
+
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        # 슬래시도 글롭 문자도 없는 이름은 정규식 대신 이름 비교만으로 판정
+        is_literal = not anchored and not re.search(r"[*?\[\\]", pattern)
+        self.literal_name = pattern if is_literal else None
+        prefix = "" if anchored else "(?:.*/)?"
+        self.regex = None if is_literal else re.compile(f"{prefix}{_glob_to_regex(pattern)}$")
+
+    def matches(self, rel_path, name, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.base:
+            if not rel_path.startswith(self.base + "/"):
+                return False
+            rel_path = rel_path[len(self.base) + 1 :]
+        if self.literal_name is not None:
+            return name == self.literal_name
+        return self.regex.match(rel_path) is not None
+
+
+def parse_ignore_lines(lines, base=""):
+    """ignore 파일의 줄 목록을 IgnoreRule 목록으로 바꿉니다. 빈 줄과 주석은 건너뜁니다."""
+    rules = []
+    for line in lines:
+        line = line.rstrip("\n").rstrip("\r")
+        if not line.endswith("\\ "):
+            line = line.rstrip()
+        if not line or line.startswith("#"):
+            continue
+        rules.append(IgnoreRule(line, base))
+    return rules
+
+
+def read_ignore_files(directory, base=""):
+    """디렉토리에 있는 .gitignore / .codecastignore 파일을 읽어 규칙으로 만듭니다."""
+    rules = []
+    for filename in IGNORE_FILENAMES:
+        path = os.path.join(directory, filename)
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as f:
+                rules.extend(parse_ignore_lines(f, base))
+        except OSError:
+            continue
+    return rules
+
+
+class IgnoreMatcher:
+    """하나의 감시 루트에 대한 무시 규칙 모음입니다.
+
+    설정의 IGNORE_PATTERNS, 루트의 .gitignore/.codecastignore, 하위 디렉토리의 ignore 파일 순서로 규칙이 쌓이며
+    gitignore와 같이 나중에 나온 규칙이 우선합니다. 부정(!) 규칙이 없으면 이름 집합 조회 + 통합 정규식 한 번으로 판정합니다.
+    """
+
+    def __init__(self, root, rules=None):
+        self.root = os.path.abspath(root)
+        if rules is None:
+            rules = parse_ignore_lines(Config.IGNORE_PATTERNS) + read_ignore_files(self.root)
+        self.rules = rules
+        self._children = {}
+        # 루트 기준 디렉토리별 판정 결과 캐시: rel_dir -> (무시 여부, 그 디렉토리에 적용되는 matcher)
+        self._directory_cache = {}
+        self._compile()
+
+    def _compile(self):
+        self._has_negation = any(rule.negated for rule in self.rules)
+        self._literal_names = {rule.literal_name for rule in self.rules if rule.literal_name and not rule.base}
+        self._literal_dir_names = {
+            rule.literal_name for rule in self.rules if rule.literal_name and not rule.base and rule.dir_only
+        }
+        self._literal_names -= self._literal_dir_names
+        self._other_rules = [rule for rule in self.rules if rule.literal_name is None or rule.base]
+
+    def for_directory(self, rel_dir):
+        """rel_dir에 ignore 파일이 있으면 그 규칙을 더한 matcher를, 없으면 자기 자신을 반환합니다."""
+        if not rel_dir:
+            return self
+        child = self._children.get(rel_dir)
+        if child is None:
+            extra_rules = read_ignore_files(os.path.join(self.root, rel_dir), base=rel_dir)
+            child = IgnoreMatcher(self.root, self.rules + extra_rules) if extra_rules else self
+            self._children[rel_dir] = child
+        return child
+
+    def is_ignored(self, rel_path, is_dir):
+        """루트 기준 상대 경로(슬래시 구분)가 무시 대상인지 판정합니다."""
+        name = rel_path.rsplit("/", 1)[-1]
+        if self._has_negation:
+            for rule in reversed(self.rules):
+                if rule.matches(rel_path, name, is_dir):
+                    return not rule.negated
+            return False
+
+        if name in self._literal_names or (is_dir and name in self._literal_dir_names):
+            return True
+        return any(rule.matches(rel_path, name, is_dir) for rule in self._other_rules)
+
+    def _resolve_directory(self, rel_dir):
+        """rel_dir이 (상위 디렉토리를 포함해) 무시 대상인지와, 그 안의 파일에 적용할 matcher를 캐시해 반환합니다."""
+        if not rel_dir:
+            return False, self
+        cached = self._directory_cache.get(rel_dir)
+        if cached is None:
+            parent_ignored, parent_matcher = self._resolve_directory(rel_dir.rpartition("/")[0])
+            if parent_ignored or parent_matcher.is_ignored(rel_dir, True):
+                cached = (True, parent_matcher)
+            else:
+                cached = (False, parent_matcher.for_directory(rel_dir))
+            self._directory_cache[rel_dir] = cached
+        return cached
+
+    def is_path_ignored(self, path):
+        """임의의 절대 경로가 무시 대상인지, 상위 디렉토리까지 포함해 판정합니다. (감시 모드, git index 등 단일 파일 확인용)"""
+        rel_path = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, "/")
+        if rel_path.startswith("../"):
+            return False
+        return self.is_rel_path_ignored(rel_path)
+
+    def is_rel_path_ignored(self, rel_path):
+        """루트 기준 상대 파일 경로가 무시 대상인지 판정합니다. 디렉토리 판정은 캐시되므로 같은 디렉토리의 파일은 한 번만 계산합니다."""
+        dir_ignored, matcher = self._resolve_directory(rel_path.rpartition("/")[0])
+        return dir_ignored or matcher.is_ignored(rel_path, False)
+
+    def walk_files(self):
+        """os.scandir로 루트를 탐색하며 무시 대상 디렉토리는 하위 트리 전체를 건너뛰고 파일 DirEntry를 돌려줍니다."""
+        stack = [("", self)]
+        while stack:
+            rel_dir, matcher = stack.pop()
+            dir_path = os.path.join(self.root, rel_dir) if rel_dir else self.root
+            try:
+                entries = list(os.scandir(dir_path))
+            except OSError as e:
+                print(f"Error reading directory {dir_path}: {e}")
+                continue
+
+            subdirs = []
+            for entry in entries:
+                rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not matcher.is_ignored(rel_path, True):
+                            subdirs.append(rel_path)
+                        continue
+                    if not entry.is_file():
+                        continue
+                except OSError:
+                    continue
+                yield entry, rel_path, matcher
+
+            for rel_path in reversed(subdirs):
+                stack.append((rel_path, matcher.for_directory(rel_path)))
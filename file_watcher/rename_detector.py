@@ -0,0 +1,154 @@
+# file_watcher/rename_detector.py
+
+import os
+
+from config.settings import Config
+
+
+def rename_header(old_path, new_path):
+    """rename 이벤트의 diff 머리말 (git 형식)"""
+    return f"rename from {old_path}\nrename to {new_path}\n"
+
+
+def _changed_line_ratio(diff_text, old_content, new_content):
+    """diff에서 추가/삭제된 줄이 두 파일 전체 줄 수에서 차지하는 비율 (0이면 동일, 1이면 완전히 다름)"""
+    changed = sum(
+        1 for line in diff_text.splitlines() if line[:1] in ("+", "-") and not line.startswith(("+++", "---"))
+    )
+    total = old_content.count(b"\n") + new_content.count(b"\n") + 2
+    return changed / total
+
+
+async def build_rename_result(handler, db_manager, old_path, new_path, file_info, old_hash=None):
+    """old_path에서 new_path로 옮겨진 파일의 변경 결과를 만듭니다.
+
+    내용이 같으면 rename 머리말만, 조금 바뀌었으면 머리말 + diff를 diff로 사용합니다.
+    바뀐 줄 비율이 RENAME_MAX_CHANGED_RATIO를 넘으면 rename으로 보지 않고 None을 반환합니다.
+    """
+    if old_hash is not None and old_hash == file_info["hash"]:
+        diff = rename_header(old_path, new_path).encode("utf-8")
+    else:
+        existing_info = await db_manager.get_file_info(old_path)
+        if not existing_info or existing_info["content"] is None:
+            return None
+        if existing_info["hash"] == file_info["hash"]:
+            diff = rename_header(old_path, new_path).encode("utf-8")
+        else:
+            with handler.stats.phase("diff"):
+                content_diff, reverse_delta, file_info["hunks"] = handler._generate_diff_and_delta(
+                    existing_info["content"],
+                    file_info["content"],
+                    new_path,
+                    existing_info["full_content"],
+                    file_info["text"],
+                )
+            if content_diff is None:
+                return None
+            if _changed_line_ratio(content_diff.decode("utf-8", "ignore"), existing_info["content"], file_info["content"]) > Config.RENAME_MAX_CHANGED_RATIO:
+                return None
+            file_info["reverse_delta"] = reverse_delta
+            diff = rename_header(old_path, new_path).encode("utf-8") + content_diff
+
+    file_info["renamed_from"] = old_path
+    return new_path, file_info, diff
+
+
+class RenameDetector:
+    """한 번의 스캔에서 사라진 경로와 새로 생긴 경로를 짝지어 이동/이름 변경을 찾습니다.
+
+    새 경로 중 내용 해시나 파일 이름이 기존 파일과 겹치는 것만 스캔이 끝날 때까지 보류하고,
+    탐색이 끝나면 이번 스캔에서 보이지 않은(사라진) 경로와 해시 -> 같은 이름 순으로 맞춰 봅니다.
+    해시가 겹치는 새 경로만 결과 전체를 들고 있고, 이름만 겹치는 새 경로(__init__.py, index.js 등 흔한 이름)는
+    경로만 남겼다가 판정할 때 다시 읽으므로 보류한 파일 수가 많아도 메모리에 내용이 쌓이지 않습니다.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.seen_paths = set()
+        self._paths_by_hash = {}
+        self._known_names = set()
+        for file_path, entry in snapshot.items():
+            self._paths_by_hash.setdefault(entry["hash"], []).append(file_path)
+            self._known_names.add(os.path.basename(file_path))
+        self._deferred = []
+        self._deferred_names = []
+
+    def mark_seen(self, file_path):
+        self.seen_paths.add(file_path)
+
+    def is_candidate(self, file_path, file_info):
+        """새 경로가 이동된 파일일 가능성이 있는지 확인합니다. (기존 파일과 해시나 이름이 같음)"""
+        return file_info["hash"] in self._paths_by_hash or os.path.basename(file_path) in self._known_names
+
+    def defer(self, rel_dir, result):
+        """이동 후보를 보류합니다. 해시가 겹치지 않는 후보는 결과를 버리고 경로만 남깁니다."""
+        file_path, file_info, _ = result
+        if file_info["hash"] in self._paths_by_hash:
+            self._deferred.append((rel_dir, result))
+        else:
+            self._deferred_names.append((rel_dir, file_path))
+
+    def _vanished_paths(self):
+        return {
+            file_path
+            for file_path in self.snapshot
+            if file_path not in self.seen_paths and not os.path.exists(file_path)
+        }
+
+    async def resolve(self, handler, writer):
+        """보류한 새 경로를 사라진 경로와 맞춰 (rel_dir, result)를 하나씩 돌려줍니다. (비동기 제너레이터)
+
+        짝이 없으면 새 파일로 처리합니다. 경로만 남긴 후보는 여기서 다시 읽으며, 그새 지워진 파일의 result는 None이고
+        읽다가 난 오류는 writer에 기록합니다.
+        """
+        deferred, self._deferred = self._deferred, []
+        deferred_names, self._deferred_names = self._deferred_names, []
+        if not deferred and not deferred_names:
+            return
+
+        vanished = self._vanished_paths()
+        unmatched = []
+        # 1) 내용이 같은 파일 (정확한 이동)
+        for rel_dir, (file_path, file_info, _) in deferred:
+            old_path = next((path for path in self._paths_by_hash.get(file_info["hash"], []) if path in vanished), None)
+            if old_path is None:
+                unmatched.append((rel_dir, file_path, file_info))
+                continue
+            vanished.discard(old_path)
+            result = await build_rename_result(
+                handler, writer, old_path, file_path, file_info, self.snapshot[old_path]["hash"]
+            )
+            handler.stats.count("files_renamed")
+            yield rel_dir, result
+
+        # 2) 같은 이름으로 옮겨지면서 조금 바뀐 파일
+        vanished_by_name = {}
+        for old_path in sorted(vanished):
+            vanished_by_name.setdefault(os.path.basename(old_path), []).append(old_path)
+        reloaded = [(rel_dir, file_path, None) for rel_dir, file_path in deferred_names]
+        for rel_dir, file_path, file_info in unmatched + reloaded:
+            if file_info is None:
+                try:
+                    file_info = await handler.get_file_info(file_path)
+                except Exception as e:
+                    writer.add_error(file_path, "check", e)
+                    yield rel_dir, None
+                    continue
+                if file_info is None:
+                    yield rel_dir, None
+                    continue
+                if file_info["skip_reason"]:
+                    yield rel_dir, (file_path, file_info, None)
+                    continue
+            result = None
+            for old_path in vanished_by_name.get(os.path.basename(file_path), []):
+                result = await build_rename_result(handler, writer, old_path, file_path, file_info)
+                if result:
+                    vanished_by_name[os.path.basename(file_path)].remove(old_path)
+                    break
+            if result is None:
+                # 이동이 아니면 원래대로 새 파일 전체를 diff로 기록
+                result = (file_path, file_info, handler._new_file_diff(file_info))
+            else:
+                handler.stats.count("files_renamed")
+            yield rel_dir, result
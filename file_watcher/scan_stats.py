@@ -0,0 +1,101 @@
+# file_watcher/scan_stats.py
+
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone, timedelta
+
+from config.settings import Config
+
+KST = timezone(timedelta(hours=9))
+
+
+def verbose(message):
+    """파일 단위처럼 자주 호출되는 로그는 SCAN_VERBOSE가 켜져 있을 때만 출력합니다."""
+    if Config.SCAN_VERBOSE:
+        print(message)
+
+
+class ScanStats:
+    """스캔 한 번의 단계별 소요 시간과 카운터를 모읍니다.
+
+    단계(phase) 시간은 누적값이라 reader 워커처럼 동시에 실행되는 구간은 워커 수만큼 합산됩니다.
+    (wall time은 duration_seconds를 보면 됩니다.)
+    """
+
+    def __init__(self, root=None):
+        self.root = root
+        self.status = None
+        self.started_at = datetime.now(KST)
+        self._started = time.perf_counter()
+        self.duration_seconds = None
+        self.phase_seconds = {}
+        self.counters = {}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def merge(self, counters, phase_seconds):
+        """다른 프로세스(샤드 워커)에서 모은 카운터와 단계 시간을 더합니다."""
+        for name, amount in counters.items():
+            self.count(name, amount)
+        for name, seconds in phase_seconds.items():
+            self.add_time(name, seconds)
+
+    def finish(self, status):
+        self.status = status
+        self.duration_seconds = time.perf_counter() - self._started
+
+    def to_dict(self):
+        return {
+            "root": self.root,
+            "status": self.status,
+            "started_at": self.started_at.isoformat(),
+            "duration_seconds": round(self.duration_seconds or 0.0, 4),
+            "phase_seconds": {name: round(seconds, 4) for name, seconds in sorted(self.phase_seconds.items())},
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def summary(self):
+        """스캔이 끝났을 때 한 줄로 출력할 요약입니다."""
+        counters = self.counters
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in sorted(self.phase_seconds.items()))
+        return (
+            f"Scan {self.status}: {counters.get('files_seen', 0)} seen, {counters.get('files_read', 0)} read "
+            f"({counters.get('bytes_read', 0) / (1024 * 1024):.1f} MB), "
+            f"{counters.get('files_unchanged', 0) + counters.get('files_checkpointed', 0)} skipped, "
+            f"{counters.get('files_rejected', 0)} rejected, {counters.get('errors', 0)} errors "
+            f"in {self.duration_seconds or 0.0:.2f}s [{phases}]"
+        )
+
+
+def write_scan_report(stats_list, report_path=None):
+    """스캔 결과를 JSON 파일로 저장합니다. (기본 위치: file_history.db 옆의 scan_report.json)"""
+    report_path = report_path or Config.SCAN_REPORT_PATH
+    report = {
+        "generated_at": datetime.now(KST).isoformat(),
+        "db_path": str(Config.DB_PATH),
+        "scans": [stats.to_dict() for stats in stats_list],
+    }
+    temp_path = f"{report_path}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, report_path)
+    except OSError as e:
+        # 리포트는 진단용이므로 저장에 실패해도 스캔 결과에는 영향을 주지 않음
+        print(f"Error writing scan report {report_path}: {e}")
+        return
+    print(f"Scan report written to {report_path}")
@@ -1,10 +1,27 @@
 # file_watcher/state_manager.py
 
-import sqlite3
+import json
+import time
 from datetime import datetime, timezone, timedelta
+import asyncio
 import os
 from config.settings import Config
-import aiosqlite
+from file_watcher import (
+    blob_store,
+    db_connection,
+    file_filter,
+    hashing,
+    history,
+    hunk_classifier,
+    hunks,
+    symbols,
+    text_codec,
+)
+from file_watcher.diff_engine import DiffTooExpensive, compute_opcodes
+from file_watcher.scan_stats import ScanStats, verbose
+
+# IN (...)에 한 번에 넣는 값 개수 (SQLite 바인딩 변수 제한보다 충분히 작게)
+_SQL_IN_BATCH_SIZE = 500
 
 
 class DatabaseManager:
@@ -21,30 +38,145 @@ class DatabaseManager:
             print("Database initialized successfully")
 
     async def _setup_database(self):
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("PRAGMA foreign_keys = ON;")
+        async with db_connection.connect_async(self.db_path) as conn:
             await conn.executescript("""
                 CREATE TABLE IF NOT EXISTS files (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     file_path TEXT NOT NULL UNIQUE,
                     file_hash TEXT NOT NULL,
-                    content BLOB,
+                    content BLOB,  -- 이전 버전 호환용 (현재 내용은 blobs 테이블에 저장)
                     created_at TEXT DEFAULT (datetime('now')),
                     modified_at TEXT DEFAULT (datetime('now')),
-                    last_updated TEXT DEFAULT (datetime('now'))
+                    last_updated TEXT DEFAULT (datetime('now')),
+                    last_updated_ts INTEGER
+                );
+
+                -- 파일 내용은 해시를 키로 압축해서 한 번만 저장 (같은 내용의 파일끼리 공유)
+                -- encoding은 스캔 때 감지한 원본 인코딩, utf8_data는 원본이 UTF-8이 아닐 때만 저장하는 UTF-8 텍스트
+                CREATE TABLE IF NOT EXISTS blobs (
+                    hash TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    raw_size INTEGER NOT NULL,
+                    data BLOB NOT NULL,
+                    encoding TEXT,
+                    utf8_codec TEXT,
+                    utf8_data BLOB
                 );
 
+                -- 변경 이력은 append-only: 같은 파일의 변경도 매번 새 행으로 남김
                 CREATE TABLE IF NOT EXISTS file_changes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    file_id INTEGER UNIQUE,
+                    file_id INTEGER NOT NULL,
                     diff BLOB NOT NULL,
                     change_time TEXT DEFAULT (datetime('now')),
+                    change_ts INTEGER,
+                    version INTEGER,
+                    change_type TEXT NOT NULL DEFAULT 'modify',
+                    old_path TEXT,
+                    -- 모든 hunk가 공백/주석/순서만 바뀐 변경이면 그 종류 (whitespace, comment, reorder, formatting)
+                    noise_kind TEXT,
+                    -- analyze_changed_symbols가 이 변경을 처리했는지 여부
+                    symbols_analyzed INTEGER NOT NULL DEFAULT 0,
                     FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
                 );
 
+                -- 변경마다 파싱된 hunk (줄 수 집계나 심볼 단위 선택을 diff 텍스트 대신 SQL로 처리)
+                CREATE TABLE IF NOT EXISTS diff_hunks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    change_id INTEGER NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    hunk_index INTEGER NOT NULL,
+                    old_start INTEGER NOT NULL,
+                    old_count INTEGER NOT NULL,
+                    new_start INTEGER NOT NULL,
+                    new_count INTEGER NOT NULL,
+                    added INTEGER NOT NULL,
+                    removed INTEGER NOT NULL,
+                    noise_kind TEXT,
+                    symbol TEXT,
+                    language TEXT,
+                    FOREIGN KEY (change_id) REFERENCES file_changes (id) ON DELETE CASCADE,
+                    FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
+                );
+                CREATE INDEX IF NOT EXISTS idx_diff_hunks_change_id ON diff_hunks (change_id);
+                CREATE INDEX IF NOT EXISTS idx_diff_hunks_file_id ON diff_hunks (file_id);
+
+                -- 파일 내용(해시)별로 파싱한 함수/클래스 목록 캐시 (같은 내용은 다시 파싱하지 않음)
+                CREATE TABLE IF NOT EXISTS symbol_index (
+                    file_hash TEXT PRIMARY KEY,
+                    language TEXT NOT NULL,
+                    line_count INTEGER NOT NULL,
+                    symbols TEXT NOT NULL,
+                    parser_version INTEGER NOT NULL DEFAULT 0
+                );
+
+                -- 변경마다 바뀐 함수/클래스 (file_hash는 변경 직후 내용, 줄 범위는 그 내용 기준)
+                CREATE TABLE IF NOT EXISTS changed_symbols (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    change_id INTEGER NOT NULL,
+                    file_id INTEGER NOT NULL,
+                    symbol TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    start_line INTEGER NOT NULL,
+                    end_line INTEGER NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    FOREIGN KEY (change_id) REFERENCES file_changes (id) ON DELETE CASCADE,
+                    FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
+                );
+                CREATE INDEX IF NOT EXISTS idx_changed_symbols_change_id ON changed_symbols (change_id);
+
+                -- 파일 버전 이력 (역방향 delta 체인 + 주기적 snapshot, file_watcher/history.py 참고)
+                CREATE TABLE IF NOT EXISTS file_versions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id INTEGER NOT NULL,
+                    version INTEGER NOT NULL,
+                    file_hash TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    delta_codec TEXT,
+                    delta BLOB,
+                    created_at TEXT,
+                    created_ts INTEGER,
+                    UNIQUE (file_id, version),
+                    FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
+                );
+
+                -- 스캔 실행 기록: 끝나지 않은(running/failed) 실행은 다음 스캔에서 이어서 진행
+                CREATE TABLE IF NOT EXISTS scan_runs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    root TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    files_queued INTEGER DEFAULT 0,
+                    files_skipped INTEGER DEFAULT 0,
+                    error_count INTEGER DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_scan_runs_root ON scan_runs (root, id);
+
+                -- 모든 파일이 저장된 디렉토리 (루트 기준 상대 경로, 루트 자신은 '')
+                CREATE TABLE IF NOT EXISTS scan_checkpoints (
+                    run_id INTEGER NOT NULL,
+                    directory TEXT NOT NULL,
+                    completed_at TEXT,
+                    PRIMARY KEY (run_id, directory),
+                    FOREIGN KEY (run_id) REFERENCES scan_runs (id) ON DELETE CASCADE
+                );
+
+                -- 스캔 중 파일 단위로 발생한 오류 (해당 파일만 건너뛰고 스캔은 계속)
+                CREATE TABLE IF NOT EXISTS scan_errors (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id INTEGER,
+                    file_path TEXT,
+                    stage TEXT,
+                    error TEXT,
+                    occurred_at TEXT,
+                    FOREIGN KEY (run_id) REFERENCES scan_runs (id) ON DELETE CASCADE
+                );
+
                 CREATE TABLE IF NOT EXISTS topics (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     date TEXT,
+                    date_ts INTEGER,
                     raw_topic_text TEXT
                 );
 
@@ -67,167 +199,954 @@ class DatabaseManager:
                 );
             """)
             # user_learning_progress, user_habits 테이블 제거했음
+            await self._migrate_files_table(conn)
+            await self._migrate_blobs_table(conn)
+            await self._migrate_symbol_index(conn)
+            await self._migrate_legacy_content(conn)
+            await self._migrate_file_changes_table(conn)
+            await self._migrate_timestamps(conn)
+            await conn.commit()
+
+    async def _migrate_files_table(self, conn):
+        """기존 files 테이블에 증분 스캔용 stat 컬럼(size, mtime_ns, inode)과 사전 필터 결과(skip_reason),
+        작업 트리에서 지워진 시각(deleted_at, deleted_ts) 컬럼을 추가합니다.
+
+        지워진 파일은 행을 남겨 두고 deleted_ts만 채우므로 변경 이력이 그대로 유지되며, 행은 cleanup_old_data가 보관 기간 뒤에 지웁니다.
+        """
+        cursor = await conn.execute("PRAGMA table_info(files)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        new_columns = (
+            ("size", "INTEGER"),
+            ("mtime_ns", "INTEGER"),
+            ("inode", "INTEGER"),
+            ("skip_reason", "TEXT"),
+            ("deleted_at", "TEXT"),
+            ("deleted_ts", "INTEGER"),
+        )
+        for column, column_type in new_columns:
+            if column not in columns:
+                await conn.execute(f"ALTER TABLE files ADD COLUMN {column} {column_type}")
+
+    async def _migrate_blobs_table(self, conn):
+        """기존 blobs 테이블에 원본 인코딩(encoding)과 UTF-8 텍스트(utf8_codec, utf8_data) 컬럼을 추가합니다.
+
+        이전에 저장된 blob은 encoding이 NULL이며, 읽을 때 인코딩을 다시 감지합니다.
+        """
+        cursor = await conn.execute("PRAGMA table_info(blobs)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        for column, column_type in (("encoding", "TEXT"), ("utf8_codec", "TEXT"), ("utf8_data", "BLOB")):
+            if column not in columns:
+                await conn.execute(f"ALTER TABLE blobs ADD COLUMN {column} {column_type}")
+
+    async def _migrate_symbol_index(self, conn):
+        """기존 symbol_index 테이블에 파서 버전(parser_version) 컬럼을 추가합니다. 이전 캐시는 0이라 다음 조회 때 다시 파싱합니다."""
+        cursor = await conn.execute("PRAGMA table_info(symbol_index)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if "parser_version" not in columns:
+            await conn.execute("ALTER TABLE symbol_index ADD COLUMN parser_version INTEGER NOT NULL DEFAULT 0")
+
+    async def _migrate_file_changes_table(self, conn):
+        """file_id UNIQUE 제약이 있던 이전 file_changes 테이블을 append-only 구조로 다시 만들고,
+        변경 종류(change_type: add/modify/rename), 이동 전 경로(old_path), 형식 변경 분류(noise_kind),
+        심볼 분석 여부(symbols_analyzed) 컬럼을 추가합니다.
+        """
+        cursor = await conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'file_changes'")
+        table_sql = (await cursor.fetchone())[0]
+        if "file_id INTEGER UNIQUE" in table_sql:
+            await conn.executescript("""
+                CREATE TABLE file_changes_new (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    file_id INTEGER NOT NULL,
+                    diff BLOB NOT NULL,
+                    change_time TEXT DEFAULT (datetime('now')),
+                    version INTEGER,
+                    FOREIGN KEY (file_id) REFERENCES files (id) ON DELETE CASCADE
+                );
+                INSERT INTO file_changes_new (id, file_id, diff, change_time)
+                    SELECT id, file_id, diff, change_time FROM file_changes;
+                DROP TABLE file_changes;
+                ALTER TABLE file_changes_new RENAME TO file_changes;
+            """)
+            print("Migrated file_changes table to append-only history")
+        cursor = await conn.execute("PRAGMA table_info(file_changes)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if "change_type" not in columns:
+            await conn.execute("ALTER TABLE file_changes ADD COLUMN change_type TEXT NOT NULL DEFAULT 'modify'")
+        if "old_path" not in columns:
+            await conn.execute("ALTER TABLE file_changes ADD COLUMN old_path TEXT")
+        if "noise_kind" not in columns:
+            await conn.execute("ALTER TABLE file_changes ADD COLUMN noise_kind TEXT")
+        if "symbols_analyzed" not in columns:
+            await conn.execute("ALTER TABLE file_changes ADD COLUMN symbols_analyzed INTEGER NOT NULL DEFAULT 0")
+        await conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_file_changes_unanalyzed ON file_changes (id) WHERE symbols_analyzed = 0"
+        )
+        await conn.execute("CREATE INDEX IF NOT EXISTS idx_file_changes_file_id ON file_changes (file_id)")
+
+    async def _migrate_timestamps(self, conn):
+        """시간 범위로 조회하는 컬럼마다 정수 epoch(초) 컬럼과 인덱스를 추가하고 기존 값으로 채웁니다.
+
+        텍스트 시각은 KST isoformat(오프셋 포함)과 SQLite 기본값 datetime('now')(UTC)가 섞여 있어 문자열 비교가 맞지 않으므로,
+        조회와 정리는 모두 epoch 컬럼으로 합니다. topics.date는 오프셋 없는 로컬 시각이라 'utc'로 변환합니다.
+        """
+        timestamp_columns = (
+            ("files", "last_updated", "last_updated_ts", ""),
+            ("file_changes", "change_time", "change_ts", ""),
+            ("file_versions", "created_at", "created_ts", ""),
+            ("topics", "date", "date_ts", ", 'utc'"),
+        )
+        for table, text_column, epoch_column, modifier in timestamp_columns:
+            cursor = await conn.execute(f"PRAGMA table_info({table})")
+            if epoch_column in {row[1] for row in await cursor.fetchall()}:
+                continue
+            await conn.execute(f"ALTER TABLE {table} ADD COLUMN {epoch_column} INTEGER")
+            cursor = await conn.execute(
+                f"""
+                UPDATE {table} SET {epoch_column} = CAST(strftime('%s', {text_column}{modifier}) AS INTEGER)
+                WHERE {text_column} IS NOT NULL
+                """
+            )
+            if cursor.rowcount:
+                print(f"Backfilled {cursor.rowcount} {table}.{epoch_column} values")
+        for table, _, epoch_column, _ in timestamp_columns:
+            await conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{epoch_column} ON {table} ({epoch_column})")
+
+    async def _migrate_legacy_content(self, conn, chunk_size=500):
+        """files.content에 원본 그대로 남아 있는 내용을 압축해서 blobs 테이블로 옮깁니다."""
+        migrated = 0
+        while True:
+            cursor = await conn.execute(
+                "SELECT id, file_hash, content FROM files WHERE content IS NOT NULL LIMIT ?", (chunk_size,)
+            )
+            rows = await cursor.fetchall()
+            if not rows:
+                break
+            blob_rows = await asyncio.to_thread(
+                lambda: [(file_hash, *blob_store.compress(content), len(content)) for _, file_hash, content in rows]
+            )
+            await conn.executemany(
+                "INSERT OR IGNORE INTO blobs (hash, codec, data, raw_size) VALUES (?, ?, ?, ?)", blob_rows
+            )
+            await conn.executemany("UPDATE files SET content = NULL WHERE id = ?", [(row[0],) for row in rows])
+            await conn.commit()
+            migrated += len(rows)
+        if migrated:
+            print(f"Moved {migrated} file contents into compressed blob storage")
 
     def _get_current_time(self):
         """현재 KST 시간을 ISO 형식 문자열로 반환합니다."""
         return datetime.now(self.KST).isoformat()
 
+    @staticmethod
+    def _get_current_epoch():
+        """현재 시각의 epoch 초 (시간 범위 조회용 *_ts 컬럼 값)"""
+        return int(time.time())
+
     async def cleanup_old_data(self):
-        """오래된 데이터를 정리합니다."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("PRAGMA foreign_keys = ON;")
-            current_time = self._get_current_time()
-            retention_period = Config.DATA_RETENTION_PERIOD
-            cutoff_time = (datetime.now(self.KST) - retention_period).isoformat()
+        """오래된 데이터를 정리합니다.
 
-            print(f"Current KST time: {current_time}")
-            print(f"Data retention cutoff time: {cutoff_time}")
+        보관 기간이 지난 파일의 존재 여부는 쓰기 트랜잭션 밖에서 CLEANUP_EXISTS_BATCH_SIZE개씩 스레드로 나눠 확인하고,
+        결과를 임시 테이블에 넣어 UPDATE/DELETE 한 번씩으로 반영합니다.
+        CLEANUP_INCREMENTAL_VACUUM이 켜져 있으면 정리 후 빈 페이지를 파일 시스템에 돌려줍니다.
+        정리한 행 수와 확보한 바이트 수를 dict로 반환합니다. (실패하면 None)
+        """
+        current_time = self._get_current_time()
+        current_ts = self._get_current_epoch()
+        retention_period = Config.DATA_RETENTION_PERIOD
+        cutoff_time = (datetime.now(self.KST) - retention_period).isoformat()
+        cutoff_ts = current_ts - int(retention_period.total_seconds())
+
+        print(f"Current KST time: {current_time}")
+        print(f"Data retention cutoff time: {cutoff_time}")
+
+        try:
+            async with db_connection.connect_async(self.db_path) as conn:
+                cursor = await conn.execute("SELECT id, file_path FROM files WHERE last_updated_ts < ?", (cutoff_ts,))
+                outdated_files = await cursor.fetchall()
+            # 2. retention period가 지난 files의 존재 여부 확인 (DB 잠금 없이 병렬로)
+            batch_size = max(1, Config.CLEANUP_EXISTS_BATCH_SIZE)
+            batches = [outdated_files[start : start + batch_size] for start in range(0, len(outdated_files), batch_size)]
+            checked = [
+                row
+                for batch_rows in await asyncio.gather(*(asyncio.to_thread(self._check_exists, batch) for batch in batches))
+                for row in batch_rows
+            ]
+
+            async with db_connection.connect_async(self.db_path) as conn:
+                page_size, page_count, freelist_before = await self._page_stats(conn)
 
-            try:
                 # 1. 오래된 file_changes 삭제
-                cursor = await conn.execute("DELETE FROM file_changes WHERE change_time < ?", (cutoff_time,))
+                cursor = await conn.execute("DELETE FROM file_changes WHERE change_ts < ?", (cutoff_ts,))
                 deleted_changes = cursor.rowcount
                 print(f"Deleted {deleted_changes} old file_changes entries")
 
-                # 2. retention period가 지난 files 처리
+                # 2. 존재하는 파일은 last_updated만 갱신하고, 사라진 파일은 files에서 삭제 (이력은 CASCADE로 함께 삭제)
+                #    스캔에서 지워진 것으로 기록된 파일도 기록 시각(last_updated_ts)부터 보관 기간이 지나면 여기서 삭제됨
+                await conn.execute(
+                    "CREATE TEMP TABLE IF NOT EXISTS cleanup_files (id INTEGER PRIMARY KEY, present INTEGER NOT NULL)"
+                )
+                await conn.execute("DELETE FROM temp.cleanup_files")
+                await conn.executemany("INSERT INTO temp.cleanup_files (id, present) VALUES (?, ?)", checked)
                 cursor = await conn.execute(
                     """
-                    SELECT id, file_path, last_updated 
-                    FROM files 
-                    WHERE last_updated < ?
+                    UPDATE files SET last_updated = ?, last_updated_ts = ?
+                    WHERE id IN (SELECT id FROM temp.cleanup_files WHERE present = 1)
                     """,
-                    (cutoff_time,),
+                    (current_time, current_ts),
                 )
-                outdated_files = await cursor.fetchall()
+                touched_files = cursor.rowcount
+                cursor = await conn.execute(
+                    "DELETE FROM files WHERE id IN (SELECT id FROM temp.cleanup_files WHERE present = 0)"
+                )
+                deleted_files = cursor.rowcount
+                await conn.execute("DELETE FROM temp.cleanup_files")
+                print(f"Updated last_updated for {touched_files} files, deleted {deleted_files} non-existent files")
 
-                for file_id, file_path, last_updated in outdated_files:
-                    if os.path.exists(file_path):
-                        # 파일이 존재하는 경우 last_updated만 업데이트
-                        await conn.execute(
-                            """
-                            UPDATE files 
-                            SET last_updated = ?
-                            WHERE id = ?
-                            """,
-                            (current_time, file_id),
-                        )
-                        print(f"Updated last_updated for file: {file_path}")
-                    else:
-                        # 파일이 존재하지 않는 경우 files 테이블에서 삭제
-                        await conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
-                        print(f"Deleted record for non-existent file: {file_path}")
+                # 3. 더 이상 어떤 파일이나 snapshot 버전도 참조하지 않는 blob 삭제
+                cursor = await conn.execute(
+                    """
+                    DELETE FROM blobs
+                    WHERE hash NOT IN (SELECT file_hash FROM files)
+                      AND hash NOT IN (SELECT file_hash FROM file_versions WHERE kind = ?)
+                    """,
+                    (history.SNAPSHOT,),
+                )
+                deleted_blobs = cursor.rowcount
+                print(f"Deleted {deleted_blobs} unreferenced blobs")
+
+                # 4. 삭제된 내용의 심볼 캐시 삭제
+                await conn.execute("DELETE FROM symbol_index WHERE file_hash NOT IN (SELECT hash FROM blobs)")
 
                 await conn.commit()
-                print("Cleanup completed successfully")
+                _, _, freelist_after = await self._page_stats(conn)
+                reclaimed_bytes = max(freelist_after - freelist_before, 0) * page_size
 
-            except Exception as e:
-                print(f"Error during cleanup: {str(e)}")
-                import traceback
+                vacuumed_bytes = 0
+                if Config.CLEANUP_INCREMENTAL_VACUUM:
+                    vacuumed_bytes = page_count * page_size - await self._incremental_vacuum(conn)
+            print(f"Cleanup completed successfully: {reclaimed_bytes} bytes freed, {vacuumed_bytes} bytes returned to disk")
+            return {
+                "deleted_changes": deleted_changes,
+                "touched_files": touched_files,
+                "deleted_files": deleted_files,
+                "deleted_blobs": deleted_blobs,
+                "reclaimed_bytes": reclaimed_bytes,
+                "vacuumed_bytes": vacuumed_bytes,
+            }
 
-                traceback.print_exc()
+        except Exception as e:
+            print(f"Error during cleanup: {str(e)}")
+            import traceback
+
+            traceback.print_exc()
+            return None
+
+    @staticmethod
+    def _check_exists(rows):
+        """(id, file_path) 목록을 (id, 존재 여부) 목록으로 바꿉니다. 스레드에서 실행됩니다."""
+        return [(file_id, int(os.path.exists(file_path))) for file_id, file_path in rows]
+
+    @staticmethod
+    async def _page_stats(conn):
+        """(page_size, page_count, freelist_count)"""
+        stats = []
+        for pragma in ("page_size", "page_count", "freelist_count"):
+            cursor = await conn.execute(f"PRAGMA {pragma}")
+            stats.append((await cursor.fetchone())[0])
+        return stats
+
+    async def _incremental_vacuum(self, conn):
+        """빈 페이지를 파일 시스템에 돌려주고, 정리 후 DB 크기(바이트)를 반환합니다.
+
+        auto_vacuum이 INCREMENTAL이 아닌 DB는 처음 한 번 전체 VACUUM으로 전환합니다. (DB 크기에 비례해 오래 걸릴 수 있음)
+        """
+        cursor = await conn.execute("PRAGMA auto_vacuum")
+        if (await cursor.fetchone())[0] != 2:
+            print("Switching database to incremental auto_vacuum (one-time full VACUUM)")
+            await conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            await conn.execute("VACUUM")
+        cursor = await conn.execute("PRAGMA incremental_vacuum")
+        # 결과를 끝까지 읽어야 모든 빈 페이지가 정리됨
+        await cursor.fetchall()
+        page_size, page_count, _ = await self._page_stats(conn)
+        return page_size * page_count
+
+    @staticmethod
+    def _path_prefix_range(directory):
+        """directory 하위 경로를 file_path UNIQUE 인덱스로 범위 검색하기 위한 (하한, 상한)을 반환합니다."""
+        prefix = os.path.join(os.path.abspath(directory), "")
+        return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+    async def get_directory_snapshot(self, directory, include_content=True):
+        """directory 하위에 기록된 파일들의 해시, stat, (선택) 내용을 한 번의 쿼리로 가져옵니다. 지워진 것으로 기록된 파일은 뺍니다."""
+        lower, upper = self._path_prefix_range(directory)
+        blob_columns = "b.codec, b.data" if include_content else "NULL, NULL"
+        blob_join = "LEFT JOIN blobs b ON b.hash = f.file_hash" if include_content else ""
+        async with db_connection.connect_async(self.db_path) as conn:
+            cursor = await conn.execute(
+                f"""
+                SELECT f.file_path, f.file_hash, f.size, f.mtime_ns, f.inode, {blob_columns}
+                FROM files f {blob_join}
+                WHERE f.file_path >= ? AND f.file_path < ? AND f.deleted_ts IS NULL
+                """,
+                (lower, upper),
+            )
+            snapshot = {}
+            for file_path, file_hash, size, mtime_ns, inode, codec, data in await cursor.fetchall():
+                snapshot[file_path] = {
+                    "hash": file_hash,
+                    "stat": (size, mtime_ns, inode) if mtime_ns is not None else None,
+                    "content": blob_store.decompress(codec, data),
+                }
+            return snapshot
+
+    def batch_writer(self, batch_size=None, run_id=None, stats=None):
+        """하나의 커넥션으로 변경사항을 묶어서 저장하는 FileChangeBatchWriter를 생성합니다.
+
+        run_id(start_scan_run 결과)를 주면 디렉토리 체크포인트와 파일 오류를 변경사항과 같은 트랜잭션에 기록합니다.
+        stats(ScanStats)를 주면 DB 조회/저장 시간과 저장한 행 수를 그곳에 기록합니다.
+        """
+        return FileChangeBatchWriter(self, batch_size, run_id, stats)
+
+    async def start_scan_run(self, root):
+        """root의 스캔 실행을 시작합니다.
+
+        직전 실행이 끝나지 않았다면(중단 또는 실패) 그 실행을 이어서 진행하며, 이미 체크포인트가 기록된 디렉토리 집합을 함께 반환합니다.
+        반환값은 (run_id, 완료된 디렉토리 집합)입니다.
+        """
+        root = os.path.abspath(root)
+        current_time = self._get_current_time()
+        async with db_connection.connect_async(self.db_path) as conn:
+            cursor = await conn.execute(
+                "SELECT id, status FROM scan_runs WHERE root = ? ORDER BY id DESC LIMIT 1", (root,)
+            )
+            latest = await cursor.fetchone()
+            if latest and latest[1] != "completed":
+                run_id = latest[0]
+                cursor = await conn.execute("SELECT directory FROM scan_checkpoints WHERE run_id = ?", (run_id,))
+                completed_dirs = {row[0] for row in await cursor.fetchall()}
+                await conn.execute("UPDATE scan_runs SET status = 'running' WHERE id = ?", (run_id,))
+                print(f"Resuming interrupted scan #{run_id} of {root}: {len(completed_dirs)} directories already done")
+            else:
+                cursor = await conn.execute(
+                    "INSERT INTO scan_runs (root, status, started_at) VALUES (?, 'running', ?)", (root, current_time)
+                )
+                run_id = cursor.lastrowid
+                completed_dirs = set()
+            await conn.commit()
+        return run_id, completed_dirs
+
+    async def finish_scan_run(self, run_id, status, files_queued=0, files_skipped=0):
+        """스캔 실행을 마칩니다. 완료된 실행은 더 이상 필요 없는 체크포인트를 지웁니다."""
+        async with db_connection.connect_async(self.db_path) as conn:
+            await conn.execute(
+                """
+                UPDATE scan_runs
+                SET status = ?, finished_at = ?,
+                    files_queued = files_queued + ?, files_skipped = files_skipped + ?,
+                    error_count = (SELECT COUNT(*) FROM scan_errors WHERE run_id = ?)
+                WHERE id = ?
+                """,
+                (status, self._get_current_time(), files_queued, files_skipped, run_id, run_id),
+            )
+            if status == "completed":
+                await conn.execute("DELETE FROM scan_checkpoints WHERE run_id = ?", (run_id,))
+            await conn.commit()
+
+    async def get_scan_errors(self, run_id):
+        """스캔 실행 중 기록된 파일 오류 목록을 반환합니다."""
+        async with db_connection.connect_async(self.db_path) as conn:
+            cursor = await conn.execute(
+                "SELECT file_path, stage, error, occurred_at FROM scan_errors WHERE run_id = ? ORDER BY id", (run_id,)
+            )
+            return [
+                {"file_path": file_path, "stage": stage, "error": error, "occurred_at": occurred_at}
+                for file_path, stage, error, occurred_at in await cursor.fetchall()
+            ]
 
     async def save_file_change(self, file_path, file_info, diff):
         """파일 변경사항과 diff를 데이터베이스에 저장합니다."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("PRAGMA foreign_keys = ON;")
+        async with self.batch_writer(batch_size=1) as writer:
+            await writer.add(file_path, file_info, diff)
+
+    async def get_file_info(self, file_path):
+        """파일의 현재 정보를 가져옵니다. 지워진 것으로 기록된 파일은 None입니다. (다시 생기면 새 파일로 처리)"""
+        async with db_connection.connect_async(self.db_path) as conn:
+            return await self._fetch_file_info(conn, file_path)
+
+    @staticmethod
+    async def _fetch_file_info(conn, file_path):
+        cursor = await conn.execute(
+            """
+            SELECT f.file_hash, b.codec, b.data, b.encoding, b.utf8_codec, b.utf8_data
+            FROM files f
+            LEFT JOIN blobs b ON b.hash = f.file_hash
+            WHERE f.file_path = ? AND f.deleted_ts IS NULL
+            """,
+            (file_path,),
+        )
+        result = await cursor.fetchone()
+        if result:
+            file_hash, codec, data, *text_columns = result
+            content = blob_store.decompress(codec, data) or b""
+            full_content = blob_store.load_text(file_hash, codec, data, *text_columns, content=content)
+            return {"content": content, "hash": file_hash, "full_content": full_content}
+        return None
+
+    def iter_recent_changes(self, include_noise=None, page_size=None):
+        """최근 변경사항을 파일 단위의 가벼운 레코드로 한 페이지씩 가져오며 하나씩 반환합니다. (제너레이터)
+
+        레코드에는 경로와 통계, hunk 메타데이터만 있고 diff와 전체 내용 본문은 없습니다.
+        본문이 필요하면 get_change_diff / get_change_content로 해당 레코드만 읽습니다.
+        하루 동안 같은 파일이 여러 번 바뀌었다면 파일당 하나의 레코드로 묶고, 마지막 변경 시각이 최근인 파일부터 반환합니다.
+        이동/이름 변경된 파일은 현재 경로로 묶이며, old_path에 가장 먼저 기록된 이동 전 경로가 들어갑니다.
+        작업 트리에서 지워진 파일은 change_type이 'delete'인 레코드로 나옵니다. (hunk 없이 삭제 머리말 diff만 있음)
+        include_noise가 거짓이면(기본값: SUPPRESS_FORMATTING_CHANGES) 공백/주석/순서만 바뀐 변경과 hunk는 뺍니다.
+        added_lines, removed_lines, symbols는 diff_hunks에서 집계합니다. (hunk 기록이 없는 예전 변경은 diff 텍스트로 셈)
+        """
+        if include_noise is None:
+            include_noise = not Config.SUPPRESS_FORMATTING_CHANGES
+        page_size = page_size or Config.RECENT_CHANGES_PAGE_SIZE
+        since_ts = self._get_current_epoch() - 24 * 60 * 60
+        change_filter = "" if include_noise else "AND fc.noise_kind IS NULL"
+        # (마지막 변경 시각, 마지막 변경 id) 키셋 페이지네이션: 페이지마다 change_ts 인덱스 범위만 다시 읽음
+        last_key = None
+        while True:
+            conn = db_connection.get_connection(self.db_path)
             try:
-                # 파일 존재 여부 확인
-                cursor = await conn.execute("SELECT id, file_hash FROM files WHERE file_path = ?", (file_path,))
-                existing = await cursor.fetchone()
-                current_time = self._get_current_time()
-
-                if existing:
-                    file_id, old_hash = existing
-                    new_hash = file_info["hash"]
-
-                    if old_hash != new_hash:
-                        # 먼저 변경사항 저장
-                        await self._update_file_changes(conn, file_id, diff, current_time)
-
-                        # 그 다음 files 테이블 업데이트
-                        await conn.execute(
-                            """
-                            UPDATE files 
-                            SET file_hash = ?, content = ?, modified_at = ?, last_updated = ?
-                            WHERE id = ?
-                            """,
-                            (new_hash, file_info["content"], current_time, current_time, file_id),
-                        )
-                else:
-                    # 새로운 파일인 경우 먼저 files 테이블에 기본 레코드 생성
-                    await conn.execute(
-                        """
-                        INSERT INTO files (file_path, file_hash, content, created_at, modified_at, last_updated)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                        """,
-                        (file_path, file_info["hash"], file_info["content"], current_time, current_time, current_time),
-                    )
+                keyset = "" if last_key is None else "HAVING last_ts < ? OR (last_ts = ? AND last_id < ?)"
+                keyset_params = () if last_key is None else (last_key[0], last_key[0], last_key[1])
+                page = conn.execute(f"""
+                    SELECT fc.file_id, MAX(fc.change_ts) AS last_ts, MAX(fc.id) AS last_id
+                    FROM file_changes fc
+                    WHERE fc.change_ts > ? {change_filter}
+                    GROUP BY fc.file_id
+                    {keyset}
+                    ORDER BY last_ts DESC, last_id DESC
+                    LIMIT ?
+                """, (since_ts, *keyset_params, page_size)).fetchall()
+                if not page:
+                    return
+                last_key = page[-1][1:]
+                records = self._load_change_records(conn, [file_id for file_id, _, _ in page], since_ts, include_noise)
+            finally:
+                db_connection.release(conn)
+            yield from records
+            if len(page) < page_size:
+                return
 
-                    # 파일 ID 가져오기
-                    cursor = await conn.execute("SELECT id FROM files WHERE file_path = ?", (file_path,))
-                    file_id = (await cursor.fetchone())[0]
+    def _load_change_records(self, conn, file_ids, since_ts, include_noise):
+        """한 페이지(파일 id 목록)의 변경 행과 hunk 메타데이터를 읽어 파일별 레코드로 묶습니다. (본문 컬럼은 읽지 않음)"""
+        change_filter = "" if include_noise else "AND fc.noise_kind IS NULL"
+        placeholders = ",".join("?" for _ in file_ids)
+        rows = conn.execute(f"""
+            SELECT fc.id, fc.file_id, f.file_path, f.file_hash, fc.change_time, fc.change_type, fc.old_path
+            FROM file_changes fc
+            JOIN files f ON f.id = fc.file_id
+            WHERE fc.file_id IN ({placeholders}) AND fc.change_ts > ? {change_filter}
+            ORDER BY fc.change_ts ASC, fc.id ASC
+        """, (*file_ids, since_ts)).fetchall()
 
-                    # 변경사항 저장
-                    await self._update_file_changes(conn, file_id, diff, current_time)
+        hunks_by_change = {}
+        for change_id, *hunk in conn.execute(f"""
+            SELECT h.change_id, h.old_start, h.old_count, h.new_start, h.new_count, h.added, h.removed,
+                h.noise_kind, h.symbol
+            FROM diff_hunks h
+            JOIN file_changes fc ON fc.id = h.change_id
+            WHERE fc.file_id IN ({placeholders}) AND fc.change_ts > ? {change_filter}
+            ORDER BY h.change_id, h.hunk_index
+        """, (*file_ids, since_ts)):
+            hunks_by_change.setdefault(change_id, []).append(
+                dict(zip(("old_start", "old_count", "new_start", "new_count", "added", "removed", "noise_kind", "symbol"), hunk))
+            )
+        # hunk 기록이 없는 예전 변경만 diff 본문을 읽어 줄 수를 셈
+        legacy_diffs = self._fetch_diffs(conn, [row[0] for row in rows if row[0] not in hunks_by_change], include_noise)
 
-                await conn.commit()
+        records = {}
+        for change_id, file_id, file_path, file_hash, change_time, change_type, old_path in rows:
+            if change_id in hunks_by_change:
+                change_hunks = [
+                    dict(hunk, change_id=change_id)
+                    for hunk in hunks_by_change[change_id]
+                    if include_noise or hunk["noise_kind"] is None
+                ]
+                if not change_hunks:
+                    continue
+                added = sum(hunk["added"] for hunk in change_hunks)
+                removed = sum(hunk["removed"] for hunk in change_hunks)
+            else:
+                diff = legacy_diffs.get(change_id)
+                if not diff:
+                    continue
+                change_hunks = []
+                added, removed = hunks.count_changed_lines(diff)
+            symbols = [hunk["symbol"] for hunk in change_hunks if hunk["symbol"]]
+            record = records.get(file_id)
+            if record is None:
+                records[file_id] = {
+                    "file_path": file_path,
+                    "file_hash": file_hash,
+                    "change_ids": [change_id],
+                    "change_time": change_time,
+                    "change_count": 1,
+                    "change_type": change_type,
+                    "old_path": old_path,
+                    "added_lines": added,
+                    "removed_lines": removed,
+                    "symbols": list(dict.fromkeys(symbols)),
+                    "hunks": change_hunks,
+                }
+            else:
+                record["change_ids"].append(change_id)
+                record["change_time"] = change_time
+                record["change_count"] += 1
+                record["change_type"] = change_type
+                record["old_path"] = record["old_path"] or old_path
+                record["added_lines"] += added
+                record["removed_lines"] += removed
+                record["symbols"].extend(symbol for symbol in symbols if symbol not in record["symbols"])
+                record["hunks"].extend(change_hunks)
+        # 페이지 순서(마지막 변경이 최근인 파일부터)를 유지
+        return [records[file_id] for file_id in file_ids if file_id in records]
 
-            except Exception as e:
-                print(f"Error saving file change: {e}")
+    @staticmethod
+    def _fetch_diffs(conn, change_ids, include_noise):
+        """변경 id별 diff 텍스트를 읽습니다. include_noise가 거짓이면 노이즈 hunk를 뺀 diff를 반환합니다."""
+        diffs = {}
+        for start in range(0, len(change_ids), _SQL_IN_BATCH_SIZE):
+            batch = change_ids[start:start + _SQL_IN_BATCH_SIZE]
+            placeholders = ",".join("?" for _ in batch)
+            for change_id, diff in conn.execute(
+                f"SELECT id, diff FROM file_changes WHERE id IN ({placeholders})", batch
+            ):
+                # diff는 디코딩된 텍스트로 만들어 UTF-8로 저장하므로, 예전 기록의 잘못된 바이트만 대체 문자로 바꿈
+                diff = diff.decode("utf-8", errors="replace")
+                diffs[change_id] = diff if include_noise else hunk_classifier.strip_noise_hunks(diff)
+        return diffs
 
-    async def _update_file_changes(self, conn, file_id, diff, current_time):
-        """file_changes 테이블을 업데이트합니다."""
-        if diff:
-            print(f"Updating file changes with diff of length {len(diff)} bytes")
-            await conn.execute(
+    def get_change_diff(self, change, include_noise=None):
+        """iter_recent_changes 레코드의 diff 본문을 읽어 시간 순서대로 이어 붙여 반환합니다."""
+        if include_noise is None:
+            include_noise = not Config.SUPPRESS_FORMATTING_CHANGES
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            diffs = self._fetch_diffs(conn, change["change_ids"], include_noise)
+        finally:
+            db_connection.release(conn)
+        return "\n\n".join(diffs[change_id] for change_id in change["change_ids"] if diffs.get(change_id))
+
+    def get_change_content(self, change):
+        """iter_recent_changes 레코드 파일의 현재 전체 내용을 텍스트로 반환합니다. (같은 내용은 텍스트 캐시에서 읽음)
+
+        마지막 변경이 삭제인 파일은 빈 문자열입니다.
+        """
+        if change["change_type"] == "delete":
+            return ""
+        file_hash = change["file_hash"]
+        cached = text_codec.cached_text(file_hash)
+        if cached is not None:
+            return cached
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            row = conn.execute(
+                "SELECT codec, data, encoding, utf8_codec, utf8_data FROM blobs WHERE hash = ?", (file_hash,)
+            ).fetchone()
+        finally:
+            db_connection.release(conn)
+        return (blob_store.load_text(file_hash, *row) if row else None) or ""
+
+    def get_recent_changes(self, include_noise=None):
+        """최근 변경사항을 diff와 full_content 본문까지 채운 목록으로 반환합니다.
+
+        모든 본문을 한꺼번에 메모리에 올리므로, 많은 변경을 다룰 때는 iter_recent_changes와
+        get_change_diff / get_change_content로 필요한 레코드의 본문만 읽습니다.
+        """
+        changes = list(self.iter_recent_changes(include_noise))
+        for change in changes:
+            change["diff"] = self.get_change_diff(change, include_noise)
+            change["full_content"] = self.get_change_content(change)
+        return changes
+
+    async def get_file_history(self, file_path):
+        """파일의 저장된 버전 목록을 오래된 순서로 가져옵니다."""
+        async with db_connection.connect_async(self.db_path) as conn:
+            cursor = await conn.execute(
                 """
-                INSERT OR REPLACE INTO file_changes (file_id, diff, change_time)
-                VALUES (?, ?, ?)
+                SELECT v.version, v.file_hash, v.kind, v.created_at
+                FROM file_versions v
+                JOIN files f ON f.id = v.file_id
+                WHERE f.file_path = ?
+                ORDER BY v.version
                 """,
-                (file_id, diff, current_time),
+                (file_path,),
             )
+            return [
+                {"version": version, "hash": file_hash, "kind": kind, "created_at": created_at}
+                for version, file_hash, kind, created_at in await cursor.fetchall()
+            ]
 
-    async def get_file_info(self, file_path):
-        """파일의 현재 정보를 가져옵니다."""
-        async with aiosqlite.connect(self.db_path) as conn:
-            await conn.execute("PRAGMA foreign_keys = ON;")
-            cursor = await conn.execute("SELECT content, file_hash FROM files WHERE file_path = ?", (file_path,))
-            result = await cursor.fetchone()
-            if result:
-                content, file_hash = result
-                return {"content": content, "hash": file_hash, "full_content": content.decode("utf-8", errors="ignore")}
-            return None
+    async def get_file_version(self, file_path, version):
+        """특정 버전의 파일 내용을 복원합니다. 가장 가까운 상위 snapshot에서 역방향 delta를 차례로 적용합니다."""
+        async with db_connection.connect_async(self.db_path) as conn:
+            cursor = await conn.execute(
+                """
+                SELECT v.version, v.file_hash, v.kind, v.delta_codec, v.delta
+                FROM file_versions v
+                JOIN files f ON f.id = v.file_id
+                WHERE f.file_path = ? AND v.version >= ?
+                ORDER BY v.version
+                """,
+                (file_path, version),
+            )
+            rows = await cursor.fetchall()
+            if not rows or rows[0][0] != version:
+                return None
+
+            chain = []
+            for row in rows:
+                chain.append(row)
+                if row[2] == history.SNAPSHOT:
+                    break
+            else:
+                return None
+
+            cursor = await conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (chain[-1][1],))
+            blob = await cursor.fetchone()
+            if blob is None:
+                return None
+
+        return self._apply_chain(blob_store.decompress(*blob), chain[:-1])
+
+    @staticmethod
+    def _apply_chain(snapshot_content, delta_rows):
+        """snapshot 내용에 delta 행들을 최신 -> 과거 순서로 적용합니다."""
+        content = snapshot_content
+        for _, _, _, delta_codec, delta in reversed(delta_rows):
+            content = history.apply_reverse_delta(content, delta_codec, delta)
+        return content
+
+    async def compact_history(self, max_rows=500):
+        """버전 이력을 백그라운드 스레드에서 정리합니다.
+
+        - HISTORY_RETENTION_DAYS가 지난 버전 삭제 (최신 버전은 유지)
+        - diff 비용 때문에 snapshot으로 남았던 중간 버전을, 주기적 snapshot 위치가 아니면 역방향 delta로 변환
+        """
+        return await asyncio.to_thread(self._compact_history_sync, max_rows)
 
-    def get_recent_changes(self):
-        """최근 변경사항 조회"""
-        conn = sqlite3.connect(self.db_path)
+    def _compact_history_sync(self, max_rows):
+        started = time.monotonic()
+        conn = db_connection.get_connection(self.db_path)
         try:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT f.file_path, fc.diff, f.content, fc.change_time
+            deleted = 0
+            if Config.HISTORY_RETENTION_DAYS > 0:
+                cutoff_ts = self._get_current_epoch() - Config.HISTORY_RETENTION_DAYS * 24 * 60 * 60
+                deleted = conn.execute(
+                    """
+                    DELETE FROM file_versions
+                    WHERE created_ts < ?
+                      AND version < (SELECT MAX(version) FROM file_versions latest
+                                     WHERE latest.file_id = file_versions.file_id)
+                    """,
+                    (cutoff_ts,),
+                ).rowcount
+
+            candidates = conn.execute(
+                """
+                SELECT v.id, v.file_id, v.version, v.file_hash
+                FROM file_versions v
+                WHERE v.kind = ?
+                  AND v.version % ? != 0
+                  AND v.version < (SELECT MAX(version) FROM file_versions latest WHERE latest.file_id = v.file_id)
+                LIMIT ?
+                """,
+                (history.SNAPSHOT, Config.HISTORY_SNAPSHOT_INTERVAL, max_rows),
+            ).fetchall()
+
+            converted = 0
+            for version_id, file_id, version, file_hash in candidates:
+                if self._convert_snapshot_to_delta(conn, version_id, file_id, version, file_hash):
+                    converted += 1
+
+            conn.commit()
+            print(
+                f"History compaction: deleted {deleted} expired versions, converted {converted} snapshots to deltas "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+            return {"deleted_versions": deleted, "converted_snapshots": converted}
+        finally:
+            db_connection.release(conn)
+
+    def _convert_snapshot_to_delta(self, conn, version_id, file_id, version, file_hash):
+        """중간 snapshot 하나를 바로 다음 버전 기준의 역방향 delta로 바꿉니다. delta가 더 작을 때만 변환합니다."""
+        blob = conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (file_hash,)).fetchone()
+        rows = conn.execute(
+            """
+            SELECT version, file_hash, kind, delta_codec, delta
+            FROM file_versions
+            WHERE file_id = ? AND version > ?
+            ORDER BY version
+            """,
+            (file_id, version),
+        ).fetchall()
+        chain = []
+        for row in rows:
+            chain.append(row)
+            if row[2] == history.SNAPSHOT:
+                break
+        if blob is None or not chain or chain[-1][2] != history.SNAPSHOT:
+            return False
+
+        newer_blob = conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (chain[-1][1],)).fetchone()
+        if newer_blob is None:
+            return False
+
+        old_content = blob_store.decompress(*blob)
+        newer_content = self._apply_chain(blob_store.decompress(*newer_blob), chain[:-1])
+        old_lines = old_content.splitlines(keepends=True)
+        try:
+            opcodes = compute_opcodes(
+                old_lines,
+                newer_content.splitlines(keepends=True),
+                old_size=len(old_content),
+                new_size=len(newer_content),
+            )
+        except DiffTooExpensive:
+            return False
+
+        delta_codec, delta = history.build_reverse_delta(old_lines, opcodes)
+        if len(delta) >= len(blob[1]):
+            return False
+
+        conn.execute(
+            "UPDATE file_versions SET kind = ?, delta_codec = ?, delta = ? WHERE id = ?",
+            (history.DELTA, delta_codec, delta, version_id),
+        )
+        return True
+
+    async def analyze_changed_symbols(self, max_changes=500):
+        """아직 분석하지 않은 변경의 hunk를 감싸는 함수/클래스를 찾아 changed_symbols에 저장합니다. (백그라운드 스레드)
+
+        Python은 ast, JS/TS는 토큰 기반 파서로 심볼을 추출하며(file_watcher/symbols.py), 결과는 파일 해시별로
+        symbol_index에 캐시되므로 같은 내용의 파일은 다시 파싱하지 않습니다.
+        diff_hunks.symbol도 정의 줄 패턴으로 찾았던 이름 대신 파서가 찾은 전체 이름(Class.method)으로 바꿉니다.
+        """
+        return await asyncio.to_thread(self._analyze_changed_symbols_sync, max_changes)
+
+    def _analyze_changed_symbols_sync(self, max_changes):
+        started = time.monotonic()
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            changes = conn.execute(
+                """
+                SELECT fc.id, fc.file_id, f.file_path, fc.change_type, v.file_hash
                 FROM file_changes fc
                 JOIN files f ON f.id = fc.file_id
-                WHERE fc.change_time > datetime('now', '-1 day')
-                ORDER BY fc.change_time DESC
-            """)
+                LEFT JOIN file_versions v ON v.file_id = fc.file_id AND v.version = fc.version
+                WHERE fc.symbols_analyzed = 0
+                ORDER BY fc.id
+                LIMIT ?
+                """,
+                (max_changes,),
+            ).fetchall()
+
+            symbol_rows, hunk_symbol_rows = [], []
+            parsed = cached = 0
+            index_cache = {}
+            for change_id, file_id, file_path, change_type, file_hash in changes:
+                language = hunks.language_for(file_path)
+                if language not in symbols.SUPPORTED_LANGUAGES or not file_hash:
+                    continue
+                if file_hash not in index_cache:
+                    index_cache[file_hash], was_cached = self._load_symbol_index(
+                        conn, file_hash, language, symbols.jsx_for(file_path)
+                    )
+                    cached += was_cached
+                    parsed += not was_cached
+                if index_cache[file_hash] is None:
+                    continue
+                line_count, file_symbols = index_cache[file_hash]
+
+                if change_type == "add":
+                    # 새 파일은 최상위 정의만 남겨 목록을 짧게 유지
+                    changed = symbols.top_level_symbols(file_symbols)
+                else:
+                    changed = {}
+                    hunk_rows = conn.execute(
+                        "SELECT id, new_start, new_count FROM diff_hunks WHERE change_id = ? ORDER BY hunk_index",
+                        (change_id,),
+                    ).fetchall()
+                    for hunk_id, new_start, new_count in hunk_rows:
+                        start_line, end_line = symbols.changed_line_range(new_start, new_count, line_count)
+                        inner = symbols.symbols_for_range(file_symbols, start_line, end_line)
+                        if inner:
+                            hunk_symbol_rows.append((inner[0][0], hunk_id))
+                        changed.update((symbol[0], symbol) for symbol in inner)
+                    changed = list(changed.values())
+
+                symbol_rows.extend(
+                    (change_id, file_id, qualname, kind, start_line, end_line, file_hash)
+                    for qualname, kind, start_line, end_line, _ in changed
+                )
 
-            changes = []
-            for row in cursor.fetchall():
-                changes.append(
-                    {
-                        "file_path": row[0],
-                        "diff": row[1].decode("utf-8"),
-                        "full_content": row[2].decode("utf-8"),
-                        "change_time": row[3],
-                    }
+            conn.executemany(
+                """
+                INSERT INTO changed_symbols (change_id, file_id, symbol, kind, start_line, end_line, file_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                symbol_rows,
+            )
+            conn.executemany("UPDATE diff_hunks SET symbol = ? WHERE id = ?", hunk_symbol_rows)
+            conn.executemany(
+                "UPDATE file_changes SET symbols_analyzed = 1 WHERE id = ?", [(change[0],) for change in changes]
+            )
+            conn.commit()
+            if changes:
+                print(
+                    f"Symbol analysis: {len(changes)} changes, {len(symbol_rows)} changed symbols "
+                    f"({parsed} files parsed, {cached} cached) in {time.monotonic() - started:.2f}s"
                 )
-            return changes
+            return {"changes": len(changes), "symbols": len(symbol_rows), "parsed": parsed, "cached": cached}
         finally:
-            conn.close()
+            db_connection.release(conn)
+
+    @staticmethod
+    def _load_symbol_index(conn, file_hash, language, jsx=False):
+        """file_hash 내용의 (줄 수, 심볼 목록)과 캐시 적중 여부를 반환합니다. 내용이 없으면 (None, False)입니다.
+
+        이전 버전의 파서로 만든 캐시는 다시 파싱해 덮어씁니다.
+        """
+        row = conn.execute(
+            "SELECT line_count, symbols FROM symbol_index WHERE file_hash = ? AND parser_version >= ?",
+            (file_hash, symbols.PARSER_VERSION),
+        ).fetchone()
+        if row:
+            return (row[0], [tuple(symbol) for symbol in json.loads(row[1])]), True
+
+        blob = conn.execute(
+            "SELECT codec, data, encoding, utf8_codec, utf8_data FROM blobs WHERE hash = ?", (file_hash,)
+        ).fetchone()
+        if blob is None:
+            return None, False
+        text = blob_store.load_text(file_hash, *blob) or ""
+        file_symbols = symbols.extract_symbols(text, language, jsx)
+        line_count = len(text.splitlines())
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO symbol_index (file_hash, language, line_count, symbols, parser_version)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (file_hash, language, line_count, json.dumps(file_symbols), symbols.PARSER_VERSION),
+        )
+        return (line_count, file_symbols), False
+
+    def get_changed_symbols(self, include_source=True):
+        """최근 하루 동안 바뀐 함수/클래스 목록을 파일과 심볼별로 하나씩(가장 최근 변경 기준) 반환합니다.
+
+        include_source가 참이면 심볼의 현재 소스를 source에 담습니다. 현재 내용에서 같은 이름의 심볼을 다시 찾아
+        줄 범위를 맞추며, 이후 삭제된 심볼은 변경 직후 내용에서 잘라냅니다.
+        """
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT f.file_path, cs.symbol, cs.kind, cs.start_line, cs.end_line, cs.file_hash,
+                    fc.change_type, fc.change_time, f.file_hash
+                FROM changed_symbols cs
+                JOIN file_changes fc ON fc.id = cs.change_id
+                JOIN files f ON f.id = cs.file_id
+                WHERE fc.change_ts > ?
+                ORDER BY fc.id ASC
+            """, (self._get_current_epoch() - 24 * 60 * 60,)).fetchall()
+
+            latest = {}
+            current_hashes = {}
+            for file_path, symbol, kind, start_line, end_line, file_hash, change_type, change_time, current in rows:
+                current_hashes[file_path] = current
+                latest[(file_path, symbol)] = {
+                    "file_path": file_path,
+                    "symbol": symbol,
+                    "kind": kind,
+                    "start_line": start_line,
+                    "end_line": end_line,
+                    "file_hash": file_hash,
+                    "change_type": change_type,
+                    "change_time": change_time,
+                }
+
+            if include_source:
+                # 현재 내용의 심볼 위치 (symbol_index 캐시 사용)
+                current_ranges = {}
+                for file_path, current_hash in current_hashes.items():
+                    index, _ = self._load_symbol_index(
+                        conn, current_hash, hunks.language_for(file_path), symbols.jsx_for(file_path)
+                    )
+                    if index is not None:
+                        current_ranges[file_path] = {symbol[0]: symbol[2:4] for symbol in index[1]}
+                conn.commit()
+
+                lines_by_hash = {}
+                for entry in latest.values():
+                    current_range = current_ranges.get(entry["file_path"], {}).get(entry["symbol"])
+                    if current_range:
+                        entry["file_hash"] = current_hashes[entry["file_path"]]
+                        entry["start_line"], entry["end_line"] = current_range
+                    file_hash = entry["file_hash"]
+                    if file_hash not in lines_by_hash:
+                        blob = conn.execute(
+                            "SELECT codec, data, encoding, utf8_codec, utf8_data FROM blobs WHERE hash = ?", (file_hash,)
+                        ).fetchone()
+                        text = blob_store.load_text(file_hash, *blob) if blob else None
+                        lines_by_hash[file_hash] = text_codec.split_lines(text) if text is not None else None
+                    lines = lines_by_hash[file_hash]
+                    entry["source"] = (
+                        "\n".join(lines[entry["start_line"] - 1 : entry["end_line"]]) if lines is not None else None
+                    )
+            return list(latest.values())
+        finally:
+            db_connection.release(conn)
+
+    async def migrate_file_hashes(self, algorithm=None, batch_size=500):
+        """저장된 모든 해시를 HASH_ALGORITHM(또는 algorithm)으로 한 번에 옮깁니다.
+
+        평소에는 스캔이 파일을 비교할 때 한 개씩 옮기지만, 알고리즘을 바꾼 직후 전체를 정리하고 싶을 때 사용합니다.
+        blob은 다시 압축하지 않고 새 해시 키로 복사한 뒤, files와 file_versions의 참조를 바꾸고 이전 키를 지웁니다.
+        """
+        return await asyncio.to_thread(self._migrate_file_hashes_sync, hashing.available_algorithm(algorithm), batch_size)
+
+    def _migrate_file_hashes_sync(self, algorithm, batch_size):
+        started = time.monotonic()
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            stale_hashes = [
+                blob_hash
+                for (blob_hash,) in conn.execute("SELECT hash FROM blobs")
+                if hashing.algorithm_of(blob_hash) != algorithm
+            ]
+            for start in range(0, len(stale_hashes), batch_size):
+                for old_hash in stale_hashes[start : start + batch_size]:
+                    codec, data = conn.execute("SELECT codec, data FROM blobs WHERE hash = ?", (old_hash,)).fetchone()
+                    new_hash = hashing.hash_bytes(blob_store.decompress(codec, data) or b"", algorithm)
+                    conn.execute(
+                        """
+                        INSERT OR IGNORE INTO blobs (hash, codec, raw_size, data, encoding, utf8_codec, utf8_data)
+                        SELECT ?, codec, raw_size, data, encoding, utf8_codec, utf8_data FROM blobs WHERE hash = ?
+                        """,
+                        (new_hash, old_hash),
+                    )
+                    conn.execute("UPDATE files SET file_hash = ? WHERE file_hash = ?", (new_hash, old_hash))
+                    conn.execute("UPDATE file_versions SET file_hash = ? WHERE file_hash = ?", (new_hash, old_hash))
+                    conn.execute("UPDATE changed_symbols SET file_hash = ? WHERE file_hash = ?", (new_hash, old_hash))
+                    conn.execute("UPDATE OR IGNORE symbol_index SET file_hash = ? WHERE file_hash = ?", (new_hash, old_hash))
+                    conn.execute("DELETE FROM blobs WHERE hash = ?", (old_hash,))
+                conn.commit()
+
+            print(f"Migrated {len(stale_hashes)} file hashes to {algorithm} in {time.monotonic() - started:.2f}s")
+            return {"algorithm": algorithm, "migrated": len(stale_hashes)}
+        finally:
+            db_connection.release(conn)
 
     def save_analysis_results(self, result):
         """분석 결과를 저장하고, 최신 N개의 레코드만 유지합니다."""
-        conn = sqlite3.connect(self.db_path)
+        conn = db_connection.get_connection(self.db_path)
         try:
             cursor = conn.cursor()
             # 테이블이 없을 때만 생성
@@ -265,4 +1184,373 @@ class DatabaseManager:
 
             conn.commit()
         finally:
-            conn.close()
+            db_connection.release(conn)
+
+
+class FileChangeBatchWriter:
+    """하나의 비동기 커넥션을 유지하면서 파일 변경사항을 batch_size개씩 한 트랜잭션으로 저장합니다.
+
+    async with로 사용하며, 블록을 빠져나갈 때 남은 변경사항을 flush하고 커넥션을 닫습니다.
+    """
+
+    def __init__(self, db_manager, batch_size=None, run_id=None, stats=None):
+        self.db_manager = db_manager
+        self.batch_size = batch_size or Config.DB_BATCH_SIZE
+        self.run_id = run_id
+        self.stats = stats or ScanStats()
+        self.conn = None
+        self._pending = {}
+        self._pending_checkpoints = []
+        self._pending_errors = []
+        self._pending_deletions = []
+        # 저장에 한 번이라도 실패하면 이후 체크포인트는 기록하지 않음 (다음 스캔에서 다시 처리되도록)
+        self.failed = False
+
+    async def __aenter__(self):
+        self.conn = await db_connection.connect_async(self.db_manager.db_path)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self.flush()
+        finally:
+            await self.conn.close()
+            self.conn = None
+
+    async def get_file_info(self, file_path):
+        """쓰기용 커넥션을 그대로 사용해 파일의 현재 정보를 가져옵니다."""
+        with self.stats.phase("db_read"):
+            return await DatabaseManager._fetch_file_info(self.conn, file_path)
+
+    async def add(self, file_path, file_info, diff):
+        """변경사항을 버퍼에 추가하고, batch_size에 도달하면 flush합니다."""
+        if file_path in self._pending:
+            # 같은 파일의 변경이 한 배치에 두 번 들어오면 순서를 지키기 위해 먼저 저장
+            await self.flush()
+        self._pending[file_path] = (file_info, diff)
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+
+    def add_deletions(self, file_paths):
+        """작업 트리에서 지워진 파일을 기록합니다.
+
+        다음 flush에서 change_type이 'delete'인 변경 행을 추가하고 files 행에 지운 시각을 남깁니다.
+        행과 이전 이력은 그대로 두며, 보관 기간이 지나면 cleanup_old_data가 지웁니다.
+
+        이동으로 처리된 경로는 그 전에 새 경로로 바뀌어 있으므로, 이동 판정이 모두 끝난 뒤에 호출합니다.
+        """
+        self._pending_deletions.extend(file_paths)
+
+    def add_checkpoint(self, directory):
+        """directory의 파일이 모두 add됐음을 기록합니다. 다음 flush에서 그 파일들과 함께(또는 뒤에) 커밋됩니다."""
+        if self.run_id is not None and not self.failed:
+            self._pending_checkpoints.append(directory)
+
+    def add_error(self, file_path, stage, error):
+        """파일 단위 오류를 기록합니다. 오류가 난 파일만 건너뛰고 스캔은 계속됩니다."""
+        print(f"Error ({stage}) {file_path}: {error}")
+        self.stats.count("errors")
+        self._pending_errors.append((self.run_id, file_path, stage, str(error), self.db_manager._get_current_time()))
+
+    async def _save_errors(self):
+        await self.conn.executemany(
+            "INSERT INTO scan_errors (run_id, file_path, stage, error, occurred_at) VALUES (?, ?, ?, ?, ?)",
+            self._pending_errors,
+        )
+        self._pending_errors = []
+
+    async def _compress_new_blobs(self, blob_contents):
+        """아직 저장되지 않은 내용만 골라 스레드에서 압축합니다. 같은 해시의 내용은 한 번만 저장됩니다.
+
+        blob_contents는 해시 -> file_info이며, 원본이 UTF-8이 아니면 스캔 때 디코딩한 텍스트를 UTF-8로 함께 저장합니다.
+        """
+        if not blob_contents:
+            return []
+        hashes = list(blob_contents)
+        placeholders = ",".join("?" for _ in hashes)
+        cursor = await self.conn.execute(f"SELECT hash FROM blobs WHERE hash IN ({placeholders})", hashes)
+        stored = {row[0] for row in await cursor.fetchall()}
+        missing = [(file_hash, file_info) for file_hash, file_info in blob_contents.items() if file_hash not in stored]
+
+        def compress_row(file_hash, file_info):
+            content = file_info["content"]
+            encoding = file_info.get("encoding")
+            utf8 = text_codec.normalized_bytes(file_info["text"], encoding) if encoding else None
+            utf8_columns = blob_store.compress(utf8) if utf8 is not None else (None, None)
+            return (file_hash, *blob_store.compress(content), len(content), encoding, *utf8_columns)
+
+        return await asyncio.to_thread(lambda: [compress_row(file_hash, file_info) for file_hash, file_info in missing])
+
+    @staticmethod
+    def _previous_version_storage(version, file_info):
+        """직전 버전을 저장할 방식 (kind, delta_codec, delta)을 정합니다.
+
+        역방향 delta가 있으면 delta로 저장하되, HISTORY_SNAPSHOT_INTERVAL 배수 버전은 전체 내용(snapshot)으로 남겨
+        어떤 버전이든 복원할 때 적용하는 delta 수가 일정 개수를 넘지 않도록 합니다.
+        """
+        reverse_delta = file_info.get("reverse_delta")
+        if reverse_delta is None or version % Config.HISTORY_SNAPSHOT_INTERVAL == 0:
+            return history.SNAPSHOT, None, None
+        return (history.DELTA, *reverse_delta)
+
+    async def flush(self):
+        """버퍼에 쌓인 변경사항(과 체크포인트, 오류 기록)을 executemany로 한 트랜잭션에 저장합니다."""
+        if not self._pending and not self._pending_checkpoints and not self._pending_errors and not self._pending_deletions:
+            return
+
+        started = time.perf_counter()
+        compress_seconds = await self._flush()
+        # 압축은 compress 단계로 따로 집계하고, 나머지(조회, executemany, commit)를 db_write로 집계
+        self.stats.add_time("db_write", time.perf_counter() - started - compress_seconds)
+
+    async def _flush(self):
+        """flush의 본체입니다. blob 압축에 걸린 시간(초)을 반환합니다."""
+        compress_seconds = 0.0
+        pending, self._pending = self._pending, {}
+        checkpoints, self._pending_checkpoints = self._pending_checkpoints, []
+        deletions, self._pending_deletions = self._pending_deletions, []
+        current_time = self.db_manager._get_current_time()
+        current_ts = self.db_manager._get_current_epoch()
+
+        try:
+            # 이동된 파일은 기존 행의 경로만 바꿔 id와 버전 이력을 그대로 이어감 (아래 조회부터는 새 경로 기준)
+            renames = [
+                (file_path, file_info["renamed_from"])
+                for file_path, (file_info, _) in pending.items()
+                if file_info.get("renamed_from")
+            ]
+            await self.conn.executemany("UPDATE OR IGNORE files SET file_path = ? WHERE file_path = ?", renames)
+
+            paths = list(pending)
+            placeholders = ",".join("?" for _ in paths)
+            cursor = await self.conn.execute(
+                f"""
+                SELECT f.file_path, f.file_hash, (SELECT MAX(version) FROM file_versions v WHERE v.file_id = f.id),
+                    f.deleted_ts IS NOT NULL
+                FROM files f
+                WHERE f.file_path IN ({placeholders})
+                """,
+                paths,
+            )
+            existing = {}
+            restored = set()
+            for file_path, file_hash, version, deleted in await cursor.fetchall():
+                existing[file_path] = (file_hash, version or 0)
+                if deleted:
+                    # 지워졌다가 같은 경로에 다시 생긴 파일은 같은 행에 이력을 이어가되 변경 종류는 add
+                    restored.add(file_path)
+
+            new_rows, changed_rows, touched_rows, change_rows, version_rows, hunk_rows = [], [], [], [], [], []
+            rehashed_rows, version_hash_rows = [], []
+            blob_contents = {}
+            skipped_count = 0
+            for file_path, (file_info, diff) in pending.items():
+                stat_values = (file_info["size"], file_info["mtime_ns"], file_info["inode"])
+                skip_reason = file_info.get("skip_reason")
+                old_path = file_info.get("renamed_from")
+                if old_path:
+                    change_type = "rename"
+                elif file_path in existing and file_path not in restored:
+                    change_type = "modify"
+                else:
+                    change_type = "add"
+                if file_path not in existing:
+                    new_rows.append(
+                        (file_path, file_info["hash"], *stat_values, skip_reason, *(current_time,) * 3, current_ts)
+                    )
+                    new_version = 1
+                else:
+                    old_hash, latest_version = existing[file_path]
+                    if old_hash == file_info["hash"] and file_path not in restored:
+                        # 내용은 같고 stat만 바뀐 경우(touch 등) 다음 스캔에서 건너뛸 수 있도록 stat만 갱신
+                        touched_rows.append((*stat_values, file_path))
+                        if old_path:
+                            # 내용 그대로 이동만 된 경우에도 rename 기록은 남김
+                            change_rows.append(
+                                (
+                                    file_path,
+                                    diff,
+                                    current_time,
+                                    current_ts,
+                                    latest_version or None,
+                                    change_type,
+                                    old_path,
+                                    None,
+                                )
+                            )
+                        continue
+                    if file_info.get("rehashed_from") == old_hash:
+                        # 내용은 같고 해시 알고리즘만 바뀐 경우 새 해시로 blob과 버전 이력을 옮김
+                        rehashed_rows.append((file_info["hash"], *stat_values, file_path))
+                        version_hash_rows.append((file_info["hash"], file_path, old_hash))
+                        blob_contents[file_info["hash"]] = file_info
+                        continue
+
+                    changed_rows.append(
+                        (file_info["hash"], *stat_values, skip_reason, current_time, current_time, current_ts, file_path)
+                    )
+                    if file_filter.is_skipped_hash(old_hash):
+                        # 걸러졌던 파일은 이어 붙일 이전 내용이 없으므로 새 버전만 추가
+                        new_version = latest_version + 1
+                    else:
+                        # 이전 버전(이력이 없던 파일은 1번으로 새로 기록)을 역방향 delta로 바꾸고 새 버전을 추가
+                        # (이번에 걸러진 파일은 delta가 없으므로 이전 버전이 snapshot으로 남음)
+                        previous_version = latest_version or 1
+                        storage = self._previous_version_storage(previous_version, file_info)
+                        version_rows.append((file_path, previous_version, old_hash, *storage, None, None))
+                        new_version = previous_version + 1
+
+                if skip_reason:
+                    # 걸러진 파일은 내용, 새 버전, diff 없이 이유만 기록
+                    skipped_count += 1
+                    continue
+
+                version_rows.append(
+                    (file_path, new_version, file_info["hash"], history.SNAPSHOT, None, None, current_time, current_ts)
+                )
+                blob_contents[file_info["hash"]] = file_info
+                if diff:
+                    change_rows.append(
+                        (
+                            file_path,
+                            diff,
+                            current_time,
+                            current_ts,
+                            new_version,
+                            change_type,
+                            old_path,
+                            None if old_path else file_info.get("noise_kind"),
+                        )
+                    )
+                    language = hunks.language_for(file_path)
+                    hunk_rows.extend(
+                        (index, *hunk, language, file_path) for index, hunk in enumerate(file_info.get("hunks", ()))
+                    )
+
+            compress_started = time.perf_counter()
+            blob_rows = await self._compress_new_blobs(blob_contents)
+            compress_seconds = time.perf_counter() - compress_started
+            self.stats.add_time("compress", compress_seconds)
+            await self.conn.executemany(
+                """
+                INSERT OR IGNORE INTO blobs (hash, codec, data, raw_size, encoding, utf8_codec, utf8_data)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                blob_rows,
+            )
+            await self.conn.executemany(
+                """
+                INSERT INTO files (
+                    file_path, file_hash, size, mtime_ns, inode, skip_reason, created_at, modified_at, last_updated,
+                    last_updated_ts
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                new_rows,
+            )
+            await self.conn.executemany(
+                """
+                UPDATE files
+                SET file_hash = ?, size = ?, mtime_ns = ?, inode = ?, skip_reason = ?, modified_at = ?, last_updated = ?,
+                    last_updated_ts = ?, deleted_at = NULL, deleted_ts = NULL
+                WHERE file_path = ?
+                """,
+                changed_rows,
+            )
+            await self.conn.executemany(
+                "UPDATE files SET size = ?, mtime_ns = ?, inode = ? WHERE file_path = ?",
+                touched_rows,
+            )
+            await self.conn.executemany(
+                "UPDATE files SET file_hash = ?, size = ?, mtime_ns = ?, inode = ? WHERE file_path = ?",
+                rehashed_rows,
+            )
+            await self.conn.executemany(
+                """
+                UPDATE file_versions SET file_hash = ?
+                WHERE file_id = (SELECT id FROM files WHERE file_path = ?) AND file_hash = ?
+                """,
+                version_hash_rows,
+            )
+            await self.conn.executemany(
+                """
+                INSERT INTO file_versions (file_id, version, file_hash, kind, delta_codec, delta, created_at, created_ts)
+                VALUES ((SELECT id FROM files WHERE file_path = ?), ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (file_id, version) DO UPDATE
+                SET kind = excluded.kind, delta_codec = excluded.delta_codec, delta = excluded.delta
+                """,
+                version_rows,
+            )
+            await self.conn.executemany(
+                """
+                INSERT INTO file_changes (file_id, diff, change_time, change_ts, version, change_type, old_path, noise_kind)
+                VALUES ((SELECT id FROM files WHERE file_path = ?), ?, ?, ?, ?, ?, ?, ?)
+                """,
+                change_rows,
+            )
+            # 방금 추가한(파일마다 가장 최근) 변경 행에 hunk를 연결
+            await self.conn.executemany(
+                """
+                INSERT INTO diff_hunks (
+                    change_id, file_id, hunk_index, old_start, old_count, new_start, new_count,
+                    added, removed, noise_kind, symbol, language
+                )
+                SELECT fc.id, fc.file_id, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?
+                FROM file_changes fc
+                WHERE fc.file_id = (SELECT id FROM files WHERE file_path = ?)
+                ORDER BY fc.id DESC
+                LIMIT 1
+                """,
+                hunk_rows,
+            )
+            # 지워진 파일은 삭제 변경 행(직전 버전 기준)을 남기고 files 행에 지운 시각만 기록 (이미 기록된 파일은 건너뜀)
+            await self.conn.executemany(
+                """
+                INSERT INTO file_changes (file_id, diff, change_time, change_ts, version, change_type)
+                SELECT f.id, ?, ?, ?, (SELECT MAX(version) FROM file_versions v WHERE v.file_id = f.id), 'delete'
+                FROM files f
+                WHERE f.file_path = ? AND f.deleted_ts IS NULL
+                """,
+                [
+                    (f"deleted file {file_path}\n".encode("utf-8"), current_time, current_ts, file_path)
+                    for file_path in deletions
+                ],
+            )
+            cursor = await self.conn.executemany(
+                """
+                UPDATE files SET deleted_at = ?, deleted_ts = ?, last_updated = ?, last_updated_ts = ?
+                WHERE file_path = ? AND deleted_ts IS NULL
+                """,
+                [(current_time, current_ts, current_time, current_ts, file_path) for file_path in deletions],
+            )
+            if deletions:
+                self.stats.count("files_deleted", cursor.rowcount)
+            await self.conn.executemany(
+                "INSERT OR IGNORE INTO scan_checkpoints (run_id, directory, completed_at) VALUES (?, ?, ?)",
+                [(self.run_id, directory, current_time) for directory in checkpoints],
+            )
+            await self._save_errors()
+            await self.conn.commit()
+            self.stats.count("db_batches")
+            self.stats.count("db_rows_written", len(pending))
+            self.stats.count("blob_bytes_written", sum(len(row[2]) for row in blob_rows))
+            if pending:
+                verbose(
+                    f"Saved batch: {len(new_rows)} new, {len(changed_rows)} changed, "
+                    f"{len(touched_rows) + len(rehashed_rows)} stat-only, {len(renames)} renamed, {len(change_rows)} diffs, "
+                    f"{skipped_count} skipped"
+                )
+        except Exception as e:
+            await self.conn.rollback()
+            print(f"Error saving file change batch: {e}")
+            # 배치 전체가 저장되지 않았으므로 파일마다 오류로 남기고, 이후 체크포인트는 기록하지 않음
+            self.failed = True
+            for file_path in pending:
+                self.add_error(file_path, "write", e)
+            try:
+                await self._save_errors()
+                await self.conn.commit()
+            except Exception as save_error:
+                await self.conn.rollback()
+                print(f"Error recording scan errors: {save_error}")
+        return compress_seconds
@@ -0,0 +1,294 @@
+# file_watcher/symbols.py
+
+import ast
+import os
+
+# 심볼을 추출할 수 있는 언어 (file_watcher/hunks.py의 언어 이름)
+SUPPORTED_LANGUAGES = {"python", "javascript", "typescript"}
+
+FUNCTION = "function"
+CLASS = "class"
+METHOD = "method"
+# 심볼 추출 방식이 바뀌면 올려서 symbol_index에 캐시된 이전 결과를 다시 파싱하게 함
+PARSER_VERSION = 2
+
+
+def extract_symbols(text, language, jsx=False):
+    """소스 텍스트에서 함수/클래스 정의를 찾습니다.
+
+    (qualname, kind, start_line, end_line, depth) 튜플 목록을 반환하며, 줄 번호는 1부터 시작하고 end_line을 포함합니다.
+    depth는 중첩 깊이(최상위 0)입니다. 파싱할 수 없으면 빈 목록을 반환합니다.
+    jsx는 .jsx/.tsx 파일처럼 JSX 태그가 있을 수 있는 소스인지 여부입니다. (jsx_for 참고)
+    """
+    if language == "python":
+        return _python_symbols(text)
+    if language in ("javascript", "typescript"):
+        return _script_symbols(text, jsx)
+    return []
+
+
+def jsx_for(file_path):
+    """JSX 태그를 쓰는 파일(.jsx, .tsx)인지 확장자로 확인합니다."""
+    return bool(file_path) and os.path.splitext(file_path)[1].lower() in _JSX_EXTENSIONS
+
+
+def _python_symbols(text):
+    try:
+        tree = ast.parse(text)
+    except (SyntaxError, ValueError):
+        return []
+
+    symbols = []
+    stack = [(tree, "", 0, False)]
+    while stack:
+        node, prefix, depth, in_class = stack.pop()
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                qualname = f"{prefix}{child.name}"
+                if isinstance(child, ast.ClassDef):
+                    kind = CLASS
+                else:
+                    kind = METHOD if in_class else FUNCTION
+                # 데코레이터도 정의의 일부로 포함
+                start_line = min([child.lineno] + [decorator.lineno for decorator in child.decorator_list])
+                symbols.append((qualname, kind, start_line, child.end_lineno, depth))
+                stack.append((child, f"{qualname}.", depth + 1, isinstance(child, ast.ClassDef)))
+            elif not isinstance(child, (ast.Lambda, ast.expr)):
+                # if/try/with 블록 안의 정의도 같은 깊이로 찾음
+                stack.append((child, prefix, depth, in_class))
+    symbols.sort(key=lambda symbol: (symbol[2], symbol[4]))
+    return symbols
+
+
+_JS_KEYWORDS = set(
+    "if else for while do switch case try catch finally return throw new typeof instanceof in of delete void "
+    "await yield with function".split()
+)
+_JS_MODIFIERS = set(
+    "export default async static get set public private protected readonly override abstract declare *".split()
+)
+# 이 토큰 뒤의 "/"는 나눗셈이 아니라 정규식 리터럴의 시작
+_REGEX_PREFIX_TOKENS = set("(,=:[!&|?{};+-*%<>~^") | {"return", "typeof", "case", "in", "of", "delete", "void", "=>"}
+_CLASS_KEYWORDS = ("class", "interface", "enum", "namespace")
+_JSX_EXTENSIONS = (".jsx", ".tsx")
+
+
+def _script_tokens(text, jsx=False):
+    """JS/TS 소스를 (토큰, 줄 번호)로 나눕니다. 주석과 문자열 내용은 버리고, 템플릿 문자열의 ${...} 안은 토큰으로 읽습니다.
+
+    jsx이면 "<" 바로 뒤의 "/"는 정규식이 아니라 닫는 태그(</div>)로 봅니다.
+    """
+    tokens = []
+    line = 1
+    index = 0
+    length = len(text)
+    # 템플릿 문자열 안의 ${ 중첩: 각 항목은 그 ${ 이후 열린 중괄호 수
+    template_depths = []
+    previous = None
+
+    def skip_string(quote, index, line):
+        while index < length:
+            char = text[index]
+            if char == "\\":
+                index += 2
+                continue
+            if char == "\n":
+                if quote != "`":
+                    # 닫히지 않은 따옴표(JSX 텍스트 등)는 줄 끝에서 끊어 나머지 파일에 영향이 없도록 함
+                    return index, line, False
+                line += 1
+            elif char == quote:
+                return index + 1, line, False
+            elif quote == "`" and text.startswith("${", index):
+                return index + 2, line, True
+            index += 1
+        return index, line, False
+
+    while index < length:
+        char = text[index]
+        if char == "\n":
+            line += 1
+            index += 1
+        elif char.isspace():
+            index += 1
+        elif text.startswith("//", index):
+            index = text.find("\n", index)
+            index = length if index == -1 else index
+        elif text.startswith("/*", index):
+            end = text.find("*/", index + 2)
+            end = length if end == -1 else end + 2
+            line += text.count("\n", index, end)
+            index = end
+        elif char in "'\"`":
+            index, line, entered_template = skip_string(char, index + 1, line)
+            if entered_template:
+                template_depths.append(0)
+            previous = "string"
+        elif char == "/" and (previous is None or previous in _REGEX_PREFIX_TOKENS) and not (jsx and previous == "<"):
+            index += 1
+            in_class = False
+            while index < length and text[index] != "\n":
+                if text[index] == "\\":
+                    index += 1
+                elif text[index] == "[":
+                    in_class = True
+                elif text[index] == "]":
+                    in_class = False
+                elif text[index] == "/" and not in_class:
+                    index += 1
+                    break
+                index += 1
+            previous = "regex"
+        elif char.isalpha() or char in "_$":
+            start = index
+            while index < length and (text[index].isalnum() or text[index] in "_$"):
+                index += 1
+            previous = text[start:index]
+            tokens.append((previous, line))
+        elif char.isdigit():
+            while index < length and (text[index].isalnum() or text[index] in "._"):
+                index += 1
+            previous = "number"
+        elif text.startswith("=>", index):
+            tokens.append(("=>", line))
+            previous = "=>"
+            index += 2
+        elif char == "}" and template_depths and template_depths[-1] == 0:
+            # 템플릿 문자열의 ${...}가 끝났으므로 문자열 나머지를 건너뜀
+            template_depths.pop()
+            index, line, entered_template = skip_string("`", index + 1, line)
+            if entered_template:
+                template_depths.append(0)
+            previous = "string"
+        else:
+            if template_depths and char in "{}":
+                template_depths[-1] += 1 if char == "{" else -1
+            tokens.append((char, line))
+            previous = char
+            index += 1
+    return tokens
+
+
+def _declared_name(statement, in_class):
+    """'{' 앞의 문장 토큰으로 이 블록이 어떤 정의의 본문인지 찾습니다. (name, kind) 또는 None."""
+    values = [value for value, _ in statement]
+    if not values:
+        return None
+    for keyword in _CLASS_KEYWORDS:
+        if keyword in values:
+            position = values.index(keyword)
+            if position + 1 < len(values) and _is_identifier(values[position + 1]):
+                return values[position + 1], CLASS
+            return None
+    if "function" in values:
+        position = values.index("function")
+        following = [value for value in values[position + 1 :] if value != "*"]
+        if following and _is_identifier(following[0]):
+            return following[0], FUNCTION
+        # 이름 없는 함수 표현식: const name = function () {...}, name: function () {...}
+        for separator in ("=", ":"):
+            if separator in values[:position]:
+                name_position = values.index(separator) - 1
+                if name_position >= 0 and _is_identifier(values[name_position]):
+                    return values[name_position], METHOD if in_class else FUNCTION
+        return None
+    if "=>" in values:
+        # const name = (...) => {...}, 클래스 필드 name = async () => {...}
+        if "=" in values:
+            name_position = values.index("=") - 1
+            if name_position >= 0 and _is_identifier(values[name_position]):
+                return values[name_position], METHOD if in_class else FUNCTION
+        return None
+
+    # 메서드 축약형: [수식어] name(...) [: 타입] {
+    position = 0
+    while position < len(values) and values[position] in _JS_MODIFIERS:
+        position += 1
+    if (
+        position + 1 < len(values)
+        and _is_identifier(values[position])
+        and values[position] not in _JS_KEYWORDS
+        and values[position + 1] in ("(", "<")
+        and ")" in values
+    ):
+        return values[position], METHOD if in_class else FUNCTION
+    return None
+
+
+def _is_identifier(value):
+    return (value[0].isalpha() or value[0] in "_$") and value not in _JS_KEYWORDS
+
+
+def _script_symbols(text, jsx=False):
+    tokens = _script_tokens(text, jsx)
+    symbols = []
+    # 열린 중괄호마다 ((qualname, kind, start_line, depth) 또는 None, 블록 밖의 괄호 깊이, 블록 밖의 문장)
+    block_stack = []
+    statement = []
+    paren_depth = 0
+    for value, line in tokens:
+        if value in "([":
+            paren_depth += 1
+        elif value in ")]":
+            paren_depth = max(paren_depth - 1, 0)
+
+        if value == "{":
+            declared = None
+            # 괄호 안에서 열린 블록(콜백 본문 등)은 이름 있는 정의로 보지 않음
+            if paren_depth == 0:
+                enclosing = [block for block, _, _ in block_stack if block]
+                in_class = bool(block_stack) and bool(block_stack[-1][0]) and block_stack[-1][0][1] == CLASS
+                declared = _declared_name(statement, in_class)
+                if declared:
+                    name, kind = declared
+                    qualname = ".".join([block[0] for block in enclosing] + [name])
+                    declared = (qualname, kind, statement[0][1], len(enclosing))
+            # 괄호 안의 중괄호(구조 분해/기본값 매개변수, 타입 리터럴, 콜백 본문)가 닫히면 바깥 문장을 이어서 읽음
+            block_stack.append((declared, paren_depth, statement if paren_depth else []))
+            statement = []
+            paren_depth = 0
+            continue
+        if value == "}":
+            statement = []
+            if block_stack:
+                block, paren_depth, statement = block_stack.pop()
+                if block:
+                    qualname, kind, start_line, depth = block
+                    symbols.append((qualname, kind, start_line, line, depth))
+            continue
+        if value in (";", ",") and paren_depth == 0:
+            statement = []
+            continue
+        statement.append((value, line))
+
+    symbols.sort(key=lambda symbol: (symbol[2], symbol[4]))
+    return symbols
+
+
+def symbols_for_range(symbols, start_line, end_line):
+    """start_line~end_line과 겹치는 심볼 중 가장 안쪽(겹치는 하위 심볼이 없는) 것들을 반환합니다."""
+    overlapping = [symbol for symbol in symbols if symbol[2] <= end_line and symbol[3] >= start_line]
+    innermost = []
+    for symbol in overlapping:
+        prefix = symbol[0] + "."
+        if not any(other[0].startswith(prefix) for other in overlapping):
+            innermost.append(symbol)
+    return innermost
+
+
+def top_level_symbols(symbols):
+    return [symbol for symbol in symbols if symbol[4] == 0]
+
+
+def changed_line_range(new_start, new_count, line_count, context=3):
+    """hunk의 새 파일 범위에서 앞뒤 문맥 줄을 뺀, 실제로 바뀐 줄 범위 (start, end)를 추정합니다.
+
+    문맥 줄 수는 파일 처음/끝에 닿은 쪽은 알 수 없으므로 0으로 봅니다. 삭제만 있는 hunk는 삭제된 자리의 바로 위 줄을 반환합니다.
+    """
+    leading = context if new_start > 1 else 0
+    end = new_start + new_count - 1
+    trailing = context if end < line_count else 0
+    start, end = new_start + leading, end - trailing
+    if start > end:
+        start = end = max(start - 1, 1)
+    return start, end
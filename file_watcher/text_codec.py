@@ -0,0 +1,75 @@
+# file_watcher/text_codec.py
+
+import codecs
+from collections import OrderedDict
+
+from config.settings import Config
+
+UTF8 = "utf-8"
+# BOM이 있으면 그 인코딩으로 확정 (BOM은 텍스트에서 빠짐)
+_BOM_ENCODINGS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+# 어떤 바이트든 디코딩되는 마지막 후보
+_LAST_RESORT = "latin-1"
+
+# 내용 해시 -> 디코딩된 텍스트 (최근에 쓴 순서, 최대 TEXT_CACHE_SIZE개)
+_cache = OrderedDict()
+
+
+def decode(content):
+    """바이트 내용을 한 번만 디코딩해 (텍스트, 감지한 인코딩)을 반환합니다.
+
+    BOM -> UTF-8 -> TEXT_FALLBACK_ENCODINGS 순으로 오류 없이 디코딩되는 첫 인코딩을 쓰고,
+    모두 실패하면 latin-1로 읽습니다. (UTF-8이 아닌 파일도 텍스트는 항상 같은 규칙으로 얻음)
+    """
+    for bom, encoding in _BOM_ENCODINGS:
+        if content.startswith(bom):
+            return content.decode(encoding, errors="replace"), encoding
+    for encoding in (UTF8, *Config.TEXT_FALLBACK_ENCODINGS):
+        try:
+            return content.decode(encoding), encoding
+        except (UnicodeDecodeError, LookupError):
+            continue
+    return content.decode(_LAST_RESORT), _LAST_RESORT
+
+
+def decode_as(content, encoding):
+    """저장된 인코딩으로 디코딩합니다. 인코딩 기록이 없는 예전 내용은 decode()로 다시 감지합니다."""
+    if encoding is None:
+        return decode(content)[0]
+    return content.decode(encoding, errors="replace")
+
+
+def normalized_bytes(text, encoding):
+    """원본이 UTF-8이 아닌(또는 BOM이 있는) 내용의 UTF-8 텍스트 형태입니다. 원본이 그대로 UTF-8이면 None."""
+    return None if encoding == UTF8 else text.encode(UTF8)
+
+
+def split_lines(text):
+    """bytes.splitlines()와 같은 기준(\\n, \\r\\n, \\r)으로 줄을 나눕니다. (바이트 줄과 텍스트 줄의 번호가 맞도록)"""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    if lines[-1] == "":
+        lines.pop()
+    return lines
+
+
+def cached_text(file_hash):
+    text = _cache.get(file_hash)
+    if text is not None:
+        _cache.move_to_end(file_hash)
+    return text
+
+
+def remember(file_hash, text):
+    """디코딩한 텍스트를 내용 해시로 캐시합니다. 같은 내용은 이후 어디서 읽든 다시 디코딩하지 않습니다."""
+    if Config.TEXT_CACHE_SIZE <= 0 or not file_hash:
+        return
+    _cache[file_hash] = text
+    _cache.move_to_end(file_hash)
+    while len(_cache) > Config.TEXT_CACHE_SIZE:
+        _cache.popitem(last=False)
@@ -0,0 +1,146 @@
+# file_watcher/watch_daemon.py
+
+import asyncio
+import os
+import time
+
+from watchdog.events import FileSystemEventHandler
+from watchdog.observers import Observer
+
+from config.settings import Config
+from file_watcher.rename_detector import build_rename_result
+
+
+class _PathEventHandler(FileSystemEventHandler):
+    """watchdog 스레드에서 받은 이벤트의 경로를 이벤트 루프 쪽으로 넘깁니다."""
+
+    def __init__(self, loop, on_path, on_move=None):
+        self.loop = loop
+        self.on_path = on_path
+        self.on_move = on_move
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        for path in (event.src_path, getattr(event, "dest_path", "")):
+            if path:
+                self.loop.call_soon_threadsafe(self.on_path, os.fsdecode(path))
+        if event.event_type == "moved" and self.on_move:
+            self.loop.call_soon_threadsafe(self.on_move, os.fsdecode(event.src_path), os.fsdecode(event.dest_path))
+
+
+class WatchDaemon:
+    """파일 시스템 이벤트를 구독해 변경된 파일만 FileChangeHandler.check_file로 처리하는 상주 프로세스입니다.
+
+    에디터 저장 시 짧은 시간에 몰리는 이벤트는 WATCH_DEBOUNCE_SECONDS 동안 조용해질 때까지 모았다가 한 번만 처리합니다.
+    """
+
+    def __init__(self, handler, db_manager, directories, debounce_seconds=None):
+        self.handler = handler
+        self.db_manager = db_manager
+        self.directories = directories
+        self.debounce_seconds = debounce_seconds if debounce_seconds is not None else Config.WATCH_DEBOUNCE_SECONDS
+        self._pending = {}
+        # 이동 이벤트로 생긴 경로 -> 이동 전 경로 (처리할 때 rename으로 기록)
+        self._moved_from = {}
+
+    @staticmethod
+    def is_alive():
+        """다른 프로세스에서 감시 데몬이 동작 중인지 하트비트 파일로 확인합니다."""
+        try:
+            age = time.time() - os.path.getmtime(Config.WATCH_HEARTBEAT_PATH)
+        except OSError:
+            return False
+        return age < Config.WATCH_HEARTBEAT_TIMEOUT_SECONDS
+
+    def _on_path(self, path):
+        if self.handler._should_process_file(path):
+            self._pending[path] = time.monotonic()
+
+    def _on_move(self, src_path, dest_path):
+        if not Config.RENAME_DETECTION:
+            return
+        # a -> b -> c처럼 이어서 옮겨지면 DB에 있는 처음 경로를 유지
+        self._moved_from[dest_path] = self._moved_from.pop(src_path, src_path)
+
+    async def _run_maintenance(self):
+        """쉬는 동안 심볼 분석과 버전 이력 정리를 실행합니다."""
+        if Config.SYMBOL_ANALYSIS:
+            await self.db_manager.analyze_changed_symbols()
+        await self.db_manager.compact_history()
+
+    def _touch_heartbeat(self):
+        with open(Config.WATCH_HEARTBEAT_PATH, "a"):
+            pass
+        os.utime(Config.WATCH_HEARTBEAT_PATH)
+
+    async def run(self):
+        """감시를 시작하고 취소될 때까지 디바운스된 경로를 처리합니다."""
+        loop = asyncio.get_running_loop()
+        observer = Observer()
+        event_handler = _PathEventHandler(loop, self._on_path, self._on_move)
+        for directory in self.directories:
+            observer.schedule(event_handler, directory, recursive=True)
+            print(f"Watching directory: {directory}")
+
+        observer.start()
+        compaction_task = None
+        last_compaction = time.monotonic()
+        try:
+            while True:
+                self._touch_heartbeat()
+                await self._process_settled_paths()
+
+                # 이벤트가 없을 때 주기적으로 심볼 분석과 버전 이력 정리를 백그라운드에서 실행
+                idle = not self._pending
+                compaction_due = time.monotonic() - last_compaction >= Config.HISTORY_COMPACT_INTERVAL_SECONDS
+                if idle and compaction_due and (compaction_task is None or compaction_task.done()):
+                    compaction_task = asyncio.create_task(self._run_maintenance())
+                    last_compaction = time.monotonic()
+
+                await asyncio.sleep(max(min(self.debounce_seconds, 1.0) / 2, 0.1))
+        finally:
+            if compaction_task is not None and not compaction_task.done():
+                await compaction_task
+            observer.stop()
+            await asyncio.to_thread(observer.join)
+            try:
+                os.remove(Config.WATCH_HEARTBEAT_PATH)
+            except OSError:
+                pass
+
+    async def _process_settled_paths(self):
+        """마지막 이벤트 이후 디바운스 시간이 지난 경로만 꺼내서 처리합니다."""
+        now = time.monotonic()
+        settled = [path for path, last_seen in self._pending.items() if now - last_seen >= self.debounce_seconds]
+        if not settled:
+            return
+
+        for path in settled:
+            del self._pending[path]
+
+        async with self.db_manager.batch_writer() as writer:
+            for path in settled:
+                moved_from = self._moved_from.pop(path, None)
+                if not os.path.exists(path):
+                    continue
+                try:
+                    result = None
+                    if moved_from and not os.path.exists(moved_from):
+                        result = await self._check_moved_file(moved_from, path, writer)
+                    if result is None:
+                        result = await self.handler.check_file(path, writer)
+                except Exception as e:
+                    writer.add_error(path, "check", e)
+                    continue
+                if result:
+                    await writer.add(*result)
+
+    async def _check_moved_file(self, old_path, new_path, writer):
+        """이동된 파일을 rename으로 처리합니다. 이동 전 경로가 DB에 없거나 내용이 많이 바뀌었으면 None을 반환합니다."""
+        if not self.handler._should_process_file(new_path):
+            return None
+        file_info = await self.handler.get_file_info(new_path)
+        if not file_info or file_info["skip_reason"]:
+            return None
+        return await build_rename_result(self.handler, writer, old_path, new_path, file_info)
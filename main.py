@@ -11,8 +11,8 @@ async def run_file_scanner():
         scanner = importlib.import_module("file_scanner")
         await scanner.main()
     except Exception as e:
+        # 중단된 스캔은 다음 실행에서 이어지고, 이미 저장된 변경사항으로 리포트는 만들 수 있으므로 계속 진행
         print(f"파일 스캔 중 오류 발생: {e}")
-        sys.exit(1)
 
 
 async def run_report_workflow():
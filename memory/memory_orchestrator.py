@@ -1,4 +1,5 @@
 # memory/memory_orchestrator.py
+import asyncio
 from typing import List, Dict, Any
 from memory.rerank_service import RerankService
 import os
@@ -16,7 +17,7 @@ class MemoryOrchestrator:
         self.vdb = vector_db_client  # 벡터 DB 클라이언트
         self.reranker = RerankService()  # RerankService 인스턴스 생성
 
-    def add_topic(self, date: str, raw_topic_text: str, context_text: str = "") -> int:
+    async def add_topic(self, date: str, raw_topic_text: str, context_text: str = "") -> int:
         """
         토픽을 추가하는 메서드
 
@@ -28,18 +29,19 @@ class MemoryOrchestrator:
         Returns:
             int: 생성된 토픽 ID
         """
-        topic_id = self.rdb.add_topic(date, raw_topic_text)
+        topic_id = await self.rdb.add_topic(date, raw_topic_text)
         combined_text = f"{raw_topic_text}\n\n[Context]: {context_text}" if context_text else raw_topic_text
-        topic_emb = self.embed.get_embedding(combined_text, is_code=False)
-        self.vdb.upsert_vector(
+        # 임베딩 API 호출과 벡터 저장은 동기 호출이므로 스레드에서 실행해 다른 에이전트를 막지 않음
+        await asyncio.to_thread(
+            self._upsert_embedding,
             f"topic_{topic_id}",
-            topic_emb,
+            combined_text,
             {"raw_topic_text": raw_topic_text, "context_text": context_text, "date": date},
-            namespace="topics",
+            "topics",
         )
         return topic_id
 
-    def add_agent_report(
+    async def add_agent_report(
         self,
         date: str,
         agent_type: str,
@@ -64,14 +66,14 @@ class MemoryOrchestrator:
         Returns:
             int: 생성된 리포트 ID
         """
-        report_id = self.rdb.add_agent_report(
+        report_id = await self.rdb.add_agent_report(
             date, agent_type, topic_id, report_content, summary, code_refs, raw_topic_text
         )
 
-        report_emb = self.embed.get_embedding(report_content, is_code=False)
-        self.vdb.upsert_vector(
+        await asyncio.to_thread(
+            self._upsert_embedding,
             f"report_{report_id}",
-            report_emb,
+            report_content,
             {
                 "agent_type": agent_type,
                 "topic_id": topic_id,
@@ -80,10 +82,14 @@ class MemoryOrchestrator:
                 "raw_topic_text": raw_topic_text,
                 "report_id": report_id,
             },
-            namespace="reports",
+            "reports",
         )
         return report_id
 
+    def _upsert_embedding(self, vector_id: str, text: str, metadata: Dict[str, Any], namespace: str):
+        embedding = self.embed.get_embedding(text, is_code=False)
+        self.vdb.upsert_vector(vector_id, embedding, metadata, namespace=namespace)
+
     def get_recent_topics(self, days: int = 3) -> List[Dict[str, Any]]:
         """
         최근 토픽들을 가져오는 메서드
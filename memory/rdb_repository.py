@@ -1,26 +1,46 @@
 # memory/rdb_repository.py
-import sqlite3
+import asyncio
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 import json
 from rank_bm25 import BM25Okapi
 import numpy as np
 
+from file_watcher import db_connection
+
+
+def _insert_batch(conn, statements):
+    """커넥션 스레드에서 삽입들을 한 트랜잭션으로 실행하고 각 행의 id를 반환합니다. (하나라도 실패하면 모두 롤백)"""
+    try:
+        row_ids = [conn.execute(sql, params).lastrowid for sql, params in statements]
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return row_ids
+
 
 class RDBRepository:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # 삽입용 비동기 커넥션 (처음 쓸 때 열어 aclose까지 유지)
+        self._conn = None
+        # 아직 쓰지 않은 삽입: (sql, 파라미터, 결과 id를 받을 future)
+        self._pending = []
+        self._flush_task = None
 
-    def add_topic(self, date: str, raw_topic_text: str) -> int:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("INSERT INTO topics (date, raw_topic_text) VALUES (?, ?)", (date, raw_topic_text))
-        topic_id = c.lastrowid
-        conn.commit()
-        conn.close()
-        return topic_id
+    @staticmethod
+    def _to_epoch(date: str) -> int:
+        """ISO 형식 시각을 epoch 초(topics.date_ts)로 바꿉니다. 오프셋이 없으면 로컬 시각으로 봅니다."""
+        return int(datetime.fromisoformat(date).timestamp())
+
+    async def add_topic(self, date: str, raw_topic_text: str) -> int:
+        return await self._insert(
+            "INSERT INTO topics (date, date_ts, raw_topic_text) VALUES (?, ?, ?)",
+            (date, self._to_epoch(date), raw_topic_text),
+        )
 
-    def add_agent_report(
+    async def add_agent_report(
         self,
         date: str,
         agent_type: str,
@@ -30,27 +50,60 @@ class RDBRepository:
         code_refs: List[str],
         raw_topic_text: str,
     ) -> int:
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute(
+        return await self._insert(
             """
             INSERT INTO agent_reports (date, agent_type, topic_id, report_content, summary, code_references, raw_topic_text)
             VALUES (?, ?, ?, ?, ?, ?, ?)
             """,
             (date, agent_type, topic_id, report_content, summary, json.dumps(code_refs), raw_topic_text),
         )
-        report_id = c.lastrowid
-        conn.commit()
-        conn.close()
-        return report_id
+
+    async def _insert(self, sql: str, params: tuple) -> int:
+        """삽입을 대기열에 넣고 저장된 행의 id를 기다립니다.
+
+        병렬로 실행되는 에이전트들이 같은 틈에 넣은 삽입은 한 트랜잭션(커밋 한 번)으로 묶어 씁니다.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((sql, params, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self._flush())
+        return await future
+
+    async def _flush(self):
+        # 이벤트 루프를 한 번 양보해, 동시에 들어온 삽입을 같은 배치로 모음
+        await asyncio.sleep(0)
+        while self._pending:
+            batch, self._pending = self._pending, []
+            try:
+                if self._conn is None:
+                    self._conn = await db_connection.connect_async(self.db_path)
+                row_ids = await self._conn.run(_insert_batch, [(sql, params) for sql, params, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, _, future), row_id in zip(batch, row_ids):
+                if not future.done():
+                    future.set_result(row_id)
+
+    async def aclose(self):
+        """남은 삽입을 마저 쓰고 비동기 커넥션을 돌려줍니다."""
+        if self._flush_task is not None and not self._flush_task.done():
+            await self._flush_task
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await conn.close()
 
     def get_recent_topics(self, days: int = 3) -> List[Dict[str, Any]]:
-        cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-        conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
-        c.execute("SELECT id, raw_topic_text, date FROM topics WHERE date >= ?", (cutoff_date,))
-        rows = c.fetchall()
-        conn.close()
+        cutoff_ts = int((datetime.now() - timedelta(days=days)).timestamp())
+        conn = db_connection.get_connection(self.db_path)
+        try:
+            c = conn.cursor()
+            c.execute("SELECT id, raw_topic_text, date FROM topics WHERE date_ts >= ?", (cutoff_ts,))
+            rows = c.fetchall()
+        finally:
+            db_connection.release(conn)
         return [{"id": r[0], "raw_topic_text": r[1], "date": r[2]} for r in rows]
 
     def search_topics_by_bm25(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
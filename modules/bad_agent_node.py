@@ -24,15 +24,15 @@ class BadAgentNode:
             current_report=input.current_report,
         )
         response = await self.llm.agenerate(prompt=user_prompt, system_prompt=system_prompt, temperature=0.1)
-        report_id = self._store_agent_report(input.agent_type, input.topic_text, input.context_info, response)
+        report_id = await self._store_agent_report(input.agent_type, input.topic_text, input.context_info, response)
         print(f"[INFO] BadAgentNode completed: {report_id}")
         return AgentOutput(
             agent_type=input.agent_type, topic=input.topic_text, report_id=report_id, report_content=response
         )
 
-    def _store_agent_report(self, agent_type: str, topic_text: str, context: str, response: str) -> int:
-        topic_id = self.memory.add_topic(datetime.now().isoformat(), topic_text, context)
-        return self.memory.add_agent_report(
+    async def _store_agent_report(self, agent_type: str, topic_text: str, context: str, response: str) -> int:
+        topic_id = await self.memory.add_topic(datetime.now().isoformat(), topic_text, context)
+        return await self.memory.add_agent_report(
             date=datetime.now().isoformat(),
             agent_type=agent_type,
             topic_id=topic_id,
@@ -1,6 +1,6 @@
 # topic_selector.py (변경 후)
 from model import TopicSelectorInput, TopicSelectorOutput
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from config.settings import Config
 from ai_analyzer.llm_manager import LLMManager
 from textwrap import dedent
@@ -46,9 +46,11 @@ topic_selection_schema = {
 
 
 class TopicSelector:
-    def __init__(self, memory, llm_manager: LLMManager):
+    def __init__(self, memory, llm_manager: LLMManager, diff_loader: Optional[Callable[[Dict], str]] = None):
         self.memory = memory
         self.llm = llm_manager
+        # diff 본문이 없는 가벼운 변경 레코드(iter_recent_changes)의 diff를 읽어 오는 함수
+        self.diff_loader = diff_loader
         self.max_retries = Config.TOPIC_SELECTOR_MAX_RETRIES
         self.valid_agent_types = {"개선 에이전트", "칭찬 에이전트", "발견 에이전트"}
 
@@ -170,14 +172,15 @@ class TopicSelector:
         return base_prompt
 
     async def run(self, input: TopicSelectorInput) -> TopicSelectorOutput:
-        changes = input.changes
+        # diff 본문은 재시도마다 다시 읽지 않도록 프롬프트용 요약을 한 번만 만듦
+        changes_text = self._summarize_changes_for_prompt(input.changes)
         recent_topics = input.recent_topics
         recent_topic_texts = [t["raw_topic_text"] for t in recent_topics]
 
         # 최대 시도 횟수만큼 반복
         for attempt in range(self.max_retries):
             print(f"[INFO] Attempting topic selection (attempt {attempt + 1}/{self.max_retries})")
-            data = await self._attempt_new_topics_selection(changes, recent_topic_texts, allow_duplicates=False)
+            data = await self._attempt_new_topics_selection(changes_text, recent_topic_texts, allow_duplicates=False)
 
             if data:
                 return TopicSelectorOutput(selected_topics=data)
@@ -186,7 +189,7 @@ class TopicSelector:
 
         # 모든 시도 실패 시 중복 허용 모드로 한 번 더 시도
         print("[INFO] All attempts failed, trying with duplicates allowed...")
-        data = await self._attempt_new_topics_selection(changes, recent_topic_texts, allow_duplicates=True)
+        data = await self._attempt_new_topics_selection(changes_text, recent_topic_texts, allow_duplicates=True)
 
         if data:
             return TopicSelectorOutput(selected_topics=data)
@@ -195,9 +198,8 @@ class TopicSelector:
         return TopicSelectorOutput(selected_topics={})
 
     async def _attempt_new_topics_selection(
-        self, changes: List[Dict], recent_topic_texts: List[str], allow_duplicates: bool
+        self, changes_text: str, recent_topic_texts: List[str], allow_duplicates: bool
     ) -> Optional[Dict]:
-        changes_text = self._summarize_changes_for_prompt(changes)
         recent_topics_text = ", ".join(recent_topic_texts) if recent_topic_texts else "없음"
 
         messages = [
@@ -236,8 +238,12 @@ class TopicSelector:
     def _summarize_changes_for_prompt(self, changes: List[Dict]) -> str:
         changes_summary = []
         for ch in changes:
-            diff_excerpt = ch["diff"]
-            changes_summary.append(f"파일: {ch['file_path']}\n변경사항:\n{diff_excerpt}")
+            diff_excerpt = ch.get("diff")
+            if diff_excerpt is None:
+                diff_excerpt = self.diff_loader(ch) if self.diff_loader else ""
+            symbols = ch.get("symbols")
+            symbol_line = f"변경된 함수/클래스: {', '.join(symbols)}\n" if symbols else ""
+            changes_summary.append(f"파일: {ch['file_path']}\n{symbol_line}변경사항:\n{diff_excerpt}")
         return "\n\n".join(changes_summary)
 
     def _is_topic_overlapping(self, data: Dict, recent_topic_texts: List[str]) -> bool:
@@ -75,7 +75,7 @@ memory = MemoryOrchestrator(
 
 llm_manager = LLMManager(model=Config.DEFAULT_LLM_MODEL)
 
-topic_selector = TopicSelector(memory, llm_manager)
+topic_selector = TopicSelector(memory, llm_manager, diff_loader=db_manager.get_change_diff)
 bad_agent = BadAgentNode(memory, llm_manager)
 good_agent = GoodAgentNode(memory, llm_manager)
 new_agent = NewAgentNode(memory, llm_manager)
@@ -87,11 +87,8 @@ deep_explainer_agent = DeepExplainerAgentNode(llm_manager)
 # 추가된 precheck_node
 async def precheck_node(state: MyState) -> MyState:
     print("[INFO] precheck_node 시작")
-    total_changed_lines = 0
-    for ch in state["changes"]:
-        diff_content = ch.get("diff", "")
-        changed_lines = sum(1 for line in diff_content.split("\n") if line.startswith("+") or line.startswith("-"))
-        total_changed_lines += changed_lines
+    # 추가/삭제 줄 수는 스캐너가 diff_hunks에 저장한 hunk 집계값을 사용
+    total_changed_lines = sum(ch.get("added_lines", 0) + ch.get("removed_lines", 0) for ch in state["changes"])
 
     if total_changed_lines < 5:
         state["precheck_result"] = "minor_change"
@@ -188,6 +185,14 @@ async def run_agents_in_parallel(state: MyState) -> MyState:
     try:
         # changes를 file_path 키로 하는 딕셔너리로 변환
         changes_dict = {ch["file_path"]: ch for ch in state["changes"]}
+        # 상태에는 가벼운 레코드만 있으므로, 에이전트와 관련된 파일의 본문만 필요할 때 읽음 (여러 에이전트가 같은 파일을 쓰면 한 번만)
+        bodies = {}
+
+        def load_body(path):
+            if path not in bodies:
+                ch = changes_dict[path]
+                bodies[path] = (db_manager.get_change_content(ch), db_manager.get_change_diff(ch))
+            return bodies[path]
 
         agent_types = ["개선 에이전트", "칭찬 에이전트", "발견 에이전트"]
         tasks = []
@@ -202,12 +207,10 @@ async def run_agents_in_parallel(state: MyState) -> MyState:
             related_files = state["selected_topics"][agent_type]["related_files"]
 
             # 관련된 파일들의 코드와 diff만 결합
-            agent_related_changes = {path: changes_dict[path] for path in related_files if path in changes_dict}
+            agent_related_bodies = [load_body(path) for path in dict.fromkeys(related_files) if path in changes_dict]
 
-            combined_full_code = "\n\n".join(
-                ch["full_content"] for ch in agent_related_changes.values() if ch["full_content"]
-            )
-            combined_diff = "\n\n".join(ch["diff"] for ch in agent_related_changes.values() if ch["diff"])
+            combined_full_code = "\n\n".join(full_content for full_content, _ in agent_related_bodies if full_content)
+            combined_diff = "\n\n".join(diff for _, diff in agent_related_bodies if diff)
 
             inp = AgentInput(
                 agent_type=agent_type,
@@ -637,7 +640,8 @@ with open("graph.png", "wb") as f:
 
 # 만약 접 테스트하려면 run_graph 호출
 async def run_graph():
-    changes = db_manager.get_recent_changes()
+    # diff/전체 내용 본문 없이 경로와 통계, hunk 메타데이터만 담은 레코드 (본문은 노드에서 필요할 때 읽음)
+    changes = list(db_manager.iter_recent_changes())
     recent_topics = memory.get_recent_topics(days=3)
     today = datetime.now().strftime("%Y-%m-%d")
     original_habits_content = habit_manager.read_habits()
@@ -667,10 +671,14 @@ async def run_graph():
         "deep_explain_review_passed": False,
     }
 
-    result = await app.ainvoke(
-        initial_state,
-        {"recursion_limit": 30},  # 최대 25번의 노드 실행으로 제
-    )
+    try:
+        result = await app.ainvoke(
+            initial_state,
+            {"recursion_limit": 30},  # 최대 25번의 노드 실행으로 제
+        )
+    finally:
+        # 에이전트 리포트 저장에 쓰던 커넥션 정리
+        await rdb_repo.aclose()
 
     with open(f"report_{today}.txt", "w", encoding="utf-8") as f:
         f.write(result["final_report"])
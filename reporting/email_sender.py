@@ -1,11 +1,11 @@
 # reporting/email_sender.py
 
-import sqlite3
 from datetime import datetime
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config.settings import Config
+from file_watcher import db_connection
 import re
 import markdown2
 from pygments import highlight
@@ -27,7 +27,7 @@ class EmailSender:
             raise ValueError("Missing required email configuration in settings")
 
     def _get_latest_analysis(self):
-        conn = sqlite3.connect(Config.DB_PATH)
+        conn = db_connection.get_connection(Config.DB_PATH)
         try:
             cursor = conn.cursor()
             cursor.execute("""
@@ -39,7 +39,7 @@ class EmailSender:
             result = cursor.fetchone()
             return result if result else (None, None)
         finally:
-            conn.close()
+            db_connection.release(conn)
 
     def _highlight_code(self, code: str, language: str = "python") -> str:
         try:
@@ -0,0 +1,96 @@
+import asyncio
+import os
+import subprocess
+
+from file_watcher import db_connection
+from file_watcher.differ import FileChangeHandler
+from file_watcher.state_manager import DatabaseManager
+
+
+def scan(root, db_manager):
+    stats = asyncio.run(FileChangeHandler().scan_directory(str(root), db_manager))
+    assert stats.status == "completed"
+
+
+def change_types(db_manager, file_path):
+    conn = db_connection.get_connection(db_manager.db_path)
+    try:
+        return [
+            row[0]
+            for row in conn.execute(
+                """
+                SELECT fc.change_type FROM file_changes fc JOIN files f ON f.id = fc.file_id
+                WHERE f.file_path = ? ORDER BY fc.id
+                """,
+                (file_path,),
+            )
+        ]
+    finally:
+        db_connection.release(conn)
+
+
+def make_db(tmp_path):
+    db_manager = DatabaseManager(str(tmp_path / "history.db"))
+    asyncio.run(db_manager.initialize())
+    return db_manager
+
+
+def write_edit_delete(root, db_manager):
+    target = root / "gone.py"
+    target.write_text("def f():\n    return 1\n")
+    (root / "kept.py").write_text("x = 1\n")
+    scan(root, db_manager)
+    target.write_text("def f():\n    return 2\n")
+    os.utime(target, ns=(1, 1))
+    scan(root, db_manager)
+    os.remove(target)
+    scan(root, db_manager)
+    return str(target)
+
+
+def assert_deletion_recorded(db_manager, file_path):
+    assert change_types(db_manager, file_path) == ["add", "modify", "delete"]
+    assert [version["version"] for version in asyncio.run(db_manager.get_file_history(file_path))] == [1, 2]
+    record = next(change for change in db_manager.iter_recent_changes() if change["file_path"] == file_path)
+    assert record["change_type"] == "delete"
+    assert record["change_count"] == 3
+    assert "deleted file" in db_manager.get_change_diff(record)
+    assert db_manager.get_change_content(record) == ""
+    assert file_path not in asyncio.run(db_manager.get_directory_snapshot(os.path.dirname(file_path)))
+
+
+def test_deletion_keeps_history_in_plain_directory(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    db_manager = make_db(tmp_path)
+    file_path = write_edit_delete(root, db_manager)
+
+    assert_deletion_recorded(db_manager, file_path)
+    # 다음 스캔에서 같은 삭제를 다시 기록하지 않음
+    scan(root, db_manager)
+    assert change_types(db_manager, file_path) == ["add", "modify", "delete"]
+    assert change_types(db_manager, str(root / "kept.py")) == ["add"]
+
+
+def test_deletion_keeps_history_in_git_root(tmp_path):
+    root = tmp_path / "repo"
+    root.mkdir()
+    subprocess.run(["git", "-C", str(root), "init", "-q"], check=True)
+    db_manager = make_db(tmp_path)
+    file_path = write_edit_delete(root, db_manager)
+
+    assert_deletion_recorded(db_manager, file_path)
+
+
+def test_recreated_file_continues_history_as_add(tmp_path):
+    root = tmp_path / "tree"
+    root.mkdir()
+    db_manager = make_db(tmp_path)
+    file_path = write_edit_delete(root, db_manager)
+
+    (root / "gone.py").write_text("def f():\n    return 2\n")
+    scan(root, db_manager)
+
+    assert change_types(db_manager, file_path) == ["add", "modify", "delete", "add"]
+    assert [version["version"] for version in asyncio.run(db_manager.get_file_history(file_path))] == [1, 2, 3]
+    assert file_path in asyncio.run(db_manager.get_directory_snapshot(str(root)))
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import subprocess
+
+from file_watcher import git_source
+
+
+def git(root, *args):
+    subprocess.run(["git", "-C", str(root), *args], check=True, capture_output=True)
+
+
+def stat_key(path):
+    file_stat = os.stat(path)
+    return file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino
+
+
+def test_list_changes_reports_only_added_modified_and_deleted(tmp_path):
+    git(tmp_path, "init", "-q")
+    for name in ("same.py", "edited.py", "removed.py"):
+        (tmp_path / name).write_text(f"{name}\n")
+    git(tmp_path, "add", "-A")
+    known_stats = {str(tmp_path / name): stat_key(tmp_path / name) for name in ("same.py", "edited.py", "removed.py")}
+    known_stats[str(tmp_path / "gone_untracked.py")] = (1, 1, 1)
+
+    (tmp_path / "edited.py").write_text("edited again\n")
+    os.remove(tmp_path / "removed.py")
+    (tmp_path / "new.py").write_text("new\n")
+
+    source = git_source.GitChangeSource.open(str(tmp_path))
+    changes = asyncio.run(source.list_changes(known_stats, lambda rel_path: rel_path.endswith(".py")))
+
+    assert sorted(changes["changed"]) == [
+        (str(tmp_path / "edited.py"), git_source.MODIFIED),
+        (str(tmp_path / "new.py"), git_source.ADDED),
+    ]
+    assert changes["unchanged"] == [str(tmp_path / "same.py")]
+    assert sorted(changes["deleted"]) == [str(tmp_path / "gone_untracked.py"), str(tmp_path / "removed.py")]
+
+
+def test_list_changes_can_skip_untracked_listing(tmp_path):
+    git(tmp_path, "init", "-q")
+    (tmp_path / "tracked.py").write_text("t\n")
+    git(tmp_path, "add", "-A")
+    (tmp_path / "untracked.py").write_text("u\n")
+
+    source = git_source.GitChangeSource.open(str(tmp_path))
+    changes = asyncio.run(source.list_changes({}, lambda rel_path: True, include_untracked=False))
+
+    assert changes["changed"] == [(str(tmp_path / "tracked.py"), git_source.ADDED)]
+    assert changes["deleted"] == []
@@ -0,0 +1,129 @@
+import difflib
+
+from file_watcher import hunk_classifier
+from file_watcher.diff_engine import group_opcodes
+
+
+def classify(file_path, old_text, new_text):
+    old_lines = old_text.splitlines()
+    new_lines = new_text.splitlines()
+    opcodes = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False).get_opcodes()
+    return hunk_classifier.classify_groups(
+        old_lines,
+        new_lines,
+        list(group_opcodes(opcodes)),
+        hunk_classifier.comment_prefixes_for(file_path),
+        hunk_classifier.indent_sensitive_for(file_path),
+        hunk_classifier.regex_literals_for(file_path),
+        hunk_classifier.declaration_prefixes_for(file_path),
+    )
+
+
+def test_dedent_out_of_loop_is_meaningful_in_python():
+    old = "def f(xs):\n    total = 0\n    for x in xs:\n        total += x\n        print(total)\n    return total\n"
+    new = "def f(xs):\n    total = 0\n    for x in xs:\n        total += x\n    print(total)\n    return total\n"
+    assert classify("a.py", old, new) == [None]
+
+
+def test_edit_inside_string_literal_is_meaningful():
+    assert classify("a.py", 'msg = "a b"\n', 'msg = "ab"\n') == [None]
+    assert classify("a.js", "const msg = 'a  b';\n", "const msg = 'a b';\n") == [None]
+
+
+def test_edit_inside_multiline_string_is_meaningful():
+    old = 'def f():\n    """Docstring\n    with  two spaces\n    """\n'
+    new = 'def f():\n    """Docstring\n    with two spaces\n    """\n'
+    assert classify("a.py", old, new) == [None]
+
+
+def test_joining_tokens_is_meaningful():
+    assert classify("a.py", "def f(x):\n    return x\n", "def f(x):\n    returnx\n") == [None]
+
+
+def test_collapsed_and_trailing_whitespace_is_noise():
+    assert classify("a.py", "x = a  +  b\n", "x = a + b   \n") == [hunk_classifier.WHITESPACE]
+
+
+def test_rewrapped_lines_are_meaningful_in_javascript():
+    assert classify("a.js", "call(a,\n     b);\n", "call(a, b);\n") == [None]
+
+
+def test_joining_return_value_is_meaningful_in_javascript():
+    old = "function f() {\n  return\n    value;\n}\n"
+    new = "function f() {\n  return value;\n}\n"
+    assert classify("a.js", old, new) == [None]
+
+
+def test_whitespace_inside_regex_literal_is_meaningful():
+    assert classify("a.js", "const re = /a  b/g;\n", "const re = /a b/g;\n") == [None]
+    assert classify("a.js", "if (/x [(]/.test(s)) {}\n", "if (/x  [(]/.test(s)) {}\n") == [None]
+
+
+def test_whitespace_around_division_is_noise():
+    assert classify("a.js", "const half = total  /  2;\n", "const half = total / 2;\n") == [hunk_classifier.WHITESPACE]
+
+
+def test_reindent_is_noise_outside_indent_sensitive_languages():
+    old = "function f() {\n  return 1;\n}\n"
+    new = "function f() {\n    return 1;\n}\n"
+    assert classify("a.js", old, new) == [hunk_classifier.WHITESPACE]
+
+
+def test_comment_only_change_is_comment():
+    assert classify("a.py", "x = 1\n", "# set x\nx = 1\n") == [hunk_classifier.COMMENT]
+
+
+def test_quote_inside_comment_does_not_open_string():
+    old = "# don't  panic\nx = 1\n"
+    new = "# don't panic\nx = 1\n"
+    assert classify("a.py", old, new) == [hunk_classifier.WHITESPACE]
+
+
+def test_reorder_keeps_indentation_in_python():
+    old = "if a:\n    x = 1\ny = 2\n"
+    new = "if a:\n    y = 2\nx = 1\n"
+    assert classify("a.py", old, new) == [None]
+
+
+def test_rewrapped_call_inside_brackets_is_noise_in_python():
+    old = "def g():\n    x = f(1,\n          2)\n    return x\n"
+    new = "def g():\n    x = f(1, 2)\n    return x\n"
+    assert classify("a.py", old, new) == [hunk_classifier.WHITESPACE]
+
+
+def test_bracket_in_trailing_comment_does_not_hide_indentation():
+    old = "for x in xs:  # (see below\n    total += x\n    print(total)\n"
+    new = "for x in xs:  # (see below\n    total += x\nprint(total)\n"
+    assert classify("a.py", old, new) == [None]
+
+
+def test_moving_statement_into_block_is_meaningful():
+    old = "if (x) {\n  y();\n}\nz();\n"
+    new = "if (x) {\n  y();\n  z();\n}\n"
+    assert classify("a.js", old, new) == [None]
+
+
+def test_swapping_statements_is_meaningful():
+    assert classify("a.js", "a();\nb();\n", "b();\na();\n") == [None]
+    assert classify("a.py", "a = 1\nb = a\n", "b = a\na = 1\n") == [None]
+
+
+def test_swapping_function_headers_is_meaningful():
+    old = "function f() {\n  a();\n}\nfunction g() {\n  b();\n}\n"
+    new = "function g() {\n  a();\n}\nfunction f() {\n  b();\n}\n"
+    assert None in classify("a.js", old, new)
+
+
+def test_moving_whole_functions_is_reorder():
+    old = "def f():\n    return 1\n\n\ndef g():\n    return 2\n\n\nx = 1\n"
+    new = "def g():\n    return 2\n\n\ndef f():\n    return 1\n\n\nx = 1\n"
+    assert set(classify("a.py", old, new)) == {hunk_classifier.REORDER}
+    old = "function f() {\n  return 1;\n}\nfunction g() {\n  return 2;\n}\n"
+    new = "function g() {\n  return 2;\n}\nfunction f() {\n  return 1;\n}\n"
+    assert set(classify("a.js", old, new)) == {hunk_classifier.REORDER}
+
+
+def test_sorting_imports_is_reorder():
+    old = "import os\nimport sys\nimport json\n"
+    new = "import json\nimport os\nimport sys\n"
+    assert set(classify("a.py", old, new)) == {hunk_classifier.REORDER}
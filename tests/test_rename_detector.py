@@ -0,0 +1,40 @@
+import asyncio
+import os
+
+from file_watcher import db_connection
+from file_watcher.differ import FileChangeHandler
+from file_watcher.rename_detector import RenameDetector
+from file_watcher.state_manager import DatabaseManager
+
+
+def test_name_only_candidates_are_deferred_without_content():
+    detector = RenameDetector({"/old/pkg/__init__.py": {"hash": "old-hash", "stat": None, "content": None}})
+    detector.defer("new", ("/new/pkg/__init__.py", {"hash": "new-hash", "content": b"x" * 4096, "text": "x"}, None))
+    detector.defer("new", ("/new/copy.py", {"hash": "old-hash", "content": b"", "text": ""}, None))
+
+    assert detector._deferred_names == [("new", "/new/pkg/__init__.py")]
+    assert [result[0] for _, result in detector._deferred] == ["/new/copy.py"]
+
+
+def test_name_only_candidate_is_reloaded_and_renamed(tmp_path):
+    root = tmp_path / "tree"
+    (root / "old").mkdir(parents=True)
+    body = "".join(f"line {number}\n" for number in range(40))
+    (root / "old" / "__init__.py").write_text(body)
+    db_manager = DatabaseManager(str(tmp_path / "history.db"))
+    asyncio.run(db_manager.initialize())
+    handler = FileChangeHandler()
+    asyncio.run(handler.scan_directory(str(root), db_manager))
+
+    os.rename(root / "old", root / "new")
+    with open(root / "new" / "__init__.py", "a") as f:
+        f.write("extra\n")
+    stats = asyncio.run(handler.scan_directory(str(root), db_manager))
+
+    assert stats.counters.get("files_renamed") == 1
+    conn = db_connection.get_connection(db_manager.db_path)
+    try:
+        rows = conn.execute("SELECT change_type, old_path FROM file_changes ORDER BY id").fetchall()
+    finally:
+        db_connection.release(conn)
+    assert rows == [("add", None), ("rename", str(root / "old" / "__init__.py"))]
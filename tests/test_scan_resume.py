@@ -0,0 +1,57 @@
+import asyncio
+
+from file_watcher import db_connection
+from file_watcher.differ import FileChangeHandler
+from file_watcher.state_manager import DatabaseManager
+
+
+def interrupt_after(db_manager, root, directories):
+    """root의 스캔이 directories까지 저장하고 중단된 것처럼 실패한 실행과 체크포인트를 남깁니다."""
+    conn = db_connection.get_connection(db_manager.db_path)
+    try:
+        run_id = conn.execute(
+            "INSERT INTO scan_runs (root, status, started_at) VALUES (?, 'failed', datetime('now'))", (str(root),)
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO scan_checkpoints (run_id, directory, completed_at) VALUES (?, ?, datetime('now'))",
+            [(run_id, directory) for directory in directories],
+        )
+        conn.commit()
+    finally:
+        db_connection.release(conn)
+
+
+def changed_paths(db_manager):
+    conn = db_connection.get_connection(db_manager.db_path)
+    try:
+        return [
+            row[0]
+            for row in conn.execute(
+                "SELECT f.file_path FROM file_changes fc JOIN files f ON f.id = fc.file_id WHERE fc.change_type = 'modify'"
+            )
+        ]
+    finally:
+        db_connection.release(conn)
+
+
+def test_resume_rescans_files_changed_after_interruption(tmp_path):
+    root = tmp_path / "tree"
+    for directory in ("done", "todo"):
+        (root / directory).mkdir(parents=True)
+        for name in ("a.py", "b.py"):
+            (root / directory / name).write_text(f"{directory} {name}\n")
+    db_manager = DatabaseManager(str(tmp_path / "history.db"))
+    asyncio.run(db_manager.initialize())
+    handler = FileChangeHandler()
+    asyncio.run(handler.scan_directory(str(root), db_manager, incremental=False))
+
+    interrupt_after(db_manager, root, ["done"])
+    (root / "done" / "a.py").write_text("edited after the interrupted run\n")
+    (root / "done" / "new.py").write_text("created after the interrupted run\n")
+    stats = asyncio.run(handler.scan_directory(str(root), db_manager, incremental=False))
+
+    assert stats.status == "completed"
+    assert changed_paths(db_manager) == [str(root / "done" / "a.py")]
+    assert str(root / "done" / "new.py") in asyncio.run(db_manager.get_directory_snapshot(str(root)))
+    # 바뀌지 않은 체크포인트 디렉토리의 파일은 다시 읽지 않음
+    assert stats.counters["files_checkpointed"] == 1
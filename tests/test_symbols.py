@@ -0,0 +1,51 @@
+from file_watcher import symbols
+
+
+def names(text, language="javascript", jsx=False):
+    return [symbol[0] for symbol in symbols.extract_symbols(text, language, jsx)]
+
+
+def test_destructured_parameter():
+    assert names("function f({ a, b }) {}\n") == ["f"]
+
+
+def test_default_object_parameter():
+    assert names("function g(opts = {}) {}\n") == ["g"]
+
+
+def test_class_method_with_destructured_parameter():
+    assert names("class K {\n  m({ x }) {}\n}\n") == ["K", "K.m"]
+
+
+def test_typed_object_parameter():
+    assert names("function h(a: { x: number }): void {}\n", "typescript") == ["h"]
+
+
+def test_jsx_closing_tag_is_not_a_regex():
+    text = "export default function main() { return <div>{x}</div>; }\nconst arrow = () => {\n  return 1;\n};\n"
+    result = symbols.extract_symbols(text, "javascript", jsx=True)
+    assert [(symbol[0], symbol[2], symbol[3], symbol[4]) for symbol in result] == [
+        ("main", 1, 1, 0),
+        ("arrow", 2, 4, 0),
+    ]
+
+
+def test_react_component_with_destructured_props():
+    text = (
+        "const Card = ({ title, body }) => {\n"
+        "  return <section><h1>{title}</h1><p>{body}</p></section>;\n"
+        "};\n"
+        "export function List({ items }) {\n"
+        "  return <ul>{items.map((item) => <li>{item}</li>)}</ul>;\n"
+        "}\n"
+    )
+    assert names(text, jsx=True) == ["Card", "List"]
+
+
+def test_regex_after_less_than_outside_jsx():
+    assert names("const ok = a < /x/.test(s);\nfunction z() {}\n") == ["z"]
+
+
+def test_jsx_for():
+    assert symbols.jsx_for("src/App.tsx")
+    assert not symbols.jsx_for("src/app.ts")